@@ -1,4 +1,18 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db.models import Q
+from django.forms.models import BaseInlineFormSet
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from . import search as fts
+from .exporters import csv_response, xlsx_response
+from .forms import PartImportForm
+from .importers import ImportFormatError, import_parts
+from .pagination import EstimatedCountPaginator
 from .models import (
     MachineModel,
     Machine,
@@ -10,9 +24,100 @@ from .models import (
     TicketMessage,
     PartRequest,
     PartRequestItem,
+    OwnerCounters,
+    Job,
+    Notification,
 )
 
 
+class FullTextSearchMixin:
+    """
+    Troca o ``LIKE '%termo%'`` do admin pelo índice FTS5 (search.py).
+    ``exact_search_fields`` continuam valendo por igualdade (usam índice),
+    para achar por id, usuário ou serial.
+    """
+
+    search_kind = None
+    exact_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term or not fts.enabled():
+            return super().get_search_results(request, queryset, search_term)
+
+        cond = fts.match_condition(self.search_kind, term)
+        for field in self.exact_search_fields:
+            if field.endswith("id") and not term.isdigit():
+                continue
+            cond |= Q(**{field: term})
+        return queryset.filter(cond), False
+
+
+class EstimatedCountChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # o paginator pode ter trocado a estimativa pela contagem exata
+        # (páginas finais vazias): total e página atual acompanham
+        self.result_count = self.paginator.count
+        self.multi_page = self.result_count > self.list_per_page
+        self.page_num = min(self.page_num, self.paginator.num_pages)
+
+
+class LargeTableAdminMixin:
+    """
+    Change lists de tabelas que crescem sem limite: contagem estimada (sem
+    ``COUNT(*)`` na listagem sem filtros) e sem a segunda contagem do total.
+    Não use em tabelas expurgadas (Job, Notification): lá a estimativa fica
+    muito acima do real.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return EstimatedCountChangeList
+
+
+@admin.action(description="Exportar chamados selecionados (CSV)")
+def export_tickets_csv(modeladmin, request, queryset):
+    return csv_response("tickets", queryset)
+
+
+@admin.action(description="Exportar mensagens dos chamados selecionados (CSV)")
+def export_ticket_messages_csv(modeladmin, request, queryset):
+    return csv_response("messages", queryset)
+
+
+@admin.action(description="Exportar mensagens selecionadas (CSV)")
+def export_messages_csv(modeladmin, request, queryset):
+    return csv_response("messages", queryset)
+
+
+@admin.action(description="Exportar itens das solicitações selecionadas (CSV)")
+def export_part_request_items_csv(modeladmin, request, queryset):
+    return csv_response("part_requests", queryset)
+
+
+@admin.action(description="Exportar chamados selecionados (XLSX)")
+def export_tickets_xlsx(modeladmin, request, queryset):
+    return xlsx_response("tickets", queryset)
+
+
+@admin.action(description="Exportar mensagens dos chamados selecionados (XLSX)")
+def export_ticket_messages_xlsx(modeladmin, request, queryset):
+    return xlsx_response("messages", queryset)
+
+
+@admin.action(description="Exportar mensagens selecionadas (XLSX)")
+def export_messages_xlsx(modeladmin, request, queryset):
+    return xlsx_response("messages", queryset)
+
+
+@admin.action(description="Exportar itens das solicitações selecionadas (XLSX)")
+def export_part_request_items_xlsx(modeladmin, request, queryset):
+    return xlsx_response("part_requests", queryset)
+
+
 @admin.register(MachineModel)
 class MachineModelAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "category", "active")
@@ -21,74 +126,231 @@ class MachineModelAdmin(admin.ModelAdmin):
 
 
 @admin.register(Machine)
-class MachineAdmin(admin.ModelAdmin):
+class MachineAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "owner", "model", "serial", "city", "uf")
     list_filter = ("uf", "model")
+    list_select_related = ("owner", "model")
     search_fields = ("serial", "owner__username", "model__name")
+    autocomplete_fields = ("owner", "model")
 
 
 @admin.register(Symptom)
-class SymptomAdmin(admin.ModelAdmin):
+class SymptomAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ("id", "title", "category", "active")
     list_filter = ("category", "active")
     search_fields = ("title",)
+    search_kind = fts.KIND_SYMPTOM
 
 
 @admin.register(Manual)
-class ManualAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "model", "active")
+class ManualAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    list_display = ("id", "title", "model", "active", "page_count", "extract_status")
+    readonly_fields = ("page_count", "extract_status", "thumbnail")
     list_filter = ("model", "active")
+    list_select_related = ("model",)
     search_fields = ("title",)
+    search_kind = fts.KIND_MANUAL
+    autocomplete_fields = ("model",)
 
 
 @admin.register(Part)
-class PartAdmin(admin.ModelAdmin):
+class PartAdmin(FullTextSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "sku", "name", "active")
     list_filter = ("active",)
     search_fields = ("sku", "name")
+    search_kind = fts.KIND_PART
+    exact_search_fields = ("sku",)
+    change_list_template = "admin/assistencia_app/part/change_list.html"
     filter_horizontal = ("compatible_models",)
 
+    def get_urls(self):
+        urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="assistencia_app_part_import",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_change_permission(request) or not self.has_add_permission(request):
+            return redirect("admin:assistencia_app_part_changelist")
+
+        form = PartImportForm(request.POST or None, request.FILES or None)
+        report = None
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                report = import_parts(upload.file, upload.name, dry_run=form.cleaned_data["dry_run"])
+            except ImportFormatError as exc:
+                form.add_error("file", str(exc))
+            else:
+                level = messages.WARNING if report.skipped else messages.SUCCESS
+                self.message_user(request, report.summary(), level)
+
+        ctx = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Importar catálogo de peças",
+            "form": form,
+            "report": report,
+        }
+        return TemplateResponse(request, "admin/assistencia_app/part/import_catalog.html", ctx)
+
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(FullTextSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "owner", "machine", "status", "priority", "created_at")
     list_filter = ("status", "priority", "category")
+    list_select_related = ("owner", "machine__model")
+    autocomplete_fields = ("owner", "machine", "symptom")
     search_fields = ("id", "owner__username", "machine__serial")
+    search_kind = fts.KIND_TICKET
+    exact_search_fields = ("id", "owner__username", "machine__serial")
+    actions = [export_tickets_csv, export_ticket_messages_csv, export_tickets_xlsx, export_ticket_messages_xlsx]
     ordering = ("-id",)
 
 
 @admin.register(TicketMedia)
-class TicketMediaAdmin(admin.ModelAdmin):
+class TicketMediaAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     # ✅ removido 'media_type' porque não existe no model
     list_display = ("id", "ticket", "file", "created_at")
+    list_select_related = ("ticket",)
     search_fields = ("ticket__id", "ticket__owner__username")
+    raw_id_fields = ("ticket",)
     ordering = ("-id",)
 
 
 @admin.register(TicketMessage)
-class TicketMessageAdmin(admin.ModelAdmin):
+class TicketMessageAdmin(FullTextSearchMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "ticket", "sender_role", "created_at")
     list_filter = ("sender_role",)
+    list_select_related = ("ticket",)
+    raw_id_fields = ("ticket",)
     search_fields = ("ticket__id", "message")
+    search_kind = fts.KIND_MESSAGE
+    exact_search_fields = ("ticket__id",)
+    actions = [export_messages_csv, export_messages_xlsx]
     ordering = ("-id",)
 
 
+class PrefetchedAutocompleteSelect(AutocompleteSelect):
+    """
+    Autocomplete que monta a opção selecionada a partir do objeto já
+    carregado pelo inline, em vez de um SELECT por linha.
+    """
+
+    prefetched = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [str(v) for v in value if str(v) not in self.choices.field.empty_values]
+        objs = self.prefetched or {}
+        if not selected or any(v not in objs for v in selected):
+            return super().optgroups(name, value, attr)
+
+        default = (None, [], 0)
+        if not self.is_required:
+            default[1].append(self.create_option(name, "", "", False, 0))
+        for v in selected:
+            label = self.choices.field.label_from_instance(objs[v])
+            default[1].append(self.create_option(name, objs[v].pk, label, True, len(default[1])))
+        return [default]
+
+
+class PartRequestItemInlineFormSet(BaseInlineFormSet):
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        if form.instance.part_id:
+            widget = form.fields["part"].widget
+            widget = getattr(widget, "widget", widget)  # RelatedFieldWidgetWrapper
+            widget.prefetched = {str(form.instance.part_id): form.instance.part}
+        return form
+
+
 class PartRequestItemInline(admin.TabularInline):
     model = PartRequestItem
+    formset = PartRequestItemInlineFormSet
     extra = 0
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("part")
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "part":
+            kwargs["widget"] = PrefetchedAutocompleteSelect(db_field, self.admin_site, using=kwargs.get("using"))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
 
 @admin.register(PartRequest)
-class PartRequestAdmin(admin.ModelAdmin):
+class PartRequestAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "owner", "machine", "status", "created_at")
     list_filter = ("status",)
+    list_select_related = ("owner", "machine__model")
+    autocomplete_fields = ("owner", "machine")
     search_fields = ("id", "owner__username", "machine__serial")
     ordering = ("-id",)
     inlines = [PartRequestItemInline]
+    actions = [export_part_request_items_csv, export_part_request_items_xlsx]
 
 
 @admin.register(PartRequestItem)
-class PartRequestItemAdmin(admin.ModelAdmin):
+class PartRequestItemAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("id", "part_request", "part", "qty")
+    list_select_related = ("part_request", "part")
+    raw_id_fields = ("part_request",)
+    autocomplete_fields = ("part",)
     search_fields = ("part__name", "part__sku")
-    ordering = ("-id",)
\ No newline at end of file
+    ordering = ("-id",)
+
+
+@admin.register(OwnerCounters)
+class OwnerCountersAdmin(admin.ModelAdmin):
+    list_display = ("owner", "open_tickets", "open_part_requests", "last_activity_at")
+    list_select_related = ("owner",)
+    search_fields = ("owner__username",)
+    readonly_fields = ("owner", "open_tickets", "open_part_requests", "last_activity_at")
+
+    def has_add_permission(self, request):
+        # mantido pelos signals / rebuild_owner_counters
+        return False
+
+
+@admin.action(description="Reenfileirar agora")
+def requeue_jobs(modeladmin, request, queryset):
+    updated = queryset.exclude(status=Job.STATUS_RUNNING).update(
+        status=Job.STATUS_QUEUED, attempts=0, run_at=timezone.now(), finished_at=None
+    )
+    modeladmin.message_user(request, f"{updated} tarefa(s) de volta na fila.")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "priority", "attempts", "run_at", "locked_by", "created_at", "finished_at")
+    list_filter = ("status", "name", "priority")
+    search_fields = ("id", "locked_by")
+    readonly_fields = (
+        "name", "payload", "status", "attempts", "max_attempts", "run_at",
+        "locked_by", "locked_at", "last_error", "created_at", "finished_at",
+    )
+    actions = [requeue_jobs]
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        # criadas pelo código (jobs.enqueue)
+        return False
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "ticket", "kind", "created_at", "sent_at")
+    list_filter = ("kind", ("sent_at", admin.EmptyFieldListFilter))
+    list_select_related = ("user", "ticket")
+    raw_id_fields = ("user", "ticket")
+    search_fields = ("user__username", "ticket__id")
+    readonly_fields = ("user", "ticket", "kind", "text", "created_at", "sent_at")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        # gravadas pelos signals (notifications.py)
+        return False
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class AssistenciaAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "assistencia_app"
-    verbose_name = "Assistência Técnica"
\ No newline at end of file
+    verbose_name = "Assistência Técnica"
+
+    def ready(self):
+        from . import signals  # noqa: F401
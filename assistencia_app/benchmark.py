@@ -0,0 +1,352 @@
+"""
+Benchmark das páginas do portal e do site (comando ``benchmark_views``).
+
+Dois modos:
+
+- ``client``: Django test Client no mesmo processo, logado com
+  ``force_login``. Conta as queries de cada request e roda tudo dentro de
+  uma transação desfeita no fim (os POSTs não alteram o banco medido).
+- ``http``: requests reais contra um servidor (por exemplo um gunicorn
+  iniciado pelo próprio comando), com login pelo formulário e várias
+  threads. As queries vêm do header ``Server-Timing`` (core/perf.py), então
+  o servidor precisa estar com GIFTEX_PERF_INSTRUMENTATION=1. Aqui os POSTs
+  gravam de verdade.
+
+O resultado (por cenário: throughput, p50/p95/p99, queries por request) sai
+em JSON para comparar branches com ``--compare``.
+"""
+import io
+import json
+import platform
+import re
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.cookiejar import CookieJar
+from statistics import mean
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+import django
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Machine as CatalogMachine
+from core.perf import percentile
+
+from .compatibility import compatible_parts
+from .models import Machine, Manual, Part, PartRequest, Ticket, TicketMessage
+
+_QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    data: dict | None = None
+    files: dict = field(default_factory=dict)  # campo -> (nome, bytes, content type)
+
+
+@dataclass
+class Sample:
+    status: int
+    ms: float
+    queries: int | None
+
+
+def _tiny_jpeg():
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (640, 480), (180, 40, 40)).save(buf, "JPEG", quality=80)
+    return buf.getvalue()
+
+
+def build_scenarios(user, names=None):
+    """
+    Cenários para ``user``: os chamados, a máquina e as peças usados nos
+    detalhes e nos POSTs são do próprio usuário. ``ticket_detail`` alterna
+    entre os chamados mais recentes dele.
+    """
+    ticket_ids = list(Ticket.objects.filter(owner=user).order_by("-id").values_list("id", flat=True)[:20])
+    machine = (
+        Machine.objects.filter(owner=user)
+        .annotate(n=Count("model__compatible_parts"))
+        .order_by("-n", "id")
+        .first()
+    )
+    part_ids = []
+    if machine:
+        part_ids = list(compatible_parts(machine.model_id).values_list("id", flat=True)[:2])
+    catalog_slug = CatalogMachine.objects.values_list("slug", flat=True).first()
+
+    scenarios = [
+        Scenario("dashboard", "GET", reverse("assistencia:dashboard")),
+        Scenario("tickets_list", "GET", reverse("assistencia:tickets_list")),
+        Scenario("manuals_list", "GET", reverse("assistencia:manuals_list")),
+        Scenario("home", "GET", reverse("home")),
+        Scenario("machines", "GET", reverse("machines")),
+        Scenario("machines_search", "GET", f"{reverse('machines')}?q=maquina"),
+    ]
+    for ticket_id in ticket_ids[:5]:
+        scenarios.append(
+            Scenario("ticket_detail", "GET", reverse("assistencia:ticket_detail", kwargs={"ticket_id": ticket_id}))
+        )
+    if catalog_slug:
+        scenarios.append(Scenario("machine_detail", "GET", reverse("machine_detail", kwargs={"slug": catalog_slug})))
+    if machine:
+        scenarios.append(
+            Scenario(
+                "ticket_create",
+                "POST",
+                reverse("assistencia:ticket_create"),
+                data={
+                    "machine": machine.id,
+                    "category": machine.model.category,
+                    "symptom": "",
+                    "priority": Ticket.PRIORITY_MEDIUM,
+                    "description": "Chamado aberto pelo benchmark.",
+                },
+                files={"media_files": ("benchmark.jpg", _tiny_jpeg(), "image/jpeg")},
+            )
+        )
+    if machine and part_ids:
+        data = {
+            "machine": machine.id,
+            "contact_name": "Benchmark",
+            "contact_phone": "(31) 90000-0000",
+            "shipping_name": "Benchmark",
+            "shipping_zip": "35700-000",
+            "shipping_address": "Rua do Teste",
+            "shipping_city": "Sete Lagoas",
+            "shipping_uf": "MG",
+            "items-TOTAL_FORMS": len(part_ids),
+            "items-INITIAL_FORMS": 0,
+        }
+        for i, part_id in enumerate(part_ids):
+            data[f"items-{i}-part"] = part_id
+            data[f"items-{i}-qty"] = 1
+        scenarios.append(Scenario("part_request_create", "POST", reverse("assistencia:part_request_create"), data))
+
+    if names:
+        scenarios = [s for s in scenarios if s.name in names]
+    return scenarios
+
+
+def group(scenarios):
+    grouped = {}
+    for s in scenarios:
+        grouped.setdefault(s.name, []).append(s)
+    return grouped
+
+
+# ---------------------------------------------------------------- drivers
+class ClientDriver:
+    def __init__(self, user):
+        self.client = Client()
+        self.client.force_login(user)
+
+    def request(self, scenario):
+        data = dict(scenario.data or {})
+        for name, (filename, content, content_type) in scenario.files.items():
+            upload = io.BytesIO(content)
+            upload.name = filename
+            data[name] = upload
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            if scenario.method == "POST":
+                response = self.client.post(scenario.path, data)
+            else:
+                response = self.client.get(scenario.path)
+            ms = (time.perf_counter() - start) * 1000
+        return Sample(response.status_code, ms, len(queries))
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    # mede só o request do cenário, não a página para onde ele redireciona
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        )
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode()
+            + content
+            + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+class HttpDriver:
+    def __init__(self, base_url, username, password, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.cookies = CookieJar()
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), _NoRedirect)
+        self._login(username, password)
+
+    def _csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == settings.CSRF_COOKIE_NAME:
+                return cookie.value
+        return ""
+
+    def _send(self, method, path, fields=None, files=None):
+        body, headers = None, {"Referer": self.base_url + path}
+        if method == "POST":
+            fields = {**(fields or {}), "csrfmiddlewaretoken": self._csrf()}
+            if files:
+                body, content_type = _multipart(fields, files)
+            else:
+                body, content_type = urlencode(fields).encode(), "application/x-www-form-urlencoded"
+            headers["Content-Type"] = content_type
+        request = Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            response = self.opener.open(request, timeout=self.timeout)
+        except HTTPError as exc:
+            # 3xx/4xx/5xx chegam como exceção (redirects não são seguidos)
+            response = exc
+        with response:
+            response.read()
+            return response.status, response.headers.get("Server-Timing", "")
+
+    def _login(self, username, password):
+        path = reverse("assistencia:auth_login")
+        self._send("GET", path)
+        status, _ = self._send("POST", path, {"username": username, "password": password})
+        if status != 302:
+            raise RuntimeError(f"login de {username!r} falhou (HTTP {status})")
+
+    def request(self, scenario):
+        start = time.perf_counter()
+        status, server_timing = self._send(scenario.method, scenario.path, scenario.data, scenario.files)
+        ms = (time.perf_counter() - start) * 1000
+        match = _QUERIES_RE.search(server_timing)
+        return Sample(status, ms, int(match.group(1)) if match else None)
+
+
+# ---------------------------------------------------------------- execução
+def summarize(samples, wall_seconds):
+    latencies = sorted(s.ms for s in samples)
+    queries = [s.queries for s in samples if s.queries is not None]
+    statuses = {}
+    for s in samples:
+        statuses[str(s.status)] = statuses.get(str(s.status), 0) + 1
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s.status >= 400),
+        "status": statuses,
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "mean_ms": round(mean(latencies), 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "queries_mean": round(mean(queries), 2) if queries else None,
+        "queries_max": max(queries) if queries else None,
+    }
+
+
+def run_scenario(drivers, variants, requests, warmup=0):
+    """
+    ``requests`` requests de um cenário (alternando as variantes), divididos
+    entre os drivers; com mais de um driver, cada um roda numa thread.
+    """
+    per_driver = max(1, requests // len(drivers))
+    for driver in drivers:
+        for i in range(warmup):
+            driver.request(variants[i % len(variants)])
+
+    def work(driver):
+        return [driver.request(variants[i % len(variants)]) for i in range(per_driver)]
+
+    start = time.perf_counter()
+    if len(drivers) == 1:
+        batches = [work(drivers[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(drivers)) as pool:
+            batches = list(pool.map(work, drivers))
+    wall = time.perf_counter() - start
+    return summarize([s for batch in batches for s in batch], wall)
+
+
+def dataset_info():
+    return {
+        "tickets": Ticket.objects.count(),
+        "messages": TicketMessage.objects.count(),
+        "part_requests": PartRequest.objects.count(),
+        "parts": Part.objects.count(),
+        "manuals": Manual.objects.count(),
+    }
+
+
+def environment_info(mode, **extra):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "mode": mode,
+        "commit": commit,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "debug": settings.DEBUG,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        **extra,
+    }
+
+
+def compare(current, baseline, max_regression=20.0, min_delta_ms=2.0):
+    """
+    Diferenças por cenário contra um resultado anterior. Regressão = p95
+    acima de ``max_regression`` % (e de ``min_delta_ms``, para páginas de
+    1-2 ms não acusarem ruído) ou mais queries por request.
+    """
+    lines, regressions = [], []
+    for name, now in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        p95_delta = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        q_now, q_before = now.get("queries_mean"), before.get("queries_mean")
+        lines.append(
+            f"{name:22} p95 {before['p95_ms']:8.1f} -> {now['p95_ms']:8.1f} ms ({p95_delta:+.0f}%)  "
+            f"queries {q_before} -> {q_now}"
+        )
+        if p95_delta > max_regression and now["p95_ms"] - before["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {p95_delta:+.0f}%")
+        if q_now is not None and q_before is not None and q_now > q_before:
+            regressions.append(f"{name}: queries {q_before} -> {q_now}")
+    return lines, regressions
+
+
+def load(path):
+    with open(path, encoding="utf-8") as fp:
+        return json.load(fp)
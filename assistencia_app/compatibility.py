@@ -0,0 +1,130 @@
+import unicodedata
+
+from django.db import transaction
+
+from .models import Part, PartCompatibility
+
+LOOKUP_PAGE_SIZE = 20
+
+
+def fold(text):
+    """Minúsculo e sem acentos ("Máquina" -> "maquina")."""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def _row(part, model_id):
+    return PartCompatibility(
+        machine_model_id=model_id,
+        part_id=part.id,
+        sku_key=part.sku.upper(),
+        # espaço à esquerda: " correia dentada" casa prefixo de qualquer palavra
+        search_name=" " + fold(part.name),
+        active=part.active,
+    )
+
+
+def sync_part(part):
+    """Reaplica sku/nome/ativo da peça nas linhas já existentes."""
+    PartCompatibility.objects.filter(part_id=part.id).update(
+        sku_key=part.sku.upper(),
+        search_name=" " + fold(part.name),
+        active=part.active,
+    )
+
+
+def sync_parts(parts):
+    """Versão em lote de ``sync_part`` (imports)."""
+    by_id = {p.id: p for p in parts}
+    if not by_id:
+        return
+    rows = list(PartCompatibility.objects.filter(part_id__in=by_id))
+    for row in rows:
+        part = by_id[row.part_id]
+        row.sku_key = part.sku.upper()
+        row.search_name = " " + fold(part.name)
+        row.active = part.active
+    PartCompatibility.objects.bulk_update(rows, ["sku_key", "search_name", "active"], batch_size=500)
+
+
+def add_pairs(pairs):
+    """``pairs``: iterável de (part_id, machine_model_id)."""
+    pairs = list(pairs)
+    if not pairs:
+        return
+    parts = Part.objects.in_bulk({p for p, _ in pairs})
+    rows = [_row(parts[p], m) for p, m in pairs if p in parts]
+    PartCompatibility.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+
+
+def remove_pairs(pairs):
+    pairs = list(pairs)
+    by_part = {}
+    for part_id, model_id in pairs:
+        by_part.setdefault(part_id, []).append(model_id)
+    for part_id, model_ids in by_part.items():
+        PartCompatibility.objects.filter(part_id=part_id, machine_model_id__in=model_ids).delete()
+
+
+@transaction.atomic
+def rebuild_compatibility():
+    Through = Part.compatible_models.through
+    PartCompatibility.objects.all().delete()
+
+    batch = []
+    pairs = Through.objects.values_list("part_id", "machinemodel_id").order_by("part_id")
+    for pair in pairs.iterator(chunk_size=2000):
+        batch.append(pair)
+        if len(batch) >= 2000:
+            add_pairs(batch)
+            batch = []
+    add_pairs(batch)
+
+
+def compatible_parts(machine_model_id):
+    """Peças ativas compatíveis com o modelo (ou todas, se o modelo não tiver cadastro)."""
+    qs = Part.objects.filter(active=True)
+    compat = PartCompatibility.objects.filter(machine_model_id=machine_model_id)
+    if machine_model_id and compat.exists():
+        qs = qs.filter(id__in=compat.values("part_id"))
+    return qs
+
+
+def lookup_parts(q="", machine_model_id=None, after_sku=None, limit=LOOKUP_PAGE_SIZE):
+    """
+    Peças ativas para o autocomplete, ordenadas por SKU e paginadas por
+    chave (``after_sku``). Com ``machine_model_id`` usa a tabela de
+    compatibilidade; se o modelo não tiver nenhuma peça cadastrada, cai no
+    catálogo inteiro para não deixar o cliente sem opção.
+
+    Busca prefixo de SKU (faixa no índice) ou prefixo de palavra do nome.
+    """
+    q = (q or "").strip()
+
+    if machine_model_id and PartCompatibility.objects.filter(machine_model_id=machine_model_id).exists():
+        qs = PartCompatibility.objects.filter(machine_model_id=machine_model_id, active=True)
+        sku_field, name_field = "sku_key", "search_name"
+        qs = qs.select_related("part")
+    else:
+        qs = Part.objects.filter(active=True)
+        sku_field, name_field = "sku", "name"
+
+    if q:
+        if sku_field == "sku_key":
+            key = q.upper()
+            by_sku = qs.filter(sku_key__gte=key, sku_key__lt=key + "\uffff")
+            by_name = qs.filter(search_name__contains=" " + fold(q))
+            qs = by_sku | by_name
+        else:
+            qs = qs.filter(sku__istartswith=q) | qs.filter(name__icontains=q)
+
+    if after_sku:
+        qs = qs.filter(**{f"{sku_field}__gt": after_sku})
+
+    rows = list(qs.order_by(sku_field)[: limit + 1])
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    parts = [r.part if isinstance(r, PartCompatibility) else r for r in rows]
+
+    next_cursor = getattr(rows[-1], sku_field) if has_next else None
+    return parts, next_cursor
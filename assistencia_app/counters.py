@@ -0,0 +1,97 @@
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import OwnerCounters, PartRequest, Ticket
+
+
+def compute_owner_counters(owner_id):
+    """Recalcula os contadores de um dono direto das tabelas (2 agregações)."""
+    tickets = Ticket.objects.filter(owner_id=owner_id).aggregate(
+        open=Count("id", filter=~Q(status__in=Ticket.CLOSED_STATUSES)),
+        last=Max("updated_at"),
+    )
+    part_requests = PartRequest.objects.filter(owner_id=owner_id).aggregate(
+        open=Count("id", filter=~Q(status__in=PartRequest.CLOSED_STATUSES)),
+        last=Max("created_at"),
+    )
+    activity = [d for d in (tickets["last"], part_requests["last"]) if d]
+    return {
+        "open_tickets": tickets["open"],
+        "open_part_requests": part_requests["open"],
+        "last_activity_at": max(activity) if activity else None,
+    }
+
+
+def rebuild_owner_counters(owner_id):
+    counters, _ = OwnerCounters.objects.update_or_create(
+        owner_id=owner_id,
+        defaults=compute_owner_counters(owner_id),
+    )
+    return counters
+
+
+def get_owner_counters(owner_id):
+    counters = OwnerCounters.objects.filter(owner_id=owner_id).first()
+    if counters is None:
+        counters = rebuild_owner_counters(owner_id)
+    return counters
+
+
+def apply_delta(owner_id, field, delta, touch=True, create=True):
+    """
+    Soma ``delta`` no contador ``field`` com um UPDATE atômico (F()).
+    Se o dono ainda não tem linha (e ``create``), ela é criada já com os
+    valores reais.
+    """
+    changes = {}
+    if delta:
+        changes[field] = Greatest(F(field) + delta, 0)
+    if touch:
+        changes["last_activity_at"] = timezone.now()
+    if not changes:
+        return
+
+    updated = OwnerCounters.objects.filter(owner_id=owner_id).update(**changes)
+    if not updated and create:
+        rebuild_owner_counters(owner_id)
+
+
+def rebuild_all_owner_counters(owner_ids=None, batch_size=2000):
+    """
+    Versão em lote do rebuild (cargas em massa, ``bulk_create`` não dispara
+    signals): duas agregações agrupadas por dono + upsert.
+    """
+    tickets = Ticket.objects.all()
+    part_requests = PartRequest.objects.all()
+    if owner_ids is not None:
+        tickets = tickets.filter(owner_id__in=owner_ids)
+        part_requests = part_requests.filter(owner_id__in=owner_ids)
+
+    values = {}
+    for owner_id, open_count, last in (
+        tickets.values_list("owner_id")
+        .annotate(open=Count("id", filter=~Q(status__in=Ticket.CLOSED_STATUSES)), last=Max("updated_at"))
+        .order_by()
+    ):
+        values[owner_id] = [open_count, 0, last]
+    for owner_id, open_count, last in (
+        part_requests.values_list("owner_id")
+        .annotate(open=Count("id", filter=~Q(status__in=PartRequest.CLOSED_STATUSES)), last=Max("created_at"))
+        .order_by()
+    ):
+        row = values.setdefault(owner_id, [0, 0, None])
+        row[1] = open_count
+        row[2] = max(d for d in (row[2], last) if d) if (row[2] or last) else None
+
+    OwnerCounters.objects.bulk_create(
+        [
+            OwnerCounters(owner_id=owner_id, open_tickets=t, open_part_requests=p, last_activity_at=last)
+            for owner_id, (t, p, last) in values.items()
+        ],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["owner"],
+        update_fields=["open_tickets", "open_part_requests", "last_activity_at"],
+    )
+    return len(values)
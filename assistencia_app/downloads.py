@@ -0,0 +1,133 @@
+"""
+Entrega de arquivos do MEDIA_ROOT por uma view (com checagem de acesso).
+
+Suporta requisições condicionais (ETag/Last-Modified -> 304) e ``Range`` de
+um intervalo (206), o que deixa o leitor de PDF do navegador abrir uma
+página no meio do manual sem baixar tudo. Com um proxy na frente, a entrega
+pode ser repassada a ele via ``X-Sendfile`` (Apache) ou ``X-Accel-Redirect``
+(nginx), configurado em ASSISTENCIA_SENDFILE.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+CHUNK_SIZE = 64 * 1024
+MAX_AGE = 3600
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header, size):
+    """
+    ``(início, fim)`` inclusivos de um ``Range: bytes=...`` de um intervalo.
+
+    Devolve None para ignorar o cabeçalho (ausente, malformado ou com vários
+    intervalos: aí vai o arquivo inteiro, o que a RFC permite) e ``False``
+    quando o intervalo não cabe no arquivo (416).
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # sufixo: os últimos N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _iter_range(path, start, length):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _if_range_matches(request, etag, last_modified):
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith(('"', "W/")):
+        return value == etag
+    date = parse_http_date_safe(value)
+    return date is not None and int(last_modified) <= date
+
+
+def _offload(fieldfile, response):
+    backend = getattr(settings, "ASSISTENCIA_SENDFILE", "")
+    if backend == "x-sendfile":
+        response["X-Sendfile"] = fieldfile.path
+    elif backend == "x-accel-redirect":
+        prefix = getattr(settings, "ASSISTENCIA_SENDFILE_ACCEL_PREFIX", "/protected-media/")
+        response["X-Accel-Redirect"] = prefix + quote(fieldfile.name)
+    else:
+        return None
+    return response
+
+
+def serve_file(request, fieldfile, filename=None, as_attachment=False):
+    """Resposta para um FileField salvo no disco local (FileSystemStorage)."""
+    path = fieldfile.path
+    filename = filename or os.path.basename(fieldfile.name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    disposition = content_disposition_header(as_attachment, filename)
+
+    offloaded = _offload(fieldfile, HttpResponse(content_type=content_type))
+    if offloaded is not None:
+        # o proxy cuida de Range/condicionais
+        offloaded["Content-Disposition"] = disposition
+        return offloaded
+
+    st = os.stat(path)
+    size = st.st_size
+    etag = f'"{int(st.st_mtime):x}-{size:x}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(st.st_mtime))
+    if response is None:
+        byte_range = None
+        if request.method == "GET" and _if_range_matches(request, etag, st.st_mtime):
+            byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _iter_range(path, start, end - start + 1), status=206, content_type=content_type
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+        elif request.method == "HEAD":
+            response = HttpResponse(content_type=content_type)
+            response["Content-Length"] = str(size)
+        else:
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+            response["Content-Length"] = str(size)
+        response["Content-Disposition"] = disposition
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(st.st_mtime)
+    response["Cache-Control"] = f"private, max-age={MAX_AGE}"
+    return response
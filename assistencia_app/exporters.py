@@ -0,0 +1,178 @@
+"""
+Exportações para a equipe (chamados, mensagens e itens de solicitações).
+
+As linhas saem de ``values_list(...).iterator(chunk_size=...)`` com os
+JOINs já feitos no banco (dono, máquina, modelo, sintoma), sem instanciar
+models e sem carregar o resultado inteiro na memória. O CSV é gerado de
+forma incremental para o ``StreamingHttpResponse``. O XLSX é um zip: sai do
+openpyxl em modo write_only para um arquivo temporário e vai em streaming
+pelo ``FileResponse``.
+"""
+import csv
+import tempfile
+from datetime import datetime
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .models import PartRequestItem, Ticket, TicketMessage
+
+CHUNK_SIZE = 2000
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# células começando com estes caracteres viram fórmula no Excel
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+TICKET_COLUMNS = [
+    ("id", "Chamado"),
+    ("created_at", "Criado em"),
+    ("updated_at", "Atualizado em"),
+    ("status", "Status"),
+    ("priority", "Prioridade"),
+    ("category", "Categoria"),
+    ("owner__username", "Cliente"),
+    ("owner__email", "E-mail"),
+    ("machine_id", "Máquina"),
+    ("machine__model__name", "Modelo"),
+    ("machine__serial", "Serial"),
+    ("machine__city", "Cidade"),
+    ("machine__uf", "UF"),
+    ("symptom__title", "Sintoma"),
+    ("description", "Descrição"),
+]
+
+MESSAGE_COLUMNS = [
+    ("id", "Mensagem"),
+    ("ticket_id", "Chamado"),
+    ("created_at", "Enviada em"),
+    ("sender_role", "Remetente"),
+    ("ticket__owner__username", "Cliente"),
+    ("ticket__status", "Status do chamado"),
+    ("message", "Mensagem"),
+]
+
+# uma linha por item, com o cabeçalho da solicitação repetido
+PART_REQUEST_ITEM_COLUMNS = [
+    ("part_request_id", "Solicitação"),
+    ("part_request__created_at", "Criada em"),
+    ("part_request__status", "Status"),
+    ("part_request__owner__username", "Cliente"),
+    ("part_request__machine__model__name", "Modelo"),
+    ("part_request__machine__serial", "Serial"),
+    ("part_request__contact_name", "Contato"),
+    ("part_request__contact_phone", "Telefone"),
+    ("part_request__shipping_name", "Destinatário"),
+    ("part_request__shipping_cpf_cnpj", "CPF/CNPJ"),
+    ("part_request__shipping_zip", "CEP"),
+    ("part_request__shipping_address", "Endereço"),
+    ("part_request__shipping_number", "Número"),
+    ("part_request__shipping_complement", "Complemento"),
+    ("part_request__shipping_neighborhood", "Bairro"),
+    ("part_request__shipping_city", "Cidade"),
+    ("part_request__shipping_uf", "UF"),
+    ("part__sku", "SKU"),
+    ("part__name", "Peça"),
+    ("qty", "Qtd"),
+    ("notes", "Obs. do item"),
+    ("part_request__notes", "Obs. da solicitação"),
+]
+
+EXPORTS = {
+    "tickets": (Ticket, TICKET_COLUMNS, None),
+    "messages": (TicketMessage, MESSAGE_COLUMNS, "ticket"),
+    "part_requests": (PartRequestItem, PART_REQUEST_ITEM_COLUMNS, "part_request"),
+}
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_rows(kind, queryset=None, chunk_size=CHUNK_SIZE):
+    """
+    Cabeçalho + linhas de uma exportação. ``queryset`` (opcional) restringe
+    o conjunto: do próprio model exportado ou, para mensagens/itens, do
+    model pai (Ticket/PartRequest), como vem das ações do admin.
+    """
+    model, columns, parent = EXPORTS[kind]
+    qs = model.objects.all()
+    if queryset is not None:
+        if queryset.model is model:
+            qs = queryset
+        else:
+            qs = qs.filter(**{f"{parent}__in": queryset.values("pk")})
+
+    yield [label for _, label in columns]
+    fields = [f for f, _ in columns]
+    rows = qs.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)
+    for row in rows:
+        yield [_cell(v) for v in row]
+
+
+class _Echo:
+    # "arquivo" que só devolve o que o csv.writer escreve
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo(), delimiter=getattr(settings, "ASSISTENCIA_EXPORT_CSV_DELIMITER", ";"))
+    yield "\ufeff"  # BOM: o Excel reconhece o UTF-8
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def csv_response(kind, queryset=None):
+    filename = f"{kind}-{timezone.localtime():%Y%m%d-%H%M}.csv"
+    response = StreamingHttpResponse(
+        stream_csv(export_rows(kind, queryset)),
+        content_type="text/csv; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(kind, queryset=None):
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(kind, tmp, queryset)
+    tmp.seek(0)
+    # o FileResponse fecha (e apaga) o temporário no fim do envio
+    return FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=f"{kind}-{timezone.localtime():%Y%m%d-%H%M}.xlsx",
+        content_type=XLSX_CONTENT_TYPE,
+    )
+
+
+def write_xlsx(kind, path, queryset=None):
+    """XLSX em modo write_only do openpyxl (memória constante). Devolve o nº de linhas."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(kind)
+    rows = export_rows(kind, queryset)
+    sheet.append(next(rows))
+    total = 0
+    for row in rows:
+        sheet.append(row)
+        total += 1
+    workbook.save(path)
+    return total
+
+
+def write_csv(kind, fileobj, queryset=None):
+    """Grava o CSV em ``fileobj`` (texto). Devolve o nº de linhas."""
+    total = 0
+    for chunk in stream_csv(export_rows(kind, queryset)):
+        fileobj.write(chunk)
+        total += 1
+    return max(total - 2, 0)  # BOM e cabeçalho
@@ -1,13 +1,14 @@
 from django import forms
 from django.contrib.auth import authenticate
 
+from . import throttling
+from .compatibility import compatible_parts
 from .models import (
     Machine,
     Ticket,
     TicketMessage,
     PartRequest,
     PartRequestItem,
-    Part,
     Symptom,
 )
 
@@ -22,18 +23,44 @@ class LoginForm(forms.Form):
         widget=forms.PasswordInput(attrs={"class": "form-control", "placeholder": "Senha"}),
     )
 
+    def __init__(self, *args, request=None, **kwargs):
+        self.request = request
+        self.retry_after = 0
+        super().__init__(*args, **kwargs)
+
     def clean(self):
         cleaned = super().clean()
         username = cleaned.get("username")
         password = cleaned.get("password")
         if username and password:
-            user = authenticate(username=username, password=password)
+            # bloqueado: recusa antes do authenticate (sem calcular o hash da senha)
+            self.retry_after = throttling.retry_after(self.request, username)
+            if self.retry_after:
+                raise forms.ValidationError(
+                    "Muitas tentativas de login. Tente novamente em %(seconds)s segundos.",
+                    code="throttled",
+                    params={"seconds": self.retry_after},
+                )
+            user = authenticate(self.request, username=username, password=password)
             if not user:
+                throttling.register_failure(self.request, username)
                 raise forms.ValidationError("Usuário ou senha inválidos.")
+            throttling.register_success(self.request, username)
             cleaned["user"] = user
         return cleaned
 
 
+class PartImportForm(forms.Form):
+    file = forms.FileField(label="Arquivo (CSV ou XLSX)")
+    dry_run = forms.BooleanField(label="Só simular (não grava nada)", required=False, initial=True)
+
+    def clean_file(self):
+        f = self.cleaned_data["file"]
+        if not f.name.lower().endswith((".csv", ".txt", ".xlsx", ".xlsm")):
+            raise forms.ValidationError("Envie um arquivo .csv ou .xlsx.")
+        return f
+
+
 class MachineForm(forms.ModelForm):
     class Meta:
         model = Machine
@@ -52,11 +79,20 @@ class MultipleFileInput(forms.ClearableFileInput):
     allow_multiple_selected = True
 
 
+class MultipleFileField(forms.FileField):
+    # FileField sozinho só valida um arquivo; com vários ele recusa o envio
+    def clean(self, data, initial=None):
+        single_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_clean(d, initial) for d in data]
+        return single_clean(data, initial)
+
+
 class TicketCreateForm(forms.ModelForm):
-    media_files = forms.FileField(
+    media_files = MultipleFileField(
         label="Fotos/Vídeos (opcional)",
         required=False,
-        widget=MultipleFileInput(attrs={"class": "form-control"}),
+        widget=MultipleFileInput(attrs={"class": "form-control", "accept": "image/*,video/*"}),
     )
 
     class Meta:
@@ -76,7 +112,9 @@ class TicketCreateForm(forms.ModelForm):
 
         # filtra máquina do dono
         if user:
-            self.fields["machine"].queryset = Machine.objects.filter(owner=user).order_by("-id")
+            self.fields["machine"].queryset = (
+                Machine.objects.filter(owner=user).select_related("model").order_by("-id")
+            )
 
         # sintomas ativos
         self.fields["symptom"].queryset = Symptom.objects.filter(active=True).order_by("title")
@@ -131,26 +169,100 @@ class PartRequestForm(forms.ModelForm):
         user = kwargs.pop("user", None)
         super().__init__(*args, **kwargs)
         if user:
-            self.fields["machine"].queryset = Machine.objects.filter(owner=user).order_by("-id")
+            self.fields["machine"].queryset = (
+                Machine.objects.filter(owner=user).select_related("model").order_by("-id")
+            )
 
 
-class PartRequestItemForm(forms.ModelForm):
-    class Meta:
-        model = PartRequestItem
-        fields = ["part", "qty", "notes"]
-        widgets = {
-            "part": forms.Select(attrs={"class": "form-select"}),
-            "qty": forms.NumberInput(attrs={"class": "form-control", "min": 1}),
-            "notes": forms.TextInput(attrs={"class": "form-control", "placeholder": "Opcional"}),
-        }
+class PartRequestItemForm(forms.Form):
+    # id da peça, escolhida pelo autocomplete (parts/lookup/); a validação
+    # contra o catálogo é feita de uma vez no formset
+    part = forms.IntegerField(widget=forms.HiddenInput(), required=False)
+    qty = forms.IntegerField(
+        label="Qtd",
+        min_value=1,
+        initial=1,
+        widget=forms.NumberInput(attrs={"class": "form-control", "min": 1}),
+    )
+    notes = forms.CharField(
+        label="Obs",
+        max_length=160,
+        required=False,
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Opcional"}),
+    )
 
-    def __init__(self, *args, **kwargs):
-        machine = kwargs.pop("machine", None)
+    part_label = ""
+
+
+class BasePartRequestItemFormSet(forms.BaseFormSet):
+    """
+    Linhas da solicitação de peça. Todas as peças informadas são buscadas
+    numa única consulta (já filtrada pela compatibilidade da máquina) e
+    linhas repetidas da mesma peça viram uma só, com as quantidades somadas.
+    Depois de ``is_valid()``, ``self.items`` tem a lista final.
+    """
+
+    def __init__(self, *args, machine=None, **kwargs):
+        self.machine = machine
+        self.items = []
         super().__init__(*args, **kwargs)
 
-        qs = Part.objects.filter(active=True).order_by("name")
-        # Se quiser filtrar por compatibilidade de modelo:
-        if machine and machine.model_id:
-            qs = qs.filter(compatible_models=machine.model).distinct().order_by("name")
+        part_ids = set()
+        if self.is_bound:
+            for form in self.forms:
+                value = form["part"].value()
+                if value and str(value).isdigit():
+                    part_ids.add(int(value))
+
+        allowed = compatible_parts(machine.model_id if machine else None)
+        self.parts = allowed.in_bulk(part_ids) if part_ids else {}
+
+        for form in self.forms:
+            value = form["part"].value()
+            part = self.parts.get(int(value)) if value and str(value).isdigit() else None
+            form.part_label = str(part) if part else ""
+
+    def clean(self):
+        if any(self.errors):
+            return
+
+        merged = {}
+        for form in self.forms:
+            if not form.has_changed():
+                continue
+            part_id = form.cleaned_data.get("part")
+            if not part_id:
+                if form.cleaned_data.get("notes"):
+                    form.add_error("part", "Escolha a peça desta linha.")
+                continue
 
-        self.fields["part"].queryset = qs
\ No newline at end of file
+            part = self.parts.get(part_id)
+            if part is None:
+                form.add_error("part", "Peça indisponível para esta máquina.")
+                continue
+
+            line = merged.get(part.sku)
+            if line is None:
+                merged[part.sku] = {"part": part, "qty": form.cleaned_data["qty"], "notes": []}
+                line = merged[part.sku]
+            else:
+                line["qty"] += form.cleaned_data["qty"]
+            if form.cleaned_data.get("notes"):
+                line["notes"].append(form.cleaned_data["notes"])
+
+        if not merged and not any(f.errors for f in self.forms):
+            raise forms.ValidationError("Informe ao menos uma peça.")
+
+        self.items = [
+            PartRequestItem(part=line["part"], qty=line["qty"], notes="; ".join(line["notes"])[:160])
+            for line in merged.values()
+        ]
+
+
+PartRequestItemFormSet = forms.formset_factory(
+    PartRequestItemForm,
+    formset=BasePartRequestItemFormSet,
+    extra=3,
+    max_num=60,
+    validate_max=True,
+)
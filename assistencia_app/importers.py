@@ -0,0 +1,292 @@
+"""
+Importação em lote do catálogo de peças e da matriz de compatibilidade.
+
+O arquivo (CSV ou XLSX) é lido linha a linha e processado em lotes: para
+cada lote, uma consulta traz as peças existentes por SKU, as novas entram
+com ``bulk_create``, as alteradas com ``bulk_update`` e a compatibilidade
+é aplicada por diferença na tabela do M2M. A memória depende do tamanho do
+lote, não do arquivo.
+
+Colunas (cabeçalho obrigatório, sem diferenciar maiúsculas):
+``sku`` (obrigatória), ``name``/``nome``, ``description``/``descricao``,
+``active``/``ativo`` e ``models``/``modelos`` (nomes ou ids de MachineModel
+separados por ``;`` ou ``|``). Coluna ausente = campo não é alterado.
+"""
+import csv
+import io
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.db import transaction
+
+from . import compatibility, search
+from .models import MachineModel, Part
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+COLUMN_ALIASES = {
+    "sku": "sku",
+    "name": "name",
+    "nome": "name",
+    "description": "description",
+    "descricao": "description",
+    "descrição": "description",
+    "active": "active",
+    "ativo": "active",
+    "models": "models",
+    "modelos": "models",
+    "compatible_models": "models",
+}
+
+TRUE_VALUES = {"1", "true", "t", "sim", "s", "yes", "y", "x"}
+FALSE_VALUES = {"0", "false", "f", "nao", "não", "n", "no"}
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool = False
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    compat_added: int = 0
+    compat_removed: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def summary(self):
+        prefix = "[simulação] " if self.dry_run else ""
+        return (
+            f"{prefix}{self.rows} linha(s): {self.created} criada(s), {self.updated} atualizada(s), "
+            f"{self.unchanged} sem mudança, {self.skipped} ignorada(s); "
+            f"compatibilidade +{self.compat_added} / -{self.compat_removed}"
+        )
+
+
+def _normalize_header(header):
+    columns = []
+    for name in header:
+        key = compatibility.fold(str(name or "")).replace(" ", "_")
+        columns.append(COLUMN_ALIASES.get(key, COLUMN_ALIASES.get(str(name or "").strip().lower())))
+    if "sku" not in columns:
+        raise ImportFormatError("Cabeçalho sem a coluna 'sku'.")
+    return columns
+
+
+def _iter_csv(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        yield from csv.reader(text, dialect)
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportFormatError("Para importar XLSX instale o openpyxl (pip install -r requirements.txt).") from exc
+
+    # read_only: o openpyxl lê a planilha em streaming
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if v is None else str(v) for v in row]
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename):
+    """Gera dicts por linha (com o número da linha), já com colunas normalizadas."""
+    if Path(filename).suffix.lower() in (".xlsx", ".xlsm"):
+        raw = _iter_xlsx(fileobj)
+    else:
+        raw = _iter_csv(fileobj)
+
+    header = next(raw, None)
+    if not header:
+        raise ImportFormatError("Arquivo vazio.")
+    columns = _normalize_header(header)
+
+    for line, values in enumerate(raw, start=2):
+        if not any(str(v).strip() for v in values):
+            continue
+        yield line, {col: str(v).strip() for col, v in zip(columns, values) if col}
+
+
+def _parse_bool(value):
+    value = compatibility.fold(value)
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError(f"valor inválido para ativo: {value!r}")
+
+
+class PartCatalogImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        self.batch_size = batch_size
+        self.report = ImportReport(dry_run=dry_run)
+        self.Through = Part.compatible_models.through
+
+        # modelos de máquina são poucos: resolvidos em memória por id e por nome
+        self.models_by_key = {}
+        for mm in MachineModel.objects.only("id", "name"):
+            self.models_by_key[str(mm.id)] = mm.id
+            self.models_by_key[compatibility.fold(mm.name)] = mm.id
+
+    def run(self, rows):
+        batch = []
+        for line, data in rows:
+            self.report.rows += 1
+            parsed = self._parse(line, data)
+            if parsed:
+                batch.append(parsed)
+            if len(batch) >= self.batch_size:
+                self._apply(batch)
+                batch = []
+        if batch:
+            self._apply(batch)
+        return self.report
+
+    def _parse(self, line, data):
+        sku = data.get("sku", "")
+        if not sku:
+            self.report.error(line, "SKU vazio.")
+            return None
+        if len(sku) > Part._meta.get_field("sku").max_length:
+            self.report.error(line, f"SKU muito longo: {sku!r}.")
+            return None
+
+        values = {}
+        if "name" in data:
+            values["name"] = data["name"][: Part._meta.get_field("name").max_length]
+        if "description" in data:
+            values["description"] = data["description"]
+        if data.get("active"):
+            try:
+                values["active"] = _parse_bool(data["active"])
+            except ValueError as exc:
+                self.report.error(line, str(exc))
+                return None
+
+        model_ids = None
+        if "models" in data:
+            model_ids = set()
+            for token in data["models"].replace("|", ";").split(";"):
+                token = token.strip()
+                if not token:
+                    continue
+                model_id = self.models_by_key.get(token) or self.models_by_key.get(compatibility.fold(token))
+                if model_id is None:
+                    self.report.error(line, f"Modelo desconhecido: {token!r}.")
+                    return None
+                model_ids.add(model_id)
+
+        return line, sku, values, model_ids
+
+    def _apply(self, batch):
+        # a mesma SKU repetida no lote: vale a última linha
+        by_sku = {}
+        for line, sku, values, model_ids in batch:
+            by_sku[sku] = (line, values, model_ids)
+
+        with transaction.atomic():
+            existing = Part.objects.in_bulk(list(by_sku), field_name="sku")
+
+            to_create, to_update, update_fields = [], [], set()
+            for sku, (line, values, _) in by_sku.items():
+                part = existing.get(sku)
+                if part is None:
+                    if not values.get("name"):
+                        self.report.error(line, f"Peça nova {sku!r} sem nome.")
+                        continue
+                    to_create.append(Part(sku=sku, **values))
+                    continue
+
+                changed = [f for f, v in values.items() if getattr(part, f) != v]
+                if changed:
+                    for f in changed:
+                        setattr(part, f, values[f])
+                    update_fields.update(changed)
+                    to_update.append(part)
+                else:
+                    self.report.unchanged += 1
+
+            self.report.created += len(to_create)
+            self.report.updated += len(to_update)
+
+            if not self.report.dry_run:
+                Part.objects.bulk_create(to_create, batch_size=500)
+                if to_update:
+                    Part.objects.bulk_update(to_update, sorted(update_fields), batch_size=500)
+                    compatibility.sync_parts(to_update)
+                if search.enabled():
+                    search.index_objects(to_create + to_update)
+
+            self._apply_compatibility(by_sku, existing, to_create)
+
+    def _apply_compatibility(self, by_sku, existing, created):
+        wanted = {sku: ids for sku, (_, _, ids) in by_sku.items() if ids is not None}
+        if not wanted:
+            return
+
+        parts = {**existing, **{p.sku: p for p in created}}
+        current = {}
+        existing_ids = [existing[sku].id for sku in wanted if sku in existing]
+        if existing_ids:
+            pairs = self.Through.objects.filter(part_id__in=existing_ids).values_list("part_id", "machinemodel_id")
+            for part_id, model_id in pairs:
+                current.setdefault(part_id, set()).add(model_id)
+
+        add, remove = [], []
+        for sku, model_ids in wanted.items():
+            part = parts.get(sku)
+            if part is None:
+                continue
+            # na simulação as peças novas não têm id; conta pela SKU mesmo
+            key = part.id if part.id is not None else sku
+            have = current.get(key, set())
+            add.extend((key, m) for m in model_ids - have)
+            remove.extend((key, m) for m in have - model_ids)
+
+        self.report.compat_added += len(add)
+        self.report.compat_removed += len(remove)
+        if self.report.dry_run:
+            return
+
+        self.Through.objects.bulk_create(
+            [self.Through(part_id=p, machinemodel_id=m) for p, m in add],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        by_part = {}
+        for part_id, model_id in remove:
+            by_part.setdefault(part_id, []).append(model_id)
+        for part_id, model_ids in by_part.items():
+            self.Through.objects.filter(part_id=part_id, machinemodel_id__in=model_ids).delete()
+
+        # bulk_create/delete no through não disparam m2m_changed
+        compatibility.add_pairs(add)
+        compatibility.remove_pairs(remove)
+
+
+def import_parts(fileobj, filename, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    importer = PartCatalogImporter(batch_size=batch_size, dry_run=dry_run)
+    return importer.run(iter_rows(fileobj, filename))
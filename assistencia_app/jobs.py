@@ -0,0 +1,173 @@
+"""
+Fila de tarefas em segundo plano no próprio banco (model ``Job``), sem
+broker externo.
+
+O request chama ``enqueue(...)``: a linha entra na mesma transação do que a
+originou (se o request falhar, a tarefa some junto) e o request volta na
+hora. O comando ``run_jobs`` (um ou vários processos) pega as tarefas com
+``claim``: seleciona as próximas por prioridade e as marca como RUNNING com
+um UPDATE condicional (``status = QUEUED``), então duas cópias do worker
+nunca pegam a mesma. No PostgreSQL usa ``SELECT ... FOR UPDATE SKIP LOCKED``.
+
+Falhou: volta para a fila com espera exponencial (JOBS_RETRY_BASE_SECONDS *
+2^tentativa, até JOBS_RETRY_MAX_SECONDS) até ``max_attempts``. Worker que
+morreu no meio: a tarefa é devolvida depois de JOBS_LOCK_TIMEOUT.
+
+Com JOBS_EAGER a tarefa roda logo após o commit, no próprio processo, mas só
+a que já está pronta: ``delay``, a espera entre tentativas e a janela do
+resumo de e-mails (``run_at`` no futuro) ficam para o ``run_jobs``.
+"""
+import logging
+import os
+import random
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# nome da tarefa -> função (recebe o payload como kwargs)
+TASKS = {
+    "media.derivatives": "assistencia_app.media_derivatives.build_pending",
+    "manuals.extract": "assistencia_app.manuals.extract_pending",
+    "notifications.flush": "assistencia_app.notifications.flush",
+}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(name, payload=None, priority=Job.PRIORITY_NORMAL, delay=0, max_attempts=None):
+    if name not in TASKS:
+        raise ValueError(f"tarefa desconhecida: {name}")
+    job = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or _setting("JOBS_MAX_ATTEMPTS", 5),
+    )
+    if _setting("JOBS_EAGER", False) and delay <= 0:
+        # desenvolvimento sem worker: roda logo depois do commit, no próprio processo
+        transaction.on_commit(lambda: run_eager(job.pk))
+    return job
+
+
+def claim(worker, limit=1):
+    """Reserva até ``limit`` tarefas prontas para ``worker``."""
+    now = timezone.now()
+    ready = Job.objects.filter(status=Job.STATUS_QUEUED, run_at__lte=now).order_by("priority", "run_at", "id")
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list("id", flat=True)[:limit])
+            if not ids:
+                return []
+            Job.objects.filter(id__in=ids).update(status=Job.STATUS_RUNNING, locked_by=worker, locked_at=now)
+    else:
+        # SQLite: um único UPDATE. SELECT + UPDATE na mesma transação dá
+        # "database is locked" na hora quando dois workers disputam a escrita.
+        claimed = Job.objects.filter(id__in=ready.values("id")[:limit], status=Job.STATUS_QUEUED).update(
+            status=Job.STATUS_RUNNING, locked_by=worker, locked_at=now
+        )
+        if not claimed:
+            return []
+    return list(
+        Job.objects.filter(status=Job.STATUS_RUNNING, locked_by=worker, locked_at=now)
+        .order_by("priority", "run_at", "id")
+    )
+
+
+def backoff_seconds(attempts):
+    base = _setting("JOBS_RETRY_BASE_SECONDS", 30)
+    delay = min(base * 2 ** max(attempts - 1, 0), _setting("JOBS_RETRY_MAX_SECONDS", 3600))
+    # espalha as novas tentativas para não voltarem todas juntas
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run(job):
+    """Executa uma tarefa já reservada e grava o resultado. Devolve o status final."""
+    now = timezone.now()
+    job.attempts += 1
+    try:
+        func = import_string(TASKS[job.name])
+    except (KeyError, ImportError) as exc:
+        return _finish(job, Job.STATUS_FAILED, error=f"tarefa indisponível: {exc}")
+
+    try:
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Tarefa %s falhou (tentativa %s/%s)", job, job.attempts, job.max_attempts)
+        if job.attempts >= job.max_attempts:
+            return _finish(job, Job.STATUS_FAILED, error=error)
+        job.run_at = now + timedelta(seconds=backoff_seconds(job.attempts))
+        return _finish(job, Job.STATUS_QUEUED, error=error)
+    return _finish(job, Job.STATUS_DONE)
+
+
+def _finish(job, status, error=""):
+    job.status = status
+    job.last_error = error[-5000:]
+    job.locked_by = ""
+    job.locked_at = None
+    job.finished_at = timezone.now() if status in (Job.STATUS_DONE, Job.STATUS_FAILED) else None
+    job.save(update_fields=[
+        "status", "attempts", "run_at", "locked_by", "locked_at", "last_error", "finished_at",
+    ])
+    return status
+
+
+def run_eager(job_id):
+    jobs = Job.objects.filter(id=job_id, status=Job.STATUS_QUEUED, run_at__lte=timezone.now())
+    if jobs.update(status=Job.STATUS_RUNNING, locked_by=worker_name(), locked_at=timezone.now()):
+        run(Job.objects.get(id=job_id))
+
+
+def requeue_stale(timeout=None):
+    """Devolve para a fila tarefas presas em RUNNING (worker morto) há mais de ``timeout`` s."""
+    timeout = _setting("JOBS_LOCK_TIMEOUT", 600) if timeout is None else timeout
+    stale = Job.objects.filter(
+        status=Job.STATUS_RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=timeout)
+    )
+    total = 0
+    for job in stale:
+        # o worker morreu no meio: conta como tentativa
+        job.attempts += 1
+        status = Job.STATUS_FAILED if job.attempts >= job.max_attempts else Job.STATUS_QUEUED
+        total += Job.objects.filter(id=job.id, status=Job.STATUS_RUNNING, locked_at=job.locked_at).update(
+            status=status,
+            attempts=job.attempts,
+            locked_by="",
+            locked_at=None,
+            last_error=f"sem resposta do worker {job.locked_by}",
+            finished_at=timezone.now() if status == Job.STATUS_FAILED else None,
+        )
+    return total
+
+
+def purge_finished(days):
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.STATUS_DONE, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def work(worker, limit=1):
+    """Um ciclo do worker: reserva e executa. Devolve quantas tarefas rodou."""
+    close_old_connections()
+    jobs = claim(worker, limit)
+    for job in jobs:
+        run(job)
+    close_old_connections()
+    return len(jobs)
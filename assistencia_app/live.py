@@ -0,0 +1,85 @@
+"""
+Avisos em tempo real dentro do processo, para as views assíncronas de
+long-poll (deploy ASGI, giftex/asgi.py).
+
+Cada conexão esperando fica num ``asyncio.Event`` por tópico, sem prender
+thread nem worker. Os signals publicam depois do commit; quem acorda volta
+ao banco para buscar o que mudou, então o aviso não leva dados e perder um
+não quebra nada. O hub é por processo: o que foi gravado em outro worker
+aparece na checagem periódica (ASSISTENCIA_LIVE_RECHECK).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+STAFF_TOPIC = "staff"
+
+
+def ticket_topic(ticket_id):
+    return f"ticket:{ticket_id}"
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters = defaultdict(set)  # tópico -> {(loop, event)}
+
+    @contextmanager
+    def subscribe(self, *topics):
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            for topic in topics:
+                self._waiters[topic].add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                for topic in topics:
+                    self._waiters[topic].discard(waiter)
+                    if not self._waiters[topic]:
+                        del self._waiters[topic]
+
+    def publish(self, *topics):
+        """Pode ser chamado de qualquer thread (signals rodam fora do event loop)."""
+        with self._lock:
+            waiters = set().union(*(self._waiters.get(topic, ()) for topic in topics))
+        for loop, event in waiters:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
+
+    def subscribers(self, topic=None):
+        with self._lock:
+            if topic is not None:
+                return len(self._waiters.get(topic, ()))
+            return len(set().union(*self._waiters.values())) if self._waiters else 0
+
+
+hub = Hub()
+
+
+async def wait_for(check, topics, timeout=None, recheck=None):
+    """
+    Chama ``check()`` (coroutine) na hora, a cada aviso de ``topics`` e a
+    cada ``recheck`` segundos, até ela devolver algo; passado ``timeout``
+    devolve o último resultado (vazio).
+    """
+    timeout = getattr(settings, "ASSISTENCIA_LIVE_TIMEOUT", 25) if timeout is None else timeout
+    recheck = getattr(settings, "ASSISTENCIA_LIVE_RECHECK", 5) if recheck is None else recheck
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    # inscreve antes da primeira checagem: nada publicado entre as duas se perde
+    with hub.subscribe(*topics) as event:
+        while True:
+            event.clear()
+            result = await check()
+            remaining = deadline - loop.time()
+            if result or remaining <= 0:
+                return result
+            try:
+                await asyncio.wait_for(event.wait(), min(recheck, remaining))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,113 @@
+import json
+import time
+import uuid
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from assistencia_app import benchmark, forms, throttling
+from core.perf import percentile
+
+ROUNDS = (("sem limite", False), ("com limite", True))
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula um ataque de senhas no login do portal (vários IPs e usuários) com e sem o "
+        "limite de tentativas: CPU por request, quantos authenticate() rodaram e a latência "
+        "do login de um cliente legítimo durante o ataque. Nada fica gravado no banco."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="POSTs do ataque por rodada.")
+        parser.add_argument("--usernames", type=int, default=40, help="Usuários diferentes atacados.")
+        parser.add_argument("--ips", type=int, default=4, help="IPs de origem do ataque.")
+        parser.add_argument("--legit-every", type=int, default=20,
+                            help="Um login legítimo (outro IP) a cada N requests do ataque.")
+        parser.add_argument("--output", help="Grava o resultado em JSON neste arquivo.")
+
+    def handle(self, *args, **options):
+        password = uuid.uuid4().hex
+        results = {}
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(f"bench-login-{uuid.uuid4().hex[:8]}", password=password)
+            for label, enabled in ROUNDS:
+                # cache local e vazio a cada rodada (não mexe no cache do site)
+                caches = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                                      "LOCATION": f"benchmark-login-{uuid.uuid4().hex}"}}
+                with override_settings(LOGIN_THROTTLE_ENABLED=enabled, CACHES=caches):
+                    results[label] = self._round(user, password, options)
+            transaction.set_rollback(True)
+
+        self._print(results)
+        if options["output"]:
+            report = {
+                "meta": benchmark.environment_info(
+                    "client", requests=options["requests"], usernames=options["usernames"], ips=options["ips"]
+                ),
+                "results": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as fp:
+                json.dump(report, fp, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultado gravado em {options['output']}")
+
+    def _round(self, user, password, options):
+        login_url = reverse("assistencia:auth_login")
+        calls = 0
+        authenticate = forms.authenticate
+
+        def counting_authenticate(*args, **kwargs):
+            nonlocal calls
+            calls += 1
+            return authenticate(*args, **kwargs)
+
+        attackers = [Client(REMOTE_ADDR=f"203.0.113.{i + 1}") for i in range(max(1, options["ips"]))]
+        attack, legit, cpu_ms = [], [], []
+        with mock.patch.object(forms, "authenticate", counting_authenticate):
+            started_wall, started_cpu = time.perf_counter(), time.process_time()
+            for i in range(options["requests"]):
+                data = {"username": f"cliente{i % max(1, options['usernames'])}", "password": f"tentativa-{i}"}
+                cpu, wall = time.process_time(), time.perf_counter()
+                response = attackers[i % len(attackers)].post(login_url, data)
+                attack.append(benchmark.Sample(response.status_code, (time.perf_counter() - wall) * 1000, None))
+                cpu_ms.append((time.process_time() - cpu) * 1000)
+
+                if options["legit_every"] and i % options["legit_every"] == 0:
+                    wall = time.perf_counter()
+                    response = Client(REMOTE_ADDR="198.51.100.7").post(
+                        login_url, {"username": user.get_username(), "password": password}
+                    )
+                    legit.append(benchmark.Sample(response.status_code, (time.perf_counter() - wall) * 1000, None))
+            wall_seconds = time.perf_counter() - started_wall
+            cpu_seconds = time.process_time() - started_cpu
+
+        cpu_ms.sort()
+        return {
+            "attack": benchmark.summarize(attack, wall_seconds),
+            "legit": benchmark.summarize(legit, wall_seconds) if legit else None,
+            "legit_ok": sum(1 for s in legit if s.status == 302),
+            "authenticate_calls": calls,
+            "cpu_seconds": round(cpu_seconds, 3),
+            "cpu_p50_ms": round(percentile(cpu_ms, 50), 2),
+            "cpu_p95_ms": round(percentile(cpu_ms, 95), 2),
+            "throttle": throttling.metrics(),
+        }
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'rodada':12} {'requests':>8} {'429':>6} {'auth()':>7} {'CPU s':>7} {'CPU p50':>8} "
+            f"{'CPU p95':>8} {'legít. ok':>10} {'legít. p95':>11}"
+        )
+        for label, r in results.items():
+            legit = r["legit"]
+            self.stdout.write(
+                f"{label:12} {r['attack']['requests']:8} {r['attack']['status'].get('429', 0):6} "
+                f"{r['authenticate_calls']:7} {r['cpu_seconds']:7.2f} {r['cpu_p50_ms']:8.1f} {r['cpu_p95_ms']:8.1f} "
+                f"{(str(r['legit_ok']) + '/' + str(legit['requests'])) if legit else '-':>10} "
+                f"{legit['p95_ms'] if legit else 0:11.1f}"
+            )
@@ -0,0 +1,91 @@
+import multiprocessing
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core.db import PRODUCTION_PRAGMAS, pragma_statements
+
+# perfil padrão = o que o Django faz sem OPTIONS (journal DELETE, BEGIN adiado)
+PROFILES = {
+    "default": {"pragmas": {}, "begin": "BEGIN"},
+    "production": {"pragmas": PRODUCTION_PRAGMAS, "begin": "BEGIN IMMEDIATE"},
+}
+
+SCHEMA = (
+    "CREATE TABLE bench_message ("
+    "id INTEGER PRIMARY KEY, ticket_id INTEGER NOT NULL, message TEXT NOT NULL, created_at REAL NOT NULL)",
+    "CREATE INDEX bench_message_ticket ON bench_message (ticket_id, id)",
+)
+
+
+def _worker(path, profile, writes, start_at, worker_id):
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for statement in pragma_statements(PROFILES[profile]["pragmas"]):
+        conn.execute(statement)
+    begin = PROFILES[profile]["begin"]
+
+    while time.time() < start_at:
+        time.sleep(0.001)
+
+    ok = locked = 0
+    for i in range(writes):
+        ticket_id = (worker_id * writes + i) % 50
+        try:
+            # padrão de uma view: lê o chamado e depois grava a mensagem
+            conn.execute(begin)
+            conn.execute("SELECT COUNT(*) FROM bench_message WHERE ticket_id = ?", [ticket_id]).fetchone()
+            conn.execute(
+                "INSERT INTO bench_message (ticket_id, message, created_at) VALUES (?, ?, ?)",
+                [ticket_id, "x" * 200, time.time()],
+            )
+            conn.execute("COMMIT")
+            ok += 1
+        except sqlite3.OperationalError:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            locked += 1
+    conn.close()
+    return ok, locked, time.time()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede gravações concorrentes no SQLite (vários processos, como os workers do "
+        "gunicorn) com o perfil padrão e com o perfil de produção (core/db.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=200, help="Transações por worker.")
+        parser.add_argument("--profile", choices=[*PROFILES, "both"], default="both")
+
+    def handle(self, *args, **options):
+        profiles = list(PROFILES) if options["profile"] == "both" else [options["profile"]]
+        workers, writes = options["workers"], options["writes"]
+        ctx = multiprocessing.get_context("spawn")
+
+        for profile in profiles:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = str(Path(tmp) / "bench.sqlite3")
+                conn = sqlite3.connect(path)
+                for statement in SCHEMA:
+                    conn.execute(statement)
+                conn.commit()
+                conn.close()
+
+                start_at = time.time() + 1.0  # tempo para os processos subirem
+                with ctx.Pool(workers) as pool:
+                    results = pool.starmap(
+                        _worker, [(path, profile, writes, start_at, w) for w in range(workers)]
+                    )
+
+            ok = sum(r[0] for r in results)
+            locked = sum(r[1] for r in results)
+            elapsed = max(r[2] for r in results) - start_at
+            self.stdout.write(
+                f"{profile:<11} {workers} workers  {ok} gravações em {elapsed:.2f}s  "
+                f"= {ok / elapsed:.0f}/s  ({locked} 'database is locked')"
+            )
@@ -0,0 +1,172 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+from django.test.utils import override_settings
+
+from assistencia_app import benchmark
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError("o gunicorn terminou antes de aceitar conexões.")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"o gunicorn não respondeu na porta {port}.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede as páginas do portal e do site (dashboard, chamados, solicitações, manuais, catálogo): "
+        "throughput, p50/p95/p99 e queries por request, com saída em JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=["client", "http"], default="client",
+                            help="client = test Client no processo (POSTs desfeitos); http = servidor real.")
+        parser.add_argument("--username", help="Usuário do portal (padrão: o dono com mais chamados).")
+        parser.add_argument("--password", default="synthetic", help="Senha (modo http).")
+        parser.add_argument("--base-url", default="", help="Servidor já rodando (modo http).")
+        parser.add_argument("--gunicorn", action="store_true", help="Sobe um gunicorn local para o modo http.")
+        parser.add_argument("--workers", type=int, default=2, help="Workers do gunicorn.")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--requests", type=int, default=50, help="Requests medidos por cenário.")
+        parser.add_argument("--concurrency", type=int, default=1, help="Clientes simultâneos (modo http).")
+        parser.add_argument("--warmup", type=int, default=3, help="Requests de aquecimento por cenário.")
+        parser.add_argument("--only", action="append", help="Roda só este cenário (pode repetir).")
+        parser.add_argument("--output", help="Grava o resultado em JSON neste arquivo.")
+        parser.add_argument("--compare", help="JSON de uma execução anterior para comparar.")
+        parser.add_argument("--max-regression", type=float, default=20.0,
+                            help="Piora máxima aceita no p95, em %% (com --compare).")
+
+    def handle(self, *args, **options):
+        if options["gunicorn"]:
+            options["mode"] = "http"
+        mode = options["mode"]
+        if mode == "http" and not (options["base_url"] or options["gunicorn"]):
+            raise CommandError("no modo http informe --base-url ou use --gunicorn.")
+
+        user = self._user(options["username"])
+        scenarios = benchmark.group(benchmark.build_scenarios(user, options["only"]))
+        if not scenarios:
+            raise CommandError("nenhum cenário para rodar.")
+
+        if mode == "client":
+            results = self._run_client(user, scenarios, options)
+            extra = {}
+        else:
+            results = self._run_http(user, scenarios, options)
+            extra = {"concurrency": options["concurrency"], "workers": options["workers"] if options["gunicorn"] else None}
+
+        report = {
+            "meta": benchmark.environment_info(
+                mode, user=user.get_username(), requests=options["requests"], **extra
+            ),
+            "dataset": benchmark.dataset_info(),
+            "results": results,
+        }
+        self._print(results)
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fp:
+                json.dump(report, fp, indent=2, ensure_ascii=False)
+            self.stdout.write(f"Resultado gravado em {options['output']}")
+
+        if options["compare"]:
+            lines, regressions = benchmark.compare(
+                report, benchmark.load(options["compare"]), options["max_regression"]
+            )
+            for line in lines:
+                self.stdout.write(line)
+            if regressions:
+                raise CommandError("Regressões: " + "; ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("Sem regressões."))
+
+    def _user(self, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(**{User.USERNAME_FIELD: username})
+            except User.DoesNotExist:
+                raise CommandError(f"usuário {username!r} não existe.")
+        user = (
+            User.objects.filter(is_active=True)
+            .annotate(n=Count("tickets"))
+            .filter(n__gt=0)
+            .order_by("-n", "id")
+            .first()
+        )
+        if user is None:
+            raise CommandError("nenhum usuário com chamados (rode generate_synthetic_data antes).")
+        return user
+
+    def _run_client(self, user, scenarios, options):
+        results = {}
+        # uploads num diretório temporário; os POSTs são desfeitos no fim
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            with transaction.atomic():
+                driver = benchmark.ClientDriver(user)
+                for name, variants in scenarios.items():
+                    results[name] = benchmark.run_scenario(
+                        [driver], variants, options["requests"], options["warmup"]
+                    )
+                transaction.set_rollback(True)
+        return results
+
+    def _run_http(self, user, scenarios, options):
+        server = None
+        base_url = options["base_url"]
+        if options["gunicorn"]:
+            base_url = f"http://127.0.0.1:{options['port']}"
+            server = subprocess.Popen(
+                [
+                    sys.executable, "-m", "gunicorn", "giftex.wsgi:application",
+                    "-b", f"127.0.0.1:{options['port']}",
+                    "-w", str(options["workers"]),
+                    "--log-level", "warning",
+                ],
+                cwd=settings.BASE_DIR,
+                env={**os.environ, "GIFTEX_PERF_INSTRUMENTATION": "1"},
+            )
+        try:
+            if server:
+                _wait_for_port(options["port"], server)
+            drivers = [
+                benchmark.HttpDriver(base_url, user.get_username(), options["password"])
+                for _ in range(max(1, options["concurrency"]))
+            ]
+            return {
+                name: benchmark.run_scenario(drivers, variants, options["requests"], options["warmup"])
+                for name, variants in scenarios.items()
+            }
+        except (OSError, RuntimeError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=30)
+
+    def _print(self, results):
+        self.stdout.write(
+            f"{'cenário':22} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'erros':>6}"
+        )
+        for name, r in results.items():
+            queries = "-" if r["queries_mean"] is None else f"{r['queries_mean']:g}"
+            self.stdout.write(
+                f"{name:22} {r['throughput_rps'] or 0:8.1f} {r['p50_ms']:8.1f} {r['p95_ms']:8.1f} "
+                f"{r['p99_ms']:8.1f} {queries:>8} {r['errors']:6}"
+            )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from assistencia_app.media_derivatives import build_derivatives
+from assistencia_app.models import TicketMedia
+
+
+class Command(BaseCommand):
+    help = "Gera miniaturas/prévias das mídias de chamados pendentes (ou falhas, com --retry-failed)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retry-failed", action="store_true", help="Reprocessa também as que falharam.")
+        parser.add_argument("--limit", type=int, default=0, help="Máximo de mídias nesta execução.")
+
+    def handle(self, *args, **options):
+        statuses = [TicketMedia.DERIVATIVES_PENDING]
+        if options["retry_failed"]:
+            statuses.append(TicketMedia.DERIVATIVES_FAILED)
+
+        qs = TicketMedia.objects.filter(derivatives_status__in=statuses).order_by("id")
+        if options["limit"]:
+            qs = qs[: options["limit"]]
+
+        done = {}
+        for media in qs.iterator(chunk_size=200):
+            build_derivatives(media)
+            done[media.derivatives_status] = done.get(media.derivatives_status, 0) + 1
+
+        summary = ", ".join(f"{k}: {v}" for k, v in sorted(done.items())) or "nada pendente"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from assistencia_app.exporters import EXPORTS, write_csv, write_xlsx
+from assistencia_app.models import PartRequest, Ticket
+
+
+class Command(BaseCommand):
+    help = "Exporta chamados, mensagens ou itens de solicitações de peça (CSV ou XLSX) em streaming."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(EXPORTS))
+        parser.add_argument("-o", "--output", help="Arquivo de saída (.csv ou .xlsx). Sem isso, CSV no stdout.")
+        parser.add_argument("--since", help="Só registros criados a partir de AAAA-MM-DD.")
+        parser.add_argument("--status", help="Filtra pelo status do chamado/solicitação.")
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        parent_model = PartRequest if kind == "part_requests" else Ticket
+        queryset = None
+
+        if options["since"] or options["status"]:
+            queryset = parent_model.objects.all()
+            if options["since"]:
+                since = parse_date(options["since"])
+                if since is None:
+                    raise CommandError("--since deve estar no formato AAAA-MM-DD.")
+                queryset = queryset.filter(created_at__date__gte=since)
+            if options["status"]:
+                queryset = queryset.filter(status=options["status"].upper())
+
+        output = options["output"]
+        if output and Path(output).suffix.lower() == ".xlsx":
+            try:
+                total = write_xlsx(kind, output, queryset)
+            except ImportError as exc:
+                raise CommandError("Para exportar XLSX instale o openpyxl (pip install -r requirements.txt).") from exc
+        elif output:
+            with open(output, "w", encoding="utf-8", newline="") as f:
+                total = write_csv(kind, f, queryset)
+        else:
+            # o CSV já traz as quebras de linha (como no dumpdata do Django)
+            self.stdout.ending = None
+            write_csv(kind, self.stdout, queryset)
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"{total} linha(s) exportada(s) para {output}."))
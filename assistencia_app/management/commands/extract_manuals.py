@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from assistencia_app.manuals import extract_manual
+from assistencia_app.models import Manual
+
+
+class Command(BaseCommand):
+    help = "Extrai nº de páginas, miniatura e texto dos manuais em PDF pendentes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retry-failed", action="store_true", help="Reprocessa também os que falharam.")
+        parser.add_argument("--all", action="store_true", help="Reprocessa todos os manuais com arquivo.")
+
+    def handle(self, *args, **options):
+        qs = Manual.objects.exclude(file="").exclude(file__isnull=True).defer("text").order_by("id")
+        if not options["all"]:
+            statuses = [Manual.EXTRACT_PENDING]
+            if options["retry_failed"]:
+                statuses.append(Manual.EXTRACT_FAILED)
+            qs = qs.filter(extract_status__in=statuses)
+
+        done = {}
+        for manual in qs.iterator(chunk_size=50):
+            extract_manual(manual)
+            done[manual.extract_status] = done.get(manual.extract_status, 0) + 1
+
+        summary = ", ".join(f"{k}: {v}" for k, v in sorted(done.items())) or "nada pendente"
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,69 @@
+import time
+from datetime import datetime, time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from assistencia_app.synthetic import SyntheticConfig, generate
+
+
+class Command(BaseCommand):
+    help = "Gera dados sintéticos (determinísticos pela semente) para testes de carga."
+
+    def add_arguments(self, parser):
+        defaults = SyntheticConfig()
+        parser.add_argument("--seed", type=int, default=defaults.seed)
+        parser.add_argument("--users", type=int, default=defaults.users)
+        parser.add_argument("--machine-models", type=int, default=defaults.machine_models)
+        parser.add_argument("--machines-per-user", type=int, default=defaults.machines_per_user)
+        parser.add_argument("--symptoms", type=int, default=defaults.symptoms)
+        parser.add_argument("--tickets", type=int, default=defaults.tickets)
+        parser.add_argument("--messages-per-ticket", type=float, default=defaults.messages_per_ticket,
+                            help="Média de mensagens por chamado.")
+        parser.add_argument("--media-per-ticket", type=float, default=defaults.media_per_ticket,
+                            help="Média de mídias (só registros, sem arquivo) por chamado.")
+        parser.add_argument("--parts", type=int, default=defaults.parts)
+        parser.add_argument("--compat-per-part", type=int, default=defaults.compat_per_part)
+        parser.add_argument("--part-requests", type=int, default=defaults.part_requests)
+        parser.add_argument("--items-per-request", type=int, default=defaults.items_per_request)
+        parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+        parser.add_argument("--until", help="Data final (AAAA-MM-DD) da janela de datas geradas.")
+        parser.add_argument("--days", type=int, default=defaults.days, help="Tamanho da janela, em dias.")
+        parser.add_argument("--password", default=defaults.password, help="Senha de todos os usuários gerados.")
+        parser.add_argument("--skip-search-index", action="store_true", help="Não recria o índice de busca.")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["machine_models"] < 1 or options["machines_per_user"] < 1:
+            raise CommandError("--users, --machine-models e --machines-per-user precisam ser >= 1.")
+
+        config = SyntheticConfig(
+            seed=options["seed"],
+            users=options["users"],
+            machine_models=options["machine_models"],
+            machines_per_user=options["machines_per_user"],
+            symptoms=options["symptoms"],
+            tickets=options["tickets"],
+            messages_per_ticket=options["messages_per_ticket"],
+            media_per_ticket=options["media_per_ticket"],
+            parts=options["parts"],
+            compat_per_part=options["compat_per_part"],
+            part_requests=options["part_requests"],
+            items_per_request=options["items_per_request"],
+            batch_size=options["batch_size"],
+            days=options["days"],
+            password=options["password"],
+            build_search_index=not options["skip_search_index"],
+        )
+        if options["until"]:
+            try:
+                day = datetime.strptime(options["until"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError("--until deve estar no formato AAAA-MM-DD.")
+            config.until = timezone.make_aware(datetime.combine(day, dt_time.max))
+
+        started = time.monotonic()
+        verbosity = options["verbosity"]
+        counts = generate(config, log=self.stdout.write if verbosity > 1 else None)
+
+        summary = ", ".join(f"{k}: {v}" for k, v in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"{summary} ({time.monotonic() - started:.1f}s)"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assistencia_app.importers import DEFAULT_BATCH_SIZE, ImportFormatError, import_parts
+
+
+class Command(BaseCommand):
+    help = "Importa/atualiza o catálogo de peças (e a compatibilidade por modelo) de um CSV ou XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Arquivo .csv ou .xlsx com cabeçalho (sku, nome, descricao, ativo, modelos).")
+        parser.add_argument("--dry-run", action="store_true", help="Só mostra o que mudaria, sem gravar.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], "rb") as f:
+                report = import_parts(
+                    f,
+                    options["path"],
+                    batch_size=options["batch_size"],
+                    dry_run=options["dry_run"],
+                )
+        except FileNotFoundError as exc:
+            raise CommandError(f"Arquivo não encontrado: {options['path']}") from exc
+        except ImportFormatError as exc:
+            raise CommandError(str(exc)) from exc
+
+        for line, message in report.errors:
+            self.stderr.write(f"linha {line}: {message}")
+        if report.skipped > len(report.errors):
+            self.stderr.write(f"... e mais {report.skipped - len(report.errors)} erro(s).")
+
+        self.stdout.write(self.style.SUCCESS(report.summary()))
@@ -0,0 +1,21 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from assistencia_app.counters import rebuild_owner_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores do dashboard (OwnerCounters) a partir das tabelas."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--owner", type=int, action="append", help="ID do usuário (pode repetir).")
+
+    def handle(self, *args, **options):
+        owner_ids = options["owner"] or get_user_model().objects.values_list("id", flat=True).iterator()
+
+        total = 0
+        for owner_id in owner_ids:
+            rebuild_owner_counters(owner_id)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{total} contador(es) recalculado(s)."))
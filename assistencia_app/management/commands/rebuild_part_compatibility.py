@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from assistencia_app.compatibility import rebuild_compatibility
+from assistencia_app.models import PartCompatibility
+
+
+class Command(BaseCommand):
+    help = "Recria a tabela de compatibilidade usada pelo autocomplete de peças."
+
+    def handle(self, *args, **options):
+        rebuild_compatibility()
+        total = PartCompatibility.objects.count()
+        self.stdout.write(self.style.SUCCESS(f"{total} compatibilidade(s) indexada(s)."))
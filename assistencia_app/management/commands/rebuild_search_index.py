@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assistencia_app import search
+
+
+class Command(BaseCommand):
+    help = "Recria o índice de busca (FTS5) de chamados, mensagens, peças, sintomas e manuais."
+
+    def handle(self, *args, **options):
+        if not search.enabled():
+            raise CommandError("Busca FTS5 disponível apenas com SQLite (ASSISTENCIA_SEARCH_ENABLED).")
+
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Índice de busca recriado."))
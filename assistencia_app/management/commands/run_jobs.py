@@ -0,0 +1,54 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from assistencia_app import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker da fila de tarefas (model Job). Pode rodar em vários processos/máquinas "
+        "ao mesmo tempo; cada tarefa é reservada por um só."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Esvazia a fila e sai (cron).")
+        parser.add_argument("--batch", type=int, default=1, help="Tarefas reservadas por vez.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Espera (s) com a fila vazia.")
+        parser.add_argument("--max-jobs", type=int, default=0, help="Sai depois de N tarefas (0 = sem limite).")
+        parser.add_argument("--purge-after", type=int, default=7,
+                            help="Apaga tarefas concluídas há mais de N dias (0 = não apaga).")
+        parser.add_argument("--worker", default="", help="Nome do worker (padrão: host:pid).")
+
+    def handle(self, *args, **options):
+        worker = options["worker"] or jobs.worker_name()
+        self.stopping = False
+        # termina a tarefa atual antes de sair (deploy/restart)
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        done = 0
+        next_maintenance = 0.0
+        while not self.stopping:
+            if time.monotonic() >= next_maintenance:
+                requeued = jobs.requeue_stale()
+                if requeued:
+                    self.stdout.write(f"{requeued} tarefa(s) presa(s) devolvida(s) à fila")
+                if options["purge_after"]:
+                    jobs.purge_finished(options["purge_after"])
+                next_maintenance = time.monotonic() + 60
+
+            ran = jobs.work(worker, options["batch"])
+            done += ran
+            if options["max_jobs"] and done >= options["max_jobs"]:
+                break
+            if not ran:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"{worker}: {done} tarefa(s) executada(s)."))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,149 @@
+"""
+Extração dos manuais em PDF: nº de páginas, miniatura da 1ª página e texto
+(indexado na busca, ver search.py).
+
+Usa os utilitários do poppler (``pdfinfo``, ``pdftotext``, ``pdftoppm``);
+sem eles o manual continua disponível, só fica sem prévia.
+"""
+import logging
+import re
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, UnidentifiedImageError
+
+from . import jobs
+from .models import Job, Manual
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTH = 480
+JPEG_QUALITY = 82
+MAX_TEXT_CHARS = 300_000
+TIMEOUT = 120
+
+_PAGES_RE = re.compile(r"^Pages:\s+(\d+)", re.MULTILINE)
+_SPACES_RE = re.compile(r"[ \t\f\v]+")
+
+# PDF que nunca vai dar certo; o resto (storage, disco, timeout) pode ser passageiro
+PERMANENT_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, subprocess.CalledProcessError)
+
+
+def _binary(name):
+    directory = getattr(settings, "POPPLER_BIN_DIR", "")
+    return shutil.which(str(Path(directory) / name) if directory else name)
+
+
+def _run(cmd):
+    return subprocess.run(cmd, check=True, timeout=TIMEOUT, capture_output=True).stdout
+
+
+def _page_count(pdf):
+    pdfinfo = _binary("pdfinfo")
+    if not pdfinfo:
+        return None
+    match = _PAGES_RE.search(_run([pdfinfo, str(pdf)]).decode("utf-8", "replace"))
+    return int(match.group(1)) if match else None
+
+
+def _text(pdf):
+    pdftotext = _binary("pdftotext")
+    if not pdftotext:
+        return ""
+    raw = _run([pdftotext, "-enc", "UTF-8", "-q", str(pdf), "-"]).decode("utf-8", "replace")
+    lines = (_SPACES_RE.sub(" ", line).strip() for line in raw.splitlines())
+    return "\n".join(line for line in lines if line)[:MAX_TEXT_CHARS]
+
+
+def _thumbnail(pdf, tmp):
+    pdftoppm = _binary("pdftoppm")
+    if not pdftoppm:
+        return None
+    prefix = Path(tmp) / "page"
+    _run([pdftoppm, "-f", "1", "-l", "1", "-png", "-scale-to-x", str(THUMBNAIL_WIDTH), "-scale-to-y", "-1",
+          str(pdf), str(prefix)])
+    # pdftoppm numera com zeros conforme o total de páginas (page-1.png, page-01.png...)
+    pages = sorted(Path(tmp).glob("page-*.png"))
+    if not pages:
+        return None
+    with Image.open(pages[0]) as page:
+        buf = BytesIO()
+        page.convert("RGB").save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        return buf.getvalue()
+
+
+def extract_manual(manual, raise_transient=False):
+    """
+    Preenche page_count, thumbnail e text de um Manual com PDF.
+
+    Com ``raise_transient`` só os erros de ``PERMANENT_ERRORS`` marcam o
+    manual como FAILED; os demais sobem (a tarefa tenta de novo depois).
+    """
+    source = manual.file.name if manual.file else ""
+    fields = ["page_count", "thumbnail", "text", "extract_status", "extracted_source"]
+
+    manual.extracted_source = source
+    if not source or Path(source).suffix.lower() != ".pdf":
+        manual.page_count, manual.text = None, ""
+        manual.thumbnail = ""
+        manual.extract_status = Manual.EXTRACT_SKIPPED
+        manual.save(update_fields=fields)
+        return manual
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf = Path(tmp) / "manual.pdf"
+            with manual.file.open("rb") as f, open(pdf, "wb") as dst:
+                shutil.copyfileobj(f, dst)
+            page_count = _page_count(pdf)
+            text = _text(pdf)
+            thumbnail = _thumbnail(pdf, tmp)
+    except (OSError, UnidentifiedImageError, subprocess.SubprocessError) as exc:
+        if raise_transient and not isinstance(exc, PERMANENT_ERRORS):
+            raise
+        logger.warning("Falha ao extrair o manual #%s: %s", manual.pk, exc)
+        manual.extract_status = Manual.EXTRACT_FAILED
+        manual.save(update_fields=["extract_status", "extracted_source"])
+        return manual
+
+    manual.page_count = page_count
+    manual.text = text
+    if thumbnail:
+        if manual.thumbnail:
+            manual.thumbnail.delete(save=False)
+        manual.thumbnail.save(f"manual-{manual.pk}.jpg", ContentFile(thumbnail), save=False)
+
+    got_something = page_count is not None or text or thumbnail
+    manual.extract_status = Manual.EXTRACT_READY if got_something else Manual.EXTRACT_SKIPPED
+    # o post_save reindexa o manual na busca já com o texto
+    manual.save(update_fields=fields)
+    return manual
+
+
+def needs_extraction(manual):
+    return (manual.file.name if manual.file else "") != manual.extracted_source
+
+
+def extract_pending(manual_ids):
+    for manual in Manual.objects.filter(id__in=manual_ids, extract_status=Manual.EXTRACT_PENDING):
+        extract_manual(manual, raise_transient=True)
+
+
+def schedule_extraction(manual_ids):
+    """
+    Marca como pendentes e enfileira a extração (tarefa ``manuals.extract``
+    do ``run_jobs``; mesma regra de ASSISTENCIA_MEDIA_BACKGROUND das mídias).
+    Sem ela, o comando ``extract_manuals`` processa os pendentes.
+    """
+    manual_ids = list(manual_ids)
+    if not manual_ids:
+        return
+    Manual.objects.filter(id__in=manual_ids).update(extract_status=Manual.EXTRACT_PENDING)
+    if not getattr(settings, "ASSISTENCIA_MEDIA_BACKGROUND", True):
+        return
+    jobs.enqueue("manuals.extract", {"manual_ids": manual_ids}, priority=Job.PRIORITY_LOW)
@@ -0,0 +1,131 @@
+import logging
+import shutil
+import subprocess
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import jobs
+from .models import Job, TicketMedia
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+PREVIEW_SIZE = (1600, 1600)
+JPEG_QUALITY = 82
+VIDEO_POSTER_SECOND = 1
+
+# arquivo que nunca vai dar certo; o resto (storage, disco, timeout) pode ser passageiro
+PERMANENT_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError, subprocess.CalledProcessError)
+
+
+def _encode_jpeg(image, size):
+    img = image.copy()
+    img.thumbnail(size, Image.LANCZOS)
+    buf = BytesIO()
+    # salvar sem ``exif=`` descarta os metadados (GPS, aparelho, etc.)
+    img.save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def _open_normalized(fp):
+    image = Image.open(fp)
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "L"):
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    return image
+
+
+def _video_poster(media):
+    ffmpeg = shutil.which(getattr(settings, "FFMPEG_BINARY", "ffmpeg"))
+    if not ffmpeg:
+        return None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / ("src" + Path(media.file.name).suffix.lower())
+        out = Path(tmp) / "poster.jpg"
+        with media.file.open("rb") as f, open(src, "wb") as dst:
+            shutil.copyfileobj(f, dst)
+
+        cmd = [
+            ffmpeg, "-loglevel", "error", "-y",
+            "-ss", str(VIDEO_POSTER_SECOND), "-i", str(src),
+            "-frames:v", "1", str(out),
+        ]
+        subprocess.run(cmd, check=True, timeout=60, capture_output=True)
+        if not out.exists():
+            # vídeos com menos de 1s: tenta o primeiro frame
+            cmd[cmd.index("-ss") + 1] = "0"
+            subprocess.run(cmd, check=True, timeout=60, capture_output=True)
+        with Image.open(out) as poster:
+            poster.load()
+            return poster.convert("RGB")
+
+
+def build_derivatives(media, raise_transient=False):
+    """
+    Gera miniatura e prévia em JPEG para uma TicketMedia.
+
+    Imagens: orientação do EXIF aplicada e metadados removidos.
+    Vídeos: frame de capa via ffmpeg, se estiver instalado.
+
+    Com ``raise_transient`` só os erros de ``PERMANENT_ERRORS`` marcam a
+    mídia como FAILED; os demais sobem (a tarefa tenta de novo depois).
+    """
+    kind = TicketMedia.kind_for_name(media.file.name)
+    image = None
+
+    try:
+        if kind == TicketMedia.KIND_IMAGE:
+            with media.file.open("rb") as f:
+                image = _open_normalized(f)
+                image.load()
+        elif kind == TicketMedia.KIND_VIDEO:
+            image = _video_poster(media)
+    except (OSError, UnidentifiedImageError, subprocess.SubprocessError) as exc:
+        if raise_transient and not isinstance(exc, PERMANENT_ERRORS):
+            raise
+        logger.warning("Falha ao gerar derivados da mídia #%s: %s", media.pk, exc)
+        media.kind = kind
+        media.derivatives_status = TicketMedia.DERIVATIVES_FAILED
+        media.save(update_fields=["kind", "derivatives_status"])
+        return media
+
+    media.kind = kind
+    if image is None:
+        media.derivatives_status = TicketMedia.DERIVATIVES_SKIPPED
+        media.save(update_fields=["kind", "derivatives_status"])
+        return media
+
+    stem = f"{media.ticket_id}-{media.pk}"
+    media.thumbnail.save(f"{stem}-thumb.jpg", ContentFile(_encode_jpeg(image, THUMBNAIL_SIZE)), save=False)
+    media.preview.save(f"{stem}-preview.jpg", ContentFile(_encode_jpeg(image, PREVIEW_SIZE)), save=False)
+    media.derivatives_status = TicketMedia.DERIVATIVES_READY
+    media.save(update_fields=["kind", "thumbnail", "preview", "derivatives_status"])
+    return media
+
+
+def build_pending(media_ids):
+    # só as pendentes: numa nova tentativa da tarefa, as já feitas ficam de fora
+    for media in TicketMedia.objects.filter(id__in=media_ids, derivatives_status=TicketMedia.DERIVATIVES_PENDING):
+        build_derivatives(media, raise_transient=True)
+
+
+def schedule_derivatives(media_ids):
+    """
+    Enfileira a geração dos derivados (tarefa ``media.derivatives`` do
+    ``run_jobs``). Com ASSISTENCIA_MEDIA_BACKGROUND = False nada é
+    enfileirado e o comando ``build_media_derivatives`` faz o trabalho.
+    """
+    media_ids = list(media_ids)
+    if not media_ids or not getattr(settings, "ASSISTENCIA_MEDIA_BACKGROUND", True):
+        return
+    # o cliente está olhando o chamado esperando as miniaturas
+    jobs.enqueue("media.derivatives", {"media_ids": media_ids}, priority=Job.PRIORITY_HIGH)
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+
+
+def backfill_counters(apps, schema_editor):
+    Ticket = apps.get_model("assistencia_app", "Ticket")
+    PartRequest = apps.get_model("assistencia_app", "PartRequest")
+    OwnerCounters = apps.get_model("assistencia_app", "OwnerCounters")
+
+    rows = {}
+    tickets = (
+        Ticket.objects.values("owner_id")
+        .annotate(open=Count("id", filter=~Q(status__in=["DONE", "CANCELED"])), last=Max("updated_at"))
+    )
+    for t in tickets:
+        rows[t["owner_id"]] = OwnerCounters(
+            owner_id=t["owner_id"], open_tickets=t["open"], last_activity_at=t["last"]
+        )
+
+    part_requests = (
+        PartRequest.objects.values("owner_id")
+        .annotate(open=Count("id", filter=~Q(status__in=["SENT", "CANCELED"])), last=Max("created_at"))
+    )
+    for pr in part_requests:
+        row = rows.setdefault(pr["owner_id"], OwnerCounters(owner_id=pr["owner_id"]))
+        row.open_part_requests = pr["open"]
+        if pr["last"] and (row.last_activity_at is None or pr["last"] > row.last_activity_at):
+            row.last_activity_at = pr["last"]
+
+    OwnerCounters.objects.bulk_create(rows.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistencia_app', '0002_alter_machine_options_alter_machinemodel_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_tickets', models.PositiveIntegerField(default=0)),
+                ('open_part_requests', models.PositiveIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Contadores do Cliente',
+                'verbose_name_plural': 'Contadores dos Clientes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['owner', '-updated_at'], name='assistencia_owner_i_3299e0_idx'),
+        ),
+        migrations.AddField(
+            model_name='ownercounters',
+            name='owner',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='assistencia_counters', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
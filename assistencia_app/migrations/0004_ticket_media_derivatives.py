@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistencia_app', '0003_owner_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketmedia',
+            name='derivatives_status',
+            field=models.CharField(choices=[('PENDING', 'Pendente'), ('READY', 'Pronto'), ('SKIPPED', 'Sem prévia'), ('FAILED', 'Falhou')], default='PENDING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='ticketmedia',
+            name='kind',
+            field=models.CharField(choices=[('IMAGE', 'Imagem'), ('VIDEO', 'Vídeo'), ('OTHER', 'Outro')], default='OTHER', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='ticketmedia',
+            name='preview',
+            field=models.ImageField(blank=True, upload_to='tickets/previews/'),
+        ),
+        migrations.AddField(
+            model_name='ticketmedia',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to='tickets/thumbs/'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketmedia',
+            index=models.Index(fields=['derivatives_status'], name='assistencia_derivat_46d948_idx'),
+        ),
+    ]
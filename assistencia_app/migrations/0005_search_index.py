@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# DDL e carga congelados aqui: a migration não pode depender do código atual
+# de assistencia_app/search.py (nem das colunas que os models ganharem depois)
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS assistencia_app_search USING fts5("
+    "kind UNINDEXED, object_id UNINDEXED, owner_id UNINDEXED, ticket_id UNINDEXED, active UNINDEXED, "
+    "title, body, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+INSERT = "INSERT INTO assistencia_app_search (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+
+FILL_SQL = [
+    INSERT + "SELECT id * 8 + 1, 'ticket', id, owner_id, id, 1, 'Chamado #' || id, description "
+    "FROM assistencia_app_ticket",
+    INSERT + "SELECT m.id * 8 + 2, 'message', m.id, t.owner_id, m.ticket_id, 1, '', m.message "
+    "FROM assistencia_app_ticketmessage m JOIN assistencia_app_ticket t ON t.id = m.ticket_id",
+    INSERT + "SELECT id * 8 + 3, 'part', id, NULL, NULL, active, sku || ' ' || name, description "
+    "FROM assistencia_app_part",
+    INSERT + "SELECT id * 8 + 4, 'symptom', id, NULL, NULL, active, title, description "
+    "FROM assistencia_app_symptom",
+    INSERT + "SELECT id * 8 + 5, 'manual', id, NULL, NULL, active, title, '' "
+    "FROM assistencia_app_manual",
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS assistencia_app_search")
+        cursor.execute(CREATE_SQL)
+        for sql in FILL_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS assistencia_app_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistencia_app', '0004_ticket_media_derivatives'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:17
+
+import django.db.models.deletion
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _fold(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in text if not unicodedata.combining(c)).lower().strip()
+
+
+def backfill_compatibility(apps, schema_editor):
+    Part = apps.get_model("assistencia_app", "Part")
+    PartCompatibility = apps.get_model("assistencia_app", "PartCompatibility")
+    Through = Part.compatible_models.through
+
+    parts = {p.id: p for p in Part.objects.all().only("id", "sku", "name", "active")}
+    rows = [
+        PartCompatibility(
+            machine_model_id=model_id,
+            part_id=part_id,
+            sku_key=parts[part_id].sku.upper(),
+            search_name=" " + _fold(parts[part_id].name),
+            active=parts[part_id].active,
+        )
+        for part_id, model_id in Through.objects.values_list("part_id", "machinemodel_id")
+    ]
+    PartCompatibility.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistencia_app', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PartCompatibility',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sku_key', models.CharField(max_length=60)),
+                ('search_name', models.CharField(max_length=130)),
+                ('active', models.BooleanField(default=True)),
+                ('machine_model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assistencia_app.machinemodel')),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assistencia_app.part')),
+            ],
+            options={
+                'verbose_name': 'Compatibilidade de Peça',
+                'verbose_name_plural': 'Compatibilidade de Peças',
+                'indexes': [models.Index(fields=['machine_model', 'active', 'sku_key'], name='assistencia_machine_b1a10a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('machine_model', 'part'), name='uniq_part_compat_model_part')],
+            },
+        ),
+        migrations.RunPython(backfill_compatibility, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:30
+
+from django.db import migrations, models
+
+
+# SQL congelado (sem importar assistencia_app/search.py): a tabela criada na
+# 0005 passa a indexar o texto extraído do PDF dos manuais
+INDEX_MANUAL_TEXT_SQL = [
+    "DELETE FROM assistencia_app_search WHERE kind = 'manual'",
+    "INSERT INTO assistencia_app_search (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+    "SELECT id * 8 + 5, 'manual', id, NULL, NULL, active, title, text FROM assistencia_app_manual",
+    "INSERT INTO assistencia_app_search(assistencia_app_search) VALUES ('optimize')",
+]
+
+
+def rebuild_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in INDEX_MANUAL_TEXT_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistencia_app', '0006_part_compatibility'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='manual',
+            name='extract_status',
+            field=models.CharField(choices=[('PENDING', 'Pendente'), ('READY', 'Pronto'), ('SKIPPED', 'Sem prévia'), ('FAILED', 'Falhou')], default='PENDING', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='manual',
+            name='extracted_source',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='manual',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='manual',
+            name='text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='manual',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, upload_to='manuals/thumbs/'),
+        ),
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
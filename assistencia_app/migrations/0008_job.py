@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistencia_app', '0007_manual_extraction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=80)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('priority', models.PositiveSmallIntegerField(choices=[(10, 'Alta'), (50, 'Normal'), (90, 'Baixa')], default=50)),
+                ('status', models.CharField(choices=[('QUEUED', 'Na fila'), ('RUNNING', 'Executando'), ('DONE', 'Concluído'), ('FAILED', 'Falhou')], default='QUEUED', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_by', models.CharField(blank=True, max_length=120)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Tarefa em segundo plano',
+                'verbose_name_plural': 'Tarefas em segundo plano',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['status', 'priority', 'run_at', 'id'], name='assistencia_status_686ff6_idx'), models.Index(fields=['status', 'locked_at'], name='assistencia_status_0f5a10_idx')],
+            },
+        ),
+    ]
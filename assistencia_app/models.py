@@ -1,5 +1,8 @@
+from pathlib import Path
+
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class MachineModel(models.Model):
@@ -80,12 +83,33 @@ class Symptom(models.Model):
 
 
 class Manual(models.Model):
+    EXTRACT_PENDING = "PENDING"
+    EXTRACT_READY = "READY"
+    EXTRACT_SKIPPED = "SKIPPED"
+    EXTRACT_FAILED = "FAILED"
+
+    EXTRACT_CHOICES = [
+        (EXTRACT_PENDING, "Pendente"),
+        (EXTRACT_READY, "Pronto"),
+        (EXTRACT_SKIPPED, "Sem prévia"),
+        (EXTRACT_FAILED, "Falhou"),
+    ]
+
     model = models.ForeignKey(MachineModel, on_delete=models.CASCADE, related_name="manuals")
     title = models.CharField(max_length=160)
     file = models.FileField(upload_to="manuals/", blank=True, null=True)
     url = models.URLField(blank=True)  # link drive/youtube/etc
     active = models.BooleanField(default=True)
 
+    # extraído do PDF fora do request (ver manuals.py)
+    page_count = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    thumbnail = models.ImageField(upload_to="manuals/thumbs/", blank=True, editable=False)
+    text = models.TextField(blank=True, editable=False)
+    extract_status = models.CharField(
+        max_length=10, choices=EXTRACT_CHOICES, default=EXTRACT_PENDING, editable=False
+    )
+    extracted_source = models.CharField(max_length=255, blank=True, editable=False)
+
     class Meta:
         ordering = ["model__name", "title"]
         verbose_name = "Manual"
@@ -121,6 +145,33 @@ class Part(models.Model):
         return f"{self.sku} - {self.name}"
 
 
+class PartCompatibility(models.Model):
+    """
+    Cópia desnormalizada de Part.compatible_models com os campos que o
+    autocomplete precisa (ver compatibility.py). Mantida pelos signals de
+    Part e do M2M; nunca editar à mão.
+    """
+
+    machine_model = models.ForeignKey(MachineModel, on_delete=models.CASCADE, related_name="+")
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name="+")
+    sku_key = models.CharField(max_length=60)       # sku em maiúsculas
+    search_name = models.CharField(max_length=130)  # nome sem acento/minúsculo
+    active = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = "Compatibilidade de Peça"
+        verbose_name_plural = "Compatibilidade de Peças"
+        constraints = [
+            models.UniqueConstraint(fields=["machine_model", "part"], name="uniq_part_compat_model_part"),
+        ]
+        indexes = [
+            models.Index(fields=["machine_model", "active", "sku_key"]),
+        ]
+
+    def __str__(self):
+        return f"{self.part_id} ↔ {self.machine_model_id}"
+
+
 class Ticket(models.Model):
     STATUS_OPEN = "OPEN"
     STATUS_TRIAGE = "TRIAGE"
@@ -140,6 +191,8 @@ class Ticket(models.Model):
         (STATUS_CANCELED, "Cancelado"),
     ]
 
+    CLOSED_STATUSES = (STATUS_DONE, STATUS_CANCELED)
+
     PRIORITY_LOW = "LOW"
     PRIORITY_MEDIUM = "MEDIUM"
     PRIORITY_HIGH = "HIGH"
@@ -170,25 +223,94 @@ class Ticket(models.Model):
         indexes = [
             models.Index(fields=["owner", "status"]),
             models.Index(fields=["machine", "status"]),
+            models.Index(fields=["owner", "-updated_at"]),
         ]
 
     def __str__(self):
         return f"Chamado #{self.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        # guardado para os signals saberem se o status mudou
+        obj._loaded_owner_status = (obj.__dict__.get("owner_id"), obj.__dict__.get("status"))
+        return obj
+
+    @property
+    def is_open(self):
+        return self.status not in self.CLOSED_STATUSES
+
 
 class TicketMedia(models.Model):
+    KIND_IMAGE = "IMAGE"
+    KIND_VIDEO = "VIDEO"
+    KIND_OTHER = "OTHER"
+
+    KIND_CHOICES = [
+        (KIND_IMAGE, "Imagem"),
+        (KIND_VIDEO, "Vídeo"),
+        (KIND_OTHER, "Outro"),
+    ]
+
+    DERIVATIVES_PENDING = "PENDING"
+    DERIVATIVES_READY = "READY"
+    DERIVATIVES_SKIPPED = "SKIPPED"
+    DERIVATIVES_FAILED = "FAILED"
+
+    DERIVATIVES_CHOICES = [
+        (DERIVATIVES_PENDING, "Pendente"),
+        (DERIVATIVES_READY, "Pronto"),
+        (DERIVATIVES_SKIPPED, "Sem prévia"),
+        (DERIVATIVES_FAILED, "Falhou"),
+    ]
+
+    IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".heic", ".heif", ".tif", ".tiff"}
+    VIDEO_EXTENSIONS = {".mp4", ".mov", ".m4v", ".avi", ".mkv", ".webm", ".3gp"}
+
     ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="media")
     file = models.FileField(upload_to="tickets/")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # derivados gerados fora do request (ver media_derivatives.py)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_OTHER)
+    thumbnail = models.ImageField(upload_to="tickets/thumbs/", blank=True)
+    preview = models.ImageField(upload_to="tickets/previews/", blank=True)
+    derivatives_status = models.CharField(
+        max_length=10, choices=DERIVATIVES_CHOICES, default=DERIVATIVES_PENDING
+    )
+
     class Meta:
         ordering = ["-id"]
         verbose_name = "Mídia do Chamado"
         verbose_name_plural = "Mídias do Chamado"
+        indexes = [
+            models.Index(fields=["derivatives_status"]),
+        ]
 
     def __str__(self):
         return f"Mídia #{self.id} do Ticket #{self.ticket_id}"
 
+    def save(self, *args, **kwargs):
+        if self.file and self.kind == self.KIND_OTHER:
+            self.kind = self.kind_for_name(self.file.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def kind_for_name(cls, name):
+        ext = Path(name or "").suffix.lower()
+        if ext in cls.IMAGE_EXTENSIONS:
+            return cls.KIND_IMAGE
+        if ext in cls.VIDEO_EXTENSIONS:
+            return cls.KIND_VIDEO
+        return cls.KIND_OTHER
+
+    @property
+    def display_url(self):
+        # prévia leve por padrão; o original fica em file.url
+        if self.preview:
+            return self.preview.url
+        return self.file.url
+
 
 class TicketMessage(models.Model):
     SENDER_CLIENT = "CLIENT"
@@ -227,6 +349,8 @@ class PartRequest(models.Model):
         (STATUS_CANCELED, "Cancelado"),
     ]
 
+    CLOSED_STATUSES = (STATUS_SENT, STATUS_CANCELED)
+
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="part_requests")
     machine = models.ForeignKey(Machine, on_delete=models.PROTECT, related_name="part_requests")
     status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=STATUS_OPEN)
@@ -258,6 +382,16 @@ class PartRequest(models.Model):
     def __str__(self):
         return f"Solicitação de Peça #{self.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        obj = super().from_db(db, field_names, values)
+        obj._loaded_owner_status = (obj.__dict__.get("owner_id"), obj.__dict__.get("status"))
+        return obj
+
+    @property
+    def is_open(self):
+        return self.status not in self.CLOSED_STATUSES
+
 
 class PartRequestItem(models.Model):
     part_request = models.ForeignKey(PartRequest, on_delete=models.CASCADE, related_name="items")
@@ -271,4 +405,119 @@ class PartRequestItem(models.Model):
         verbose_name_plural = "Itens da Solicitação"
 
     def __str__(self):
-        return f"{self.qty}x {self.part.name}"
\ No newline at end of file
+        return f"{self.qty}x {self.part.name}"
+
+
+class OwnerCounters(models.Model):
+    """
+    Contadores do dashboard mantidos de forma incremental pelos signals de
+    Ticket/PartRequest (ver counters.py), para o dashboard não precisar
+    contar o histórico inteiro do cliente a cada acesso.
+    """
+
+    owner = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="assistencia_counters",
+    )
+    open_tickets = models.PositiveIntegerField(default=0)
+    open_part_requests = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Contadores do Cliente"
+        verbose_name_plural = "Contadores dos Clientes"
+
+    def __str__(self):
+        return f"Contadores de {self.owner_id}"
+
+
+class Job(models.Model):
+    """
+    Trabalho pesado enfileirado pelos requests (derivados de mídia, extração
+    de manuais...) e executado pelo comando ``run_jobs``. Ver jobs.py.
+    """
+
+    STATUS_QUEUED = "QUEUED"
+    STATUS_RUNNING = "RUNNING"
+    STATUS_DONE = "DONE"
+    STATUS_FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Na fila"),
+        (STATUS_RUNNING, "Executando"),
+        (STATUS_DONE, "Concluído"),
+        (STATUS_FAILED, "Falhou"),
+    ]
+
+    # menor = antes
+    PRIORITY_HIGH = 10
+    PRIORITY_NORMAL = 50
+    PRIORITY_LOW = 90
+
+    PRIORITY_CHOICES = [
+        (PRIORITY_HIGH, "Alta"),
+        (PRIORITY_NORMAL, "Normal"),
+        (PRIORITY_LOW, "Baixa"),
+    ]
+
+    name = models.CharField(max_length=80)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_NORMAL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)  # não roda antes disso (backoff)
+    locked_by = models.CharField(max_length=120, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name = "Tarefa em segundo plano"
+        verbose_name_plural = "Tarefas em segundo plano"
+        indexes = [
+            # fila: próximos QUEUED por prioridade/horário
+            models.Index(fields=["status", "priority", "run_at", "id"]),
+            models.Index(fields=["status", "locked_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id}"
+
+
+class Notification(models.Model):
+    """
+    Caixa de saída de avisos por e-mail ao cliente. Os signals gravam um
+    evento por mudança; a tarefa ``notifications.flush`` junta os pendentes
+    de cada cliente num único e-mail (notifications.py).
+    """
+
+    KIND_STATUS = "STATUS"
+    KIND_MESSAGE = "MESSAGE"
+    KIND_CHOICES = [
+        (KIND_STATUS, "Mudança de status"),
+        (KIND_MESSAGE, "Resposta da equipe"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notifications")
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="notifications")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)  # vazio = ainda na caixa de saída
+
+    class Meta:
+        ordering = ["-id"]
+        verbose_name = "Notificação"
+        verbose_name_plural = "Notificações"
+        indexes = [
+            models.Index(fields=["sent_at", "user"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.ticket_id} para {self.user_id}"
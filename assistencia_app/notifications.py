@@ -0,0 +1,105 @@
+"""
+Avisos por e-mail ao cliente: mudança de status do chamado e resposta da
+equipe.
+
+Os signals só gravam o evento na caixa de saída (``Notification``) e
+garantem uma tarefa ``notifications.flush`` na fila, marcada para daqui a
+NOTIFICATIONS_DIGEST_WINDOW segundos. Tudo o que chegar nesse intervalo vai
+no mesmo e-mail: a equipe mexendo em 200 chamados gera um resumo por
+cliente, enviado pelo worker (``run_jobs``) numa única conexão com o backend
+de e-mail, e não 200 envios dentro dos requests.
+"""
+from datetime import timedelta
+from itertools import groupby, islice
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from core.settings_cache import site_settings_or_defaults
+
+from . import jobs
+from .models import Job, Notification, Ticket
+
+FLUSH_TASK = "notifications.flush"
+
+_STATUS_LABELS = dict(Ticket.STATUS_CHOICES)
+
+
+def enabled():
+    return getattr(settings, "NOTIFICATIONS_ENABLED", True)
+
+
+def status_changed(ticket, old_status):
+    text = f"Status: {_STATUS_LABELS.get(old_status, old_status)} → {ticket.get_status_display()}"
+    record(ticket, Notification.KIND_STATUS, text)
+
+
+def staff_replied(message):
+    text = f"Nova mensagem da equipe: {Truncator(message.message).chars(200)}"
+    record(message.ticket, Notification.KIND_MESSAGE, text)
+
+
+def record(ticket, kind, text):
+    Notification.objects.create(user_id=ticket.owner_id, ticket=ticket, kind=kind, text=text)
+    # depois do commit: se a tarefa vista como QUEUED for pega em seguida,
+    # ela já enxerga este evento
+    transaction.on_commit(schedule_flush)
+
+
+def schedule_flush():
+    # uma tarefa pendente basta: ela leva tudo o que estiver na caixa de saída
+    if Job.objects.filter(name=FLUSH_TASK, status=Job.STATUS_QUEUED).exists():
+        return
+    jobs.enqueue(FLUSH_TASK, delay=getattr(settings, "NOTIFICATIONS_DIGEST_WINDOW", 300))
+
+
+def build_digest(user, notifications, site):
+    tickets = [
+        (ticket, list(items))
+        for ticket, items in groupby(sorted(notifications, key=lambda n: (n.ticket_id, n.id)), key=lambda n: n.ticket)
+    ]
+    ctx = {
+        "user": user,
+        "tickets": tickets,
+        "site_url": getattr(settings, "SITE_URL", "").rstrip("/"),
+        **site,
+    }
+    subject = f"[{site['SITE_NAME']}] Novidades em {len(tickets)} chamado(s)"
+    body = render_to_string("assistencia/emails/digest.txt", ctx)
+    return EmailMessage(subject, body, to=[user.email])
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def flush():
+    """Tarefa ``notifications.flush``: um e-mail por cliente com tudo o que está pendente."""
+    pending = list(
+        Notification.objects.filter(sent_at__isnull=True)
+        .select_related("user", "ticket")
+        .order_by("user_id", "id")
+    )
+    site = site_settings_or_defaults()
+    users = [(user, list(items)) for user, items in groupby(pending, key=lambda n: n.user)]
+
+    sent = 0
+    with get_connection() as connection:
+        # marca por lote: se o envio falhar no meio, a nova tentativa da
+        # tarefa não repete os lotes que já saíram
+        for batch in _batched(users, getattr(settings, "NOTIFICATIONS_BATCH_SIZE", 100)):
+            messages = [build_digest(user, items, site) for user, items in batch if user.email]
+            connection.send_messages(messages)
+            ids = [n.id for _, items in batch for n in items]
+            Notification.objects.filter(id__in=ids).update(sent_at=timezone.now())
+            sent += len(messages)
+
+    keep_days = getattr(settings, "NOTIFICATIONS_KEEP_DAYS", 30)
+    Notification.objects.filter(sent_at__lt=timezone.now() - timedelta(days=keep_days)).delete()
+    return sent
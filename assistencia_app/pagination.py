@@ -0,0 +1,128 @@
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connection
+from django.db.models import Max, QuerySet
+from django.utils.functional import cached_property
+
+
+@dataclass
+class KeysetPage:
+    object_list: list = field(default_factory=list)
+    next_cursor: int | None = None
+    cursor: int | None = None
+    params: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.cursor is None
+
+    @property
+    def next_query(self):
+        # mantém os filtros ativos ao avançar de página
+        return urlencode({**self.params, "after": self.next_cursor})
+
+    @property
+    def first_query(self):
+        return urlencode(self.params)
+
+
+def parse_cursor(value):
+    try:
+        cursor = int(value)
+    except (TypeError, ValueError):
+        return None
+    return cursor if cursor > 0 else None
+
+
+def keyset_paginate(qs, cursor=None, per_page=25, params=None):
+    """
+    Paginação por chave (keyset) em ``-id``: em vez de OFFSET, cada página
+    começa depois do último id visto. O custo da página não depende de
+    quantas linhas o dono tem nem de quão longe ele navegou.
+    """
+    if cursor:
+        qs = qs.filter(id__lt=cursor)
+
+    # busca um registro a mais só para saber se existe próxima página
+    rows = list(qs.order_by("-id")[: per_page + 1])
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    return KeysetPage(
+        object_list=rows,
+        next_cursor=rows[-1].id if has_next else None,
+        cursor=cursor,
+        params={k: v for k, v in (params or {}).items() if v},
+    )
+
+
+def estimate_rows(model):
+    """
+    Estimativa barata do nº de linhas da tabela: o ``sqlite_stat1`` gerado
+    pelo ANALYZE (se existir) ou, na falta dele, o maior id (busca no índice
+    da PK, sem varrer a tabela). Com exclusões o valor fica acima do real.
+    """
+    if connection.vendor == "sqlite":
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+                    [model._meta.db_table],
+                )
+                row = cursor.fetchone()
+        except DatabaseError:
+            # ANALYZE nunca rodou: a tabela sqlite_stat1 não existe
+            row = None
+        if row:
+            return int(str(row[0]).split()[0])
+    return model._default_manager.aggregate(n=Max("pk"))["n"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator do admin para tabelas grandes: a listagem sem filtros usa
+    ``estimate_rows`` em vez de ``COUNT(*)``. Com busca/filtros, ou abaixo de
+    ``exact_threshold`` linhas, a contagem continua exata.
+
+    A estimativa pode passar do real (exclusões): se a página pedida vier
+    vazia, conta de verdade e entrega a última página que existe, em vez de
+    ``EmptyPage`` (que o admin transforma em ``?e=1``). Não serve para
+    tabelas que são expurgadas com frequência (Job, Notification).
+    """
+
+    exact_threshold = 10000
+    estimated = False
+
+    @cached_property
+    def count(self):
+        qs = self.object_list
+        if isinstance(qs, QuerySet) and not qs.query.where:
+            estimate = estimate_rows(qs.model)
+            if estimate > self.exact_threshold:
+                self.estimated = True
+                return estimate
+        return super().count
+
+    def page(self, number):
+        page = super().page(number)
+        if self.estimated and not page.object_list:
+            self.estimated = False
+            self.__dict__["count"] = super().count
+            self.__dict__.pop("num_pages", None)
+            page = super().page(min(page.number, self.num_pages))
+        return page
@@ -0,0 +1,259 @@
+"""
+Busca full-text (SQLite FTS5) sobre chamados, mensagens, peças, sintomas e
+manuais.
+
+Cada registro vira uma linha na tabela virtual ``assistencia_app_search`` com
+``rowid = id * 8 + código do tipo``, o que deixa atualizar/remover um
+documento por rowid (sem varrer o índice). O tokenizer ``unicode61`` com
+``remove_diacritics 2`` ignora acentos e caixa: "maquina" encontra "Máquina".
+"""
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Manual, Part, Symptom, Ticket, TicketMessage
+
+TABLE = "assistencia_app_search"
+
+KIND_TICKET = "ticket"
+KIND_MESSAGE = "message"
+KIND_PART = "part"
+KIND_SYMPTOM = "symptom"
+KIND_MANUAL = "manual"
+
+KIND_CODES = {
+    KIND_TICKET: 1,
+    KIND_MESSAGE: 2,
+    KIND_PART: 3,
+    KIND_SYMPTOM: 4,
+    KIND_MANUAL: 5,
+}
+
+# tipos que o cliente vê no portal (chamados/mensagens filtrados pelo dono)
+PORTAL_KINDS = (KIND_TICKET, KIND_MESSAGE, KIND_PART, KIND_MANUAL)
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "kind UNINDEXED, object_id UNINDEXED, owner_id UNINDEXED, ticket_id UNINDEXED, active UNINDEXED, "
+    "title, body, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+# colunas title/body: título pesa mais no bm25
+RANK_SQL = f"bm25({TABLE}, 0, 0, 0, 0, 0, 10.0, 1.0)"
+
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def enabled():
+    return connection.vendor == "sqlite" and getattr(settings, "ASSISTENCIA_SEARCH_ENABLED", True)
+
+
+def _rowid(kind, object_id):
+    return object_id * 8 + KIND_CODES[kind]
+
+
+# cada função devolve (owner_id, ticket_id, active, title, body)
+def _ticket_doc(t):
+    return t.owner_id, t.id, True, f"Chamado #{t.id}", t.description
+
+
+def _message_doc(m):
+    return m.ticket.owner_id, m.ticket_id, True, "", m.message
+
+
+def _part_doc(p):
+    return None, None, p.active, f"{p.sku} {p.name}", p.description
+
+
+def _symptom_doc(s):
+    return None, None, s.active, s.title, s.description
+
+
+def _manual_doc(m):
+    # texto extraído do PDF (manuals.py)
+    return None, None, m.active, m.title, m.text
+
+
+DOCUMENTS = {
+    Ticket: (KIND_TICKET, _ticket_doc),
+    TicketMessage: (KIND_MESSAGE, _message_doc),
+    Part: (KIND_PART, _part_doc),
+    Symptom: (KIND_SYMPTOM, _symptom_doc),
+    Manual: (KIND_MANUAL, _manual_doc),
+}
+
+
+def index_object(obj):
+    index_objects([obj])
+
+
+def _load_message_tickets(objs):
+    # o dono vem do chamado: um SELECT para as mensagens sem o chamado carregado
+    pending = [o for o in objs if isinstance(o, TicketMessage) and not TicketMessage.ticket.is_cached(o)]
+    if not pending:
+        return
+    tickets = Ticket.objects.only("id", "owner_id").in_bulk({m.ticket_id for m in pending})
+    for message in pending:
+        message.ticket = tickets[message.ticket_id]
+
+
+def index_objects(objs):
+    """(Re)indexa vários objetos com dois ``executemany`` (imports em lote)."""
+    objs = list(objs)
+    _load_message_tickets(objs)
+    rows = []
+    for obj in objs:
+        kind, build_doc = DOCUMENTS[type(obj)]
+        owner_id, ticket_id, active, title, body = build_doc(obj)
+        rows.append(
+            [_rowid(kind, obj.pk), kind, obj.pk, owner_id, ticket_id, int(bool(active)), title or "", body or ""]
+        )
+    if not rows:
+        return
+
+    with connection.cursor() as cursor:
+        cursor.executemany(f"DELETE FROM {TABLE} WHERE rowid = %s", [[r[0]] for r in rows])
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def reindex_ticket_messages(ticket, batch_size=500):
+    """Mensagens levam o dono do chamado: chamado mudou de dono, reindexa todas."""
+    batch = []
+    for message in TicketMessage.objects.filter(ticket_id=ticket.pk).order_by("pk").iterator(chunk_size=batch_size):
+        message.ticket = ticket
+        batch.append(message)
+        if len(batch) >= batch_size:
+            index_objects(batch)
+            batch = []
+    index_objects(batch)
+
+
+def unindex_object(obj):
+    kind = DOCUMENTS[type(obj)][0]
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [_rowid(kind, obj.pk)])
+
+
+def rebuild_index():
+    """Recria o índice inteiro com INSERT ... SELECT (sem passar pelo ORM)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(CREATE_SQL)
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+            f"SELECT id * 8 + 1, 'ticket', id, owner_id, id, 1, 'Chamado #' || id, description "
+            f"FROM {Ticket._meta.db_table}"
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+            f"SELECT m.id * 8 + 2, 'message', m.id, t.owner_id, m.ticket_id, 1, '', m.message "
+            f"FROM {TicketMessage._meta.db_table} m JOIN {Ticket._meta.db_table} t ON t.id = m.ticket_id"
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+            f"SELECT id * 8 + 3, 'part', id, NULL, NULL, active, sku || ' ' || name, description "
+            f"FROM {Part._meta.db_table}"
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+            f"SELECT id * 8 + 4, 'symptom', id, NULL, NULL, active, title, description "
+            f"FROM {Symptom._meta.db_table}"
+        )
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, kind, object_id, owner_id, ticket_id, active, title, body) "
+            f"SELECT id * 8 + 5, 'manual', id, NULL, NULL, active, title, text "
+            f"FROM {Manual._meta.db_table}"
+        )
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+
+
+def build_match(q):
+    """
+    Converte o texto digitado numa expressão MATCH segura: cada palavra vira
+    um termo entre aspas com prefixo (``"maq"*``), todos obrigatórios.
+    """
+    tokens = _TOKEN_RE.findall(q or "")
+    return " ".join(f'"{t}"*' for t in tokens[:8])
+
+
+def search(q, kinds=None, owner_id=None, active_only=False, limit=50, offset=0):
+    """
+    Resultados ranqueados (bm25) como dicts com kind/object_id/ticket_id e
+    um trecho com os termos destacados.
+
+    Com ``owner_id``, chamados e mensagens ficam restritos a esse dono; os
+    demais tipos (catálogo) continuam visíveis.
+    """
+    match = build_match(q)
+    if not match or not enabled():
+        return []
+
+    where = [f"{TABLE} MATCH %s"]
+    params = [match]
+    if kinds:
+        where.append(f"kind IN ({', '.join(['%s'] * len(kinds))})")
+        params.extend(kinds)
+    if owner_id is not None:
+        where.append("(owner_id = %s OR kind NOT IN ('ticket', 'message'))")
+        params.append(owner_id)
+    if active_only:
+        where.append("active = 1")
+
+    sql = (
+        f"SELECT kind, object_id, ticket_id, title, "
+        f"snippet({TABLE}, 6, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', 16) "
+        f"FROM {TABLE} WHERE {' AND '.join(where)} "
+        f"ORDER BY {RANK_SQL} LIMIT %s OFFSET %s"
+    )
+    params.extend([limit, offset])
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError:
+        # tabela ainda não criada (migrate pendente) ou FTS5 indisponível
+        return []
+
+    return [
+        {
+            "kind": kind,
+            "object_id": object_id,
+            "ticket_id": ticket_id,
+            "title": title,
+            "snippet": _highlight(snippet),
+        }
+        for kind, object_id, ticket_id, title, snippet in rows
+    ]
+
+
+def match_condition(kind, q):
+    """
+    ``Q`` com ``pk IN (SELECT object_id ... MATCH ...)``: o filtro roda no
+    banco junto com a listagem (sem limite de ids e com a contagem certa).
+    """
+    match = build_match(q)
+    if not match:
+        return Q(pk__in=[])
+    return Q(
+        pk__in=RawSQL(
+            f"SELECT object_id FROM {TABLE} WHERE {TABLE} MATCH %s AND kind = %s",
+            [match, kind],
+        )
+    )
+
+
+def _highlight(text):
+    text = escape(text or "")
+    return mark_safe(text.replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>"))
@@ -0,0 +1,149 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import compatibility, live, manuals, notifications, search
+from .counters import apply_delta, rebuild_owner_counters
+from .models import Manual, Part, PartCompatibility, PartRequest, Ticket, TicketMessage
+
+COUNTER_FIELDS = {
+    Ticket: "open_tickets",
+    PartRequest: "open_part_requests",
+}
+
+
+def _track_open_change(instance, created):
+    field = COUNTER_FIELDS[type(instance)]
+    previous = getattr(instance, "_loaded_owner_status", None)
+
+    if created:
+        apply_delta(instance.owner_id, field, 1 if instance.is_open else 0)
+    elif previous is None or None in previous:
+        # instância sem o estado carregado (ex.: .only()/.defer()): recalcula
+        rebuild_owner_counters(instance.owner_id)
+    else:
+        old_owner_id, old_status = previous
+        was_open = old_status not in instance.CLOSED_STATUSES
+        if old_owner_id != instance.owner_id:
+            apply_delta(old_owner_id, field, -1 if was_open else 0, touch=False)
+            apply_delta(instance.owner_id, field, 1 if instance.is_open else 0)
+        else:
+            apply_delta(instance.owner_id, field, int(instance.is_open) - int(was_open))
+
+    instance._loaded_owner_status = (instance.owner_id, instance.status)
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid="assistencia_ticket_counters")
+@receiver(post_save, sender=PartRequest, dispatch_uid="assistencia_partrequest_counters")
+def owner_counters_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    _track_open_change(instance, created)
+
+
+@receiver(post_delete, sender=Ticket, dispatch_uid="assistencia_ticket_counters_delete")
+@receiver(post_delete, sender=PartRequest, dispatch_uid="assistencia_partrequest_counters_delete")
+def owner_counters_on_delete(sender, instance, **kwargs):
+    previous = getattr(instance, "_loaded_owner_status", None)
+    status = previous[1] if previous else instance.status
+    if status not in instance.CLOSED_STATUSES:
+        # sem recriar a linha: no delete em cascata do usuário ela já se foi
+        apply_delta(instance.owner_id, COUNTER_FIELDS[sender], -1, touch=False, create=False)
+
+
+@receiver(post_save, dispatch_uid="assistencia_search_index")
+def search_index_on_save(sender, instance, raw=False, **kwargs):
+    if raw or sender not in search.DOCUMENTS or not search.enabled():
+        return
+    search.index_object(instance)
+
+
+@receiver(pre_save, sender=Ticket, dispatch_uid="assistencia_search_ticket_owner_before")
+def search_ticket_owner_before_save(sender, instance, raw=False, **kwargs):
+    # antes do post_save dos contadores, que troca _loaded_owner_status
+    previous = getattr(instance, "_loaded_owner_status", None)
+    instance._search_old_owner_id = previous[0] if previous else None
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid="assistencia_search_ticket_owner")
+def search_ticket_owner_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created or not search.enabled():
+        return
+    if instance._search_old_owner_id != instance.owner_id:
+        # sem o dono anterior carregado (.only()/.defer()) também reindexa
+        search.reindex_ticket_messages(instance)
+
+
+@receiver(post_delete, dispatch_uid="assistencia_search_unindex")
+def search_index_on_delete(sender, instance, **kwargs):
+    if sender not in search.DOCUMENTS or not search.enabled():
+        return
+    search.unindex_object(instance)
+
+
+@receiver(post_save, sender=Part, dispatch_uid="assistencia_part_compat_sync")
+def part_compat_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    compatibility.sync_part(instance)
+
+
+@receiver(m2m_changed, sender=Part.compatible_models.through, dispatch_uid="assistencia_part_compat_m2m")
+def part_compat_on_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    # reverse=True: mexeram em machine_model.compatible_parts
+    if action in ("post_add", "post_remove"):
+        pairs = [(pk, instance.pk) if reverse else (instance.pk, pk) for pk in pk_set]
+        if action == "post_add":
+            compatibility.add_pairs(pairs)
+        else:
+            compatibility.remove_pairs(pairs)
+    elif action == "post_clear":
+        field = "machine_model_id" if reverse else "part_id"
+        PartCompatibility.objects.filter(**{field: instance.pk}).delete()
+
+
+@receiver(post_save, sender=Manual, dispatch_uid="assistencia_manual_extraction")
+def manual_extraction_on_save(sender, instance, raw=False, **kwargs):
+    if raw or not manuals.needs_extraction(instance):
+        return
+    manuals.schedule_extraction([instance.pk])
+
+
+def _publish_after_commit(*topics):
+    transaction.on_commit(lambda: live.hub.publish(*topics))
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid="assistencia_live_ticket")
+def live_ticket_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _publish_after_commit(live.ticket_topic(instance.pk), live.STAFF_TOPIC)
+
+
+@receiver(post_save, sender=TicketMessage, dispatch_uid="assistencia_live_message")
+def live_message_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    _publish_after_commit(live.ticket_topic(instance.ticket_id), live.STAFF_TOPIC)
+
+
+@receiver(pre_save, sender=Ticket, dispatch_uid="assistencia_notify_ticket_status_before")
+def notify_status_before_save(sender, instance, raw=False, **kwargs):
+    # guarda antes: o post_save dos contadores já troca _loaded_owner_status
+    previous = getattr(instance, "_loaded_owner_status", None)
+    instance._notify_old_status = previous[1] if previous else None
+
+
+@receiver(post_save, sender=Ticket, dispatch_uid="assistencia_notify_ticket_status")
+def notify_status_on_save(sender, instance, created, raw=False, **kwargs):
+    old_status = getattr(instance, "_notify_old_status", None)
+    if raw or created or old_status in (None, instance.status) or not notifications.enabled():
+        return
+    notifications.status_changed(instance, old_status)
+
+
+@receiver(post_save, sender=TicketMessage, dispatch_uid="assistencia_notify_staff_reply")
+def notify_staff_reply(sender, instance, created, raw=False, **kwargs):
+    if raw or not created or instance.sender_role != TicketMessage.SENDER_ADMIN or not notifications.enabled():
+        return
+    notifications.staff_replied(instance)
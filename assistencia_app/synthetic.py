@@ -0,0 +1,441 @@
+"""
+Gerador de dados sintéticos para testes de carga (comando
+``generate_synthetic_data``).
+
+Tudo sai de um ``random.Random(seed)``: mesma semente + mesmos parâmetros =
+mesmo banco. Os ids são atribuídos aqui (a partir do maior id existente),
+então nada precisa voltar do banco entre um lote e outro e a memória fica
+constante: cada lote de chamados é gerado, gravado com ``bulk_create`` junto
+com suas mensagens/mídias, e descartado.
+
+``bulk_create`` não dispara signals; no fim são reconstruídos os dados
+derivados (contadores do dashboard, compatibilidade e, opcionalmente, o
+índice de busca).
+"""
+import itertools
+import random
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
+
+from . import compatibility, search
+from .counters import rebuild_all_owner_counters
+from .models import (
+    Machine,
+    MachineModel,
+    Part,
+    PartRequest,
+    PartRequestItem,
+    Symptom,
+    Ticket,
+    TicketMedia,
+    TicketMessage,
+)
+
+UFS = ["MG", "SP", "RJ", "PR", "RS", "SC", "GO", "BA", "ES", "MT"]
+CITIES = {
+    "MG": ["Sete Lagoas", "Belo Horizonte", "Uberlândia", "Divinópolis"],
+    "SP": ["São Paulo", "Campinas", "Ribeirão Preto", "Sorocaba"],
+    "RJ": ["Rio de Janeiro", "Niterói", "Petrópolis"],
+    "PR": ["Curitiba", "Londrina", "Maringá"],
+    "RS": ["Porto Alegre", "Caxias do Sul", "Santa Cruz do Sul"],
+    "SC": ["Joinville", "Blumenau", "Chapecó"],
+    "GO": ["Goiânia", "Anápolis"],
+    "BA": ["Salvador", "Feira de Santana"],
+    "ES": ["Vitória", "Cachoeiro de Itapemirim"],
+    "MT": ["Cuiabá", "Rondonópolis"],
+}
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Elaine", "Fábio", "Gustavo", "Helena", "Igor", "Júlia",
+               "Lucas", "Marina", "Otávio", "Paula", "Rafael", "Sônia", "Tiago", "Vanessa"]
+LAST_NAMES = ["Silva", "Souza", "Oliveira", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento",
+              "Lima", "Araújo", "Fernandes", "Gomes"]
+SYMPTOMS = ["Não liga", "Faz barulho excessivo", "Vibração anormal", "Superaquecendo", "Corte irregular",
+            "Perda de pressão", "Desarma o disjuntor", "Correia patinando", "Vazamento de óleo",
+            "Painel sem resposta", "Motor travando", "Rolamento com folga"]
+PART_NOUNS = ["Rolamento", "Correia", "Lâmina", "Motor", "Eixo", "Engrenagem", "Polia", "Contator",
+              "Relé", "Sensor", "Mola", "Parafuso", "Retentor", "Bucha", "Chaveta", "Mancal"]
+PART_SPECS = ["6204 ZZ", "A-42", "inox 300 mm", "2 CV trifásico", "temperado 25 mm", "Z18", "aço 150 mm",
+              "24 V", "NR-12", "reforçado", "M10", "80x100", "bronze"]
+DESCRIPTIONS = [
+    "A máquina parou no meio da produção e não voltou mais.",
+    "Ruído forte vindo do lado do motor depois de algumas horas de uso.",
+    "O corte está saindo torto desde a última troca de lâmina.",
+    "Está esquentando muito e desligando sozinha.",
+    "Aparece vazamento embaixo da máquina no fim do turno.",
+    "A correia escorrega quando colocamos carga.",
+]
+CLIENT_MESSAGES = [
+    "Bom dia, alguma novidade sobre o chamado?",
+    "Segue foto do problema.",
+    "Conseguimos testar novamente e o defeito continua.",
+    "Obrigado, vamos aguardar o orçamento.",
+    "Qual o prazo para envio da peça?",
+]
+ADMIN_MESSAGES = [
+    "Recebemos seu chamado e já estamos analisando.",
+    "Pode enviar um vídeo da máquina funcionando?",
+    "Orçamento enviado por e-mail.",
+    "Peça despachada, segue código de rastreio.",
+    "Verifique a tensão da correia conforme o manual.",
+]
+MODEL_SERIES = ["Pro", "Max", "Industrial", "Compacta", "Turbo", "Plus", "HD", "Eco"]
+
+
+@dataclass
+class SyntheticConfig:
+    seed: int = 42
+    users: int = 1000
+    machine_models: int = 40
+    machines_per_user: int = 2
+    symptoms: int = 120
+    tickets: int = 10_000
+    messages_per_ticket: float = 3      # média; cada chamado tem de 0 a 2x
+    media_per_ticket: float = 0.5
+    parts: int = 5000
+    compat_per_part: int = 3
+    part_requests: int = 2000
+    items_per_request: int = 3          # média; de 1 a 2x
+    batch_size: int = 5000
+    username_prefix: str = "synth"
+    password: str = "synthetic"
+    until: datetime = field(default_factory=lambda: datetime(2026, 1, 1, tzinfo=dt_timezone.utc))
+    days: int = 730
+    build_search_index: bool = True
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while batch := list(itertools.islice(it, size)):
+        yield batch
+
+
+def _next_id(model):
+    return (model.objects.aggregate(n=Max("pk"))["n"] or 0) + 1
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Desliga auto_now/auto_now_add durante a carga, para gravar datas espalhadas no tempo."""
+    saved = []
+    for model in models:
+        for f in model._meta.concrete_fields:
+            if getattr(f, "auto_now", False) or getattr(f, "auto_now_add", False):
+                saved.append((f, f.auto_now, f.auto_now_add))
+                f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class SyntheticDataGenerator:
+    def __init__(self, config, log=None):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.log = log or (lambda msg: None)
+        self.start = config.until - timedelta(days=config.days)
+        self.span = (config.until - self.start).total_seconds()
+        self.counts = {}
+
+    # ------------------------------------------------------------------
+    def run(self):
+        with explicit_timestamps(Ticket, TicketMessage, TicketMedia, PartRequest):
+            self.create_users()
+            self.create_machine_models()
+            self.create_machines()
+            self.create_symptoms()
+            self.create_parts()
+            self.create_tickets()
+            self.create_part_requests()
+        self.rebuild_derived()
+        return self.counts
+
+    def _insert(self, model, objs):
+        model.objects.bulk_create(objs, batch_size=self.config.batch_size)
+        key = model._meta.model_name
+        self.counts[key] = self.counts.get(key, 0) + len(objs)
+
+    def _date(self, fraction):
+        """Data na janela [until - days, until] (``fraction`` em 0..1)."""
+        return self.start + timedelta(seconds=self.span * min(max(fraction, 0.0), 1.0))
+
+    def _count(self, mean, minimum=0):
+        # média ``mean``, de ``minimum`` até 2x
+        return self.rng.randint(minimum, max(minimum, round(mean * 2)))
+
+    # ------------------------------------------------------------------
+    def create_users(self):
+        cfg = self.config
+        User = get_user_model()
+        self.first_user_id = _next_id(User)
+        # hash fixo: calcular PBKDF2 por usuário levaria horas
+        password = make_password(cfg.password, salt=f"{cfg.username_prefix}{cfg.seed}")
+        tag = f"{cfg.username_prefix}{cfg.seed}"
+
+        def rows():
+            for i in range(cfg.users):
+                uid = self.first_user_id + i
+                first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+                yield User(
+                    id=uid,
+                    username=f"{tag}_{uid}",
+                    email=f"{tag}_{uid}@example.com",
+                    first_name=first,
+                    last_name=last,
+                    password=password,
+                    date_joined=self._date(self.rng.random() * 0.3),
+                )
+
+        for batch in _chunks(rows(), cfg.batch_size):
+            with transaction.atomic():
+                self._insert(User, batch)
+        self.log(f"usuários: {cfg.users}")
+
+        # poucos clientes concentram muitos chamados (cauda longa)
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(cfg.users)]
+        self.rng.shuffle(weights)
+        self.owner_cum_weights = list(itertools.accumulate(weights))
+
+    def _pick_owner_index(self):
+        total = self.owner_cum_weights[-1]
+        return bisect_left(self.owner_cum_weights, self.rng.random() * total)
+
+    def create_machine_models(self):
+        cfg = self.config
+        self.first_model_id = _next_id(MachineModel)
+        categories = [c for c, _ in MachineModel.CATEGORY_CHOICES]
+        self.model_categories = []
+        objs = []
+        for i in range(cfg.machine_models):
+            category = self.rng.choice(categories)
+            self.model_categories.append(category)
+            objs.append(MachineModel(
+                id=self.first_model_id + i,
+                name=f"GX-{category.title()} {self.rng.choice(MODEL_SERIES)} {100 + i}",
+                category=category,
+                description="Modelo gerado para teste de carga.",
+            ))
+        with transaction.atomic():
+            self._insert(MachineModel, objs)
+        self.log(f"modelos: {cfg.machine_models}")
+
+    def _machine_id(self, owner_index, k):
+        return self.first_machine_id + owner_index * self.config.machines_per_user + k
+
+    def create_machines(self):
+        cfg = self.config
+        self.first_machine_id = _next_id(Machine)
+        # modelo de cada máquina, para o chamado herdar a categoria
+        self.machine_models = []
+
+        def rows():
+            for owner_index in range(cfg.users):
+                uf = self.rng.choice(UFS)
+                for k in range(cfg.machines_per_user):
+                    model_index = self.rng.randrange(cfg.machine_models)
+                    self.machine_models.append(model_index)
+                    mid = self._machine_id(owner_index, k)
+                    yield Machine(
+                        id=mid,
+                        owner_id=self.first_user_id + owner_index,
+                        model_id=self.first_model_id + model_index,
+                        serial=f"GX{self.config.seed:02d}{mid:08d}",
+                        city=self.rng.choice(CITIES[uf]),
+                        uf=uf,
+                        purchase_date=self._date(self.rng.random() * 0.5).date(),
+                    )
+
+        for batch in _chunks(rows(), cfg.batch_size):
+            with transaction.atomic():
+                self._insert(Machine, batch)
+        self.log(f"máquinas: {cfg.users * cfg.machines_per_user}")
+
+    def create_symptoms(self):
+        cfg = self.config
+        self.first_symptom_id = _next_id(Symptom)
+        categories = [c for c, _ in MachineModel.CATEGORY_CHOICES]
+        self.symptoms_by_category = {c: [] for c in categories}
+        objs = []
+        for i in range(cfg.symptoms):
+            category = categories[i % len(categories)]
+            sid = self.first_symptom_id + i
+            self.symptoms_by_category[category].append(sid)
+            objs.append(Symptom(
+                id=sid,
+                category=category,
+                title=f"{self.rng.choice(SYMPTOMS)} ({i + 1})",
+                description=self.rng.choice(DESCRIPTIONS),
+            ))
+        with transaction.atomic():
+            self._insert(Symptom, objs)
+        self.log(f"sintomas: {cfg.symptoms}")
+
+    def create_parts(self):
+        cfg = self.config
+        self.first_part_id = _next_id(Part)
+        Through = Part.compatible_models.through
+        model_ids = list(range(self.first_model_id, self.first_model_id + cfg.machine_models))
+
+        def rows():
+            for i in range(cfg.parts):
+                pid = self.first_part_id + i
+                part = Part(
+                    id=pid,
+                    sku=f"SYN{cfg.seed}-{pid:07d}",
+                    name=f"{self.rng.choice(PART_NOUNS)} {self.rng.choice(PART_SPECS)}",
+                    description="Peça gerada para teste de carga.",
+                    active=self.rng.random() > 0.05,
+                )
+                k = min(len(model_ids), self._count(cfg.compat_per_part))
+                links = [Through(part_id=pid, machinemodel_id=m) for m in self.rng.sample(model_ids, k)]
+                yield part, links
+
+        for batch in _chunks(rows(), cfg.batch_size):
+            with transaction.atomic():
+                self._insert(Part, [p for p, _ in batch])
+                Through.objects.bulk_create([link for _, links in batch for link in links], batch_size=cfg.batch_size)
+        self.log(f"peças: {cfg.parts}")
+
+    def _ticket_status(self, age):
+        # chamados antigos quase sempre finalizados; recentes ainda em andamento
+        if age > 0.15 or self.rng.random() < 0.3:
+            return Ticket.STATUS_DONE if self.rng.random() < 0.9 else Ticket.STATUS_CANCELED
+        return self.rng.choice([Ticket.STATUS_OPEN, Ticket.STATUS_TRIAGE, Ticket.STATUS_WAITING,
+                                Ticket.STATUS_QUOTE, Ticket.STATUS_SENT])
+
+    def create_tickets(self):
+        cfg = self.config
+        first_ticket = _next_id(Ticket)
+        next_message = _next_id(TicketMessage)
+        next_media = _next_id(TicketMedia)
+        priorities = [Ticket.PRIORITY_LOW, Ticket.PRIORITY_MEDIUM, Ticket.PRIORITY_MEDIUM, Ticket.PRIORITY_HIGH]
+        total = cfg.tickets
+
+        for start in range(0, total, cfg.batch_size):
+            tickets, messages, media = [], [], []
+            for n in range(start, min(start + cfg.batch_size, total)):
+                tid = first_ticket + n
+                owner_index = self._pick_owner_index()
+                k = self.rng.randrange(cfg.machines_per_user)
+                machine_index = owner_index * cfg.machines_per_user + k
+                category = self.model_categories[self.machine_models[machine_index]]
+                symptoms = self.symptoms_by_category.get(category) or [None]
+
+                # ids crescem com a data, como no banco real
+                position = (n + self.rng.random()) / total
+                created = self._date(position)
+                status = self._ticket_status(1 - position)
+                updated = min(created + timedelta(hours=self.rng.randint(1, 24 * 20)), self.config.until)
+                tickets.append(Ticket(
+                    id=tid,
+                    owner_id=self.first_user_id + owner_index,
+                    machine_id=self.first_machine_id + machine_index,
+                    category=category,
+                    symptom_id=self.rng.choice(symptoms),
+                    description=self.rng.choice(DESCRIPTIONS),
+                    status=status,
+                    priority=self.rng.choice(priorities),
+                    created_at=created,
+                    updated_at=updated,
+                ))
+
+                sent = created
+                step = max((updated - created) / 8, timedelta(minutes=1))
+                for m in range(self._count(cfg.messages_per_ticket)):
+                    admin = m % 2 == 1
+                    sent = sent + step * self.rng.random()
+                    messages.append(TicketMessage(
+                        id=next_message,
+                        ticket_id=tid,
+                        sender_role=TicketMessage.SENDER_ADMIN if admin else TicketMessage.SENDER_CLIENT,
+                        message=self.rng.choice(ADMIN_MESSAGES if admin else CLIENT_MESSAGES),
+                        created_at=sent,
+                    ))
+                    next_message += 1
+
+                media_count = int(cfg.media_per_ticket) + (self.rng.random() < cfg.media_per_ticket % 1)
+                for j in range(media_count):
+                    # só o registro: o arquivo não existe, por isso sem derivados
+                    media.append(TicketMedia(
+                        id=next_media,
+                        ticket_id=tid,
+                        file=f"tickets/synthetic/{tid}-{j}.jpg",
+                        kind=TicketMedia.KIND_IMAGE,
+                        derivatives_status=TicketMedia.DERIVATIVES_SKIPPED,
+                        created_at=created,
+                    ))
+                    next_media += 1
+
+            with transaction.atomic():
+                self._insert(Ticket, tickets)
+                self._insert(TicketMessage, messages)
+                self._insert(TicketMedia, media)
+            self.log(f"chamados: {min(start + cfg.batch_size, total)}/{total}")
+
+    def create_part_requests(self):
+        cfg = self.config
+        first_request = _next_id(PartRequest)
+        next_item = _next_id(PartRequestItem)
+        total = cfg.part_requests
+        statuses = [s for s, _ in PartRequest.STATUS_CHOICES]
+
+        for start in range(0, total, cfg.batch_size):
+            requests, items = [], []
+            for n in range(start, min(start + cfg.batch_size, total)):
+                rid = first_request + n
+                owner_index = self._pick_owner_index()
+                machine_index = owner_index * cfg.machines_per_user + self.rng.randrange(cfg.machines_per_user)
+                uf = self.rng.choice(UFS)
+                name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+                requests.append(PartRequest(
+                    id=rid,
+                    owner_id=self.first_user_id + owner_index,
+                    machine_id=self.first_machine_id + machine_index,
+                    status=self.rng.choice(statuses),
+                    contact_name=name,
+                    contact_phone=f"(31) 9{self.rng.randint(1000, 9999)}-{self.rng.randint(1000, 9999)}",
+                    shipping_name=name,
+                    shipping_zip=f"{self.rng.randint(10000, 99999)}-{self.rng.randint(100, 999)}",
+                    shipping_address="Rua das Indústrias",
+                    shipping_number=str(self.rng.randint(1, 2000)),
+                    shipping_city=self.rng.choice(CITIES[uf]),
+                    shipping_uf=uf,
+                    created_at=self._date((n + self.rng.random()) / total),
+                ))
+                if cfg.parts:
+                    for _ in range(self._count(cfg.items_per_request, minimum=1)):
+                        items.append(PartRequestItem(
+                            id=next_item,
+                            part_request_id=rid,
+                            part_id=self.first_part_id + self.rng.randrange(cfg.parts),
+                            qty=self.rng.randint(1, 5),
+                        ))
+                        next_item += 1
+
+            with transaction.atomic():
+                self._insert(PartRequest, requests)
+                self._insert(PartRequestItem, items)
+            self.log(f"solicitações: {min(start + cfg.batch_size, total)}/{total}")
+
+    # ------------------------------------------------------------------
+    def rebuild_derived(self):
+        with transaction.atomic():
+            owners = rebuild_all_owner_counters()
+        self.log(f"contadores recalculados: {owners}")
+        with transaction.atomic():
+            compatibility.rebuild_compatibility()
+        self.log("compatibilidade recalculada")
+        if self.config.build_search_index and search.enabled():
+            search.rebuild_index()
+            self.log("índice de busca recriado")
+
+
+def generate(config, log=None):
+    return SyntheticDataGenerator(config, log=log).run()
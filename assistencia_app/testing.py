@@ -0,0 +1,68 @@
+"""
+Apoio para os testes de orçamento de queries (tests.py).
+
+``assertQueryBudget`` roda a mesma view contra datasets de tamanhos
+diferentes (por exemplo um dono com 10 e outro com 1.000 chamados) e falha
+se o nº de queries muda com o volume, o que denuncia um N+1, ou se passa do
+orçamento declarado para a view. A mensagem de erro lista as queries da
+execução maior, com as repetidas agrupadas.
+"""
+import re
+from collections import Counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+_LITERALS_RE = re.compile(r"'[^']*'|\b\d+\b")
+
+
+def _shape(sql):
+    # a mesma consulta com outro id/literal conta como repetição
+    return _LITERALS_RE.sub("?", sql)
+
+
+def describe_queries(queries, limit=20):
+    shapes = Counter(_shape(q["sql"]) for q in queries)
+    lines = [f"  {n}x {sql[:300]}" for sql, n in shapes.most_common(limit)]
+    if len(shapes) > limit:
+        lines.append(f"  ... e mais {len(shapes) - limit} consultas diferentes")
+    return "\n".join(lines)
+
+
+class QueryBudgetMixin:
+    """Mixin para ``TestCase``."""
+
+    def count_queries(self, request):
+        # uma execução antes para aquecer caches (ContentType, sessão, settings)
+        request()
+        with CaptureQueriesContext(connection) as ctx:
+            response = request()
+        return response, ctx.captured_queries
+
+    def assertQueryBudget(self, budget, requests, status=200):
+        """
+        ``requests`` = {rótulo do dataset: função sem argumentos que faz o
+        request}. Cada resposta precisa ter ``status``; as contagens têm que
+        ser iguais entre os datasets e no máximo ``budget``.
+        """
+        captured = {}
+        for label, request in requests.items():
+            response, queries = self.count_queries(request)
+            self.assertEqual(
+                response.status_code, status, f"[{label}] status {response.status_code} (esperado {status})"
+            )
+            captured[label] = queries
+
+        counts = {label: len(queries) for label, queries in captured.items()}
+        largest = max(captured, key=lambda label: counts[label])
+        if len(set(counts.values())) > 1:
+            self.fail(
+                f"nº de queries cresce com o volume de dados {counts}; queries em [{largest}]:\n"
+                + describe_queries(captured[largest])
+            )
+        if counts[largest] > budget:
+            self.fail(
+                f"{counts[largest]} queries, orçamento de {budget}; queries em [{largest}]:\n"
+                + describe_queries(captured[largest])
+            )
+        return counts[largest]
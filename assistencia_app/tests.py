@@ -0,0 +1,646 @@
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import forms, jobs, media_derivatives, search, throttling, views
+from .importers import import_parts
+from .counters import rebuild_owner_counters
+from .pagination import EstimatedCountPaginator
+from .models import (
+    Job,
+    Machine,
+    MachineModel,
+    Manual,
+    Notification,
+    Part,
+    PartRequest,
+    PartRequestItem,
+    Symptom,
+    Ticket,
+    TicketMedia,
+    TicketMessage,
+)
+from .testing import QueryBudgetMixin
+
+# linhas por dono em cada dataset (máquinas, chamados, solicitações e, no
+# primeiro chamado/solicitação, mensagens, mídias e itens)
+DATASETS = {"10 linhas": 10, "1000 linhas": 1000}
+
+
+def build_owner(username, rows, machine_model, symptom, parts):
+    user = get_user_model().objects.create_user(username, f"{username}@example.com", "senha-teste")
+    machines = Machine.objects.bulk_create(
+        [Machine(owner=user, model=machine_model, serial=f"{username}-{i}", uf="MG") for i in range(rows)]
+    )
+    tickets = Ticket.objects.bulk_create(
+        [
+            Ticket(
+                owner=user,
+                machine=machines[i % len(machines)],
+                category=machine_model.category,
+                symptom=symptom,
+                description=f"Máquina com barulho no motor ({i})",
+            )
+            for i in range(rows)
+        ]
+    )
+    TicketMessage.objects.bulk_create(
+        [
+            TicketMessage(
+                ticket=tickets[0],
+                sender_role=TicketMessage.SENDER_ADMIN if i % 2 else TicketMessage.SENDER_CLIENT,
+                message=f"Mensagem {i}",
+            )
+            for i in range(rows)
+        ]
+    )
+    TicketMedia.objects.bulk_create(
+        [
+            TicketMedia(
+                ticket=tickets[0],
+                file=f"tickets/{username}-{i}.jpg",
+                kind=TicketMedia.KIND_IMAGE,
+                derivatives_status=TicketMedia.DERIVATIVES_SKIPPED,
+            )
+            for i in range(rows)
+        ]
+    )
+    part_requests = PartRequest.objects.bulk_create(
+        [
+            PartRequest(
+                owner=user,
+                machine=machines[i % len(machines)],
+                contact_name="Cliente",
+                contact_phone="(31) 90000-0000",
+                shipping_name="Cliente",
+                shipping_zip="35700-000",
+                shipping_address="Rua A",
+                shipping_city="Sete Lagoas",
+                shipping_uf="MG",
+            )
+            for i in range(rows)
+        ]
+    )
+    PartRequestItem.objects.bulk_create(
+        [PartRequestItem(part_request=part_requests[0], part=parts[i % len(parts)], qty=1) for i in range(rows)]
+    )
+    # bulk_create não dispara os signals dos contadores
+    rebuild_owner_counters(user.id)
+    return {"user": user, "machine": machines[0], "ticket": tickets[0], "part_request": part_requests[0]}
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        machine_model = MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        symptom = Symptom.objects.create(title="Barulho no motor", category=MachineModel.CATEGORY_CORTE)
+        parts = Part.objects.bulk_create(
+            [Part(sku=f"GX-{i:03d}", name=f"Rolamento {i}") for i in range(30)]
+        )
+        for part in parts:
+            part.compatible_models.add(machine_model)
+        Manual.objects.create(model=machine_model, title="Manual do Picador", url="https://example.com/manual")
+
+        cls.owners = {
+            label: build_owner(f"dono{rows}", rows, machine_model, symptom, parts)
+            for label, rows in DATASETS.items()
+        }
+        cls.staff = get_user_model().objects.create_superuser("equipe", "equipe@example.com", "senha-teste")
+        search.rebuild_index()
+
+    def as_owners(self, url):
+        """Um request por dataset, logado como o dono dele. ``url(dados_do_dono)``."""
+        requests = {}
+        for label, data in self.owners.items():
+            client = Client()
+            client.force_login(data["user"])
+            requests[label] = lambda client=client, path=url(data): client.get(path)
+        return requests
+
+    def as_staff(self, url):
+        """Um request por dataset, logado como equipe, apontando para os dados de cada dono."""
+        client = Client()
+        client.force_login(self.staff)
+        return {label: (lambda path=url(data): client.get(path)) for label, data in self.owners.items()}
+
+
+class CustomerViewQueryBudgetTests(QueryBudgetTestCase):
+    def test_dashboard(self):
+        self.assertQueryBudget(3, self.as_owners(lambda d: reverse("assistencia:dashboard")))
+
+    def test_machines_list(self):
+        self.assertQueryBudget(3, self.as_owners(lambda d: reverse("assistencia:machines_list")))
+
+    def test_machine_create(self):
+        self.assertQueryBudget(3, self.as_owners(lambda d: reverse("assistencia:machine_create")))
+
+    def test_machine_edit(self):
+        self.assertQueryBudget(
+            4,
+            self.as_owners(lambda d: reverse("assistencia:machine_edit", kwargs={"machine_id": d["machine"].id})),
+        )
+
+    def test_tickets_list(self):
+        self.assertQueryBudget(3, self.as_owners(lambda d: reverse("assistencia:tickets_list")))
+
+    def test_ticket_create(self):
+        self.assertQueryBudget(4, self.as_owners(lambda d: reverse("assistencia:ticket_create")))
+
+    def test_ticket_detail(self):
+        self.assertQueryBudget(
+            5,
+            self.as_owners(lambda d: reverse("assistencia:ticket_detail", kwargs={"ticket_id": d["ticket"].id})),
+        )
+
+    def test_ticket_messages(self):
+        self.assertQueryBudget(
+            4,
+            self.as_owners(lambda d: reverse("assistencia:ticket_messages", kwargs={"ticket_id": d["ticket"].id})),
+        )
+
+    @override_settings(ASSISTENCIA_LIVE_TIMEOUT=0)
+    def test_ticket_live(self):
+        self.assertQueryBudget(
+            5,
+            self.as_owners(lambda d: reverse("assistencia:ticket_live", kwargs={"ticket_id": d["ticket"].id})),
+        )
+
+    def test_manuals_list(self):
+        self.assertQueryBudget(3, self.as_owners(lambda d: reverse("assistencia:manuals_list")))
+
+    def test_part_requests_list(self):
+        self.assertQueryBudget(3, self.as_owners(lambda d: reverse("assistencia:part_requests_list")))
+
+    def test_part_request_create(self):
+        self.assertQueryBudget(
+            5,
+            self.as_owners(lambda d: f"{reverse('assistencia:part_request_create')}?machine={d['machine'].id}"),
+        )
+
+    def test_part_lookup(self):
+        self.assertQueryBudget(
+            5,
+            self.as_owners(lambda d: f"{reverse('assistencia:part_lookup')}?machine={d['machine'].id}&q=rol"),
+        )
+
+    def test_search(self):
+        self.assertQueryBudget(3, self.as_owners(lambda d: f"{reverse('assistencia:search')}?q=barulho"))
+
+
+class StaffViewQueryBudgetTests(QueryBudgetTestCase):
+    def test_ticket_changelist(self):
+        self.assertQueryBudget(
+            4,
+            self.as_staff(lambda d: f"{reverse('admin:assistencia_app_ticket_changelist')}?owner__exact={d['user'].id}"),
+        )
+
+    def test_ticket_changelist_search_keeps_every_match(self):
+        # FTS como subquery: nada de cortar em 1000 ids
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get(reverse("admin:assistencia_app_ticket_changelist"), {"q": "barulho"})
+        self.assertEqual(response.context["cl"].result_count, sum(DATASETS.values()))
+
+    def test_ticket_change(self):
+        self.assertQueryBudget(
+            7, self.as_staff(lambda d: reverse("admin:assistencia_app_ticket_change", args=[d["ticket"].id]))
+        )
+
+    def test_machine_changelist(self):
+        self.assertQueryBudget(
+            6,
+            self.as_staff(lambda d: f"{reverse('admin:assistencia_app_machine_changelist')}?owner__exact={d['user'].id}"),
+        )
+
+    def test_ticket_message_changelist(self):
+        self.assertQueryBudget(
+            4,
+            self.as_staff(
+                lambda d: f"{reverse('admin:assistencia_app_ticketmessage_changelist')}?ticket__exact={d['ticket'].id}"
+            ),
+        )
+
+    def test_ticket_media_changelist(self):
+        self.assertQueryBudget(
+            4,
+            self.as_staff(
+                lambda d: f"{reverse('admin:assistencia_app_ticketmedia_changelist')}?ticket__exact={d['ticket'].id}"
+            ),
+        )
+
+    def test_part_request_changelist(self):
+        self.assertQueryBudget(
+            4,
+            self.as_staff(
+                lambda d: f"{reverse('admin:assistencia_app_partrequest_changelist')}?owner__exact={d['user'].id}"
+            ),
+        )
+
+    def test_staff_queue(self):
+        self.assertQueryBudget(5, self.as_staff(lambda d: reverse("assistencia:staff_queue")))
+
+    @override_settings(ASSISTENCIA_LIVE_TIMEOUT=0)
+    def test_staff_queue_updates(self):
+        self.assertQueryBudget(
+            5,
+            self.as_staff(lambda d: f"{reverse('assistencia:staff_queue_updates')}?since=2000-01-01T00:00:00%2B00:00"),
+        )
+
+    def test_part_request_change(self):
+        # inline com todos os itens da solicitação
+        self.assertQueryBudget(
+            7,
+            self.as_staff(lambda d: reverse("admin:assistencia_app_partrequest_change", args=[d["part_request"].id])),
+        )
+
+    def test_part_request_item_changelist(self):
+        self.assertQueryBudget(
+            4,
+            self.as_staff(
+                lambda d: (
+                    f"{reverse('admin:assistencia_app_partrequestitem_changelist')}"
+                    f"?part_request__exact={d['part_request'].id}"
+                )
+            ),
+        )
+
+
+@override_settings(ASSISTENCIA_LIVE_TIMEOUT=0)
+class StaffQueueUpdatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        machine_model = MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        symptom = Symptom.objects.create(title="Barulho no motor", category=MachineModel.CATEGORY_CORTE)
+        parts = [Part.objects.create(sku="GX-001", name="Rolamento")]
+        build_owner("fila", views.STAFF_QUEUE_LIMIT + 50, machine_model, symptom, parts)
+        cls.staff = get_user_model().objects.create_superuser("equipe", "equipe@example.com", "senha-teste")
+
+    def test_more_changes_than_the_limit_arrive_over_two_polls(self):
+        client = Client()
+        client.force_login(self.staff)
+        since = timezone.now()
+        # update em massa: todos com o mesmo updated_at
+        Ticket.objects.update(updated_at=since + timedelta(seconds=1))
+
+        # como a página: mensagens que já existiam ficam para trás
+        params = {"since": since.isoformat(), "after": TicketMessage.objects.order_by("-id").first().id}
+        seen = []
+        for _ in range(3):
+            data = client.get(reverse("assistencia:staff_queue_updates"), params).json()
+            seen.append([row["id"] for row in data["tickets"]])
+            params = {"since": data["since"], "since_id": data["since_id"], "after": data["after"]}
+        self.assertEqual([len(ids) for ids in seen], [views.STAFF_QUEUE_LIMIT, 50, 0])
+        self.assertEqual(sorted(seen[0] + seen[1]), sorted(Ticket.objects.values_list("id", flat=True)))
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        parts = Part.objects.bulk_create([Part(sku=f"GX-{i:03d}", name=f"Rolamento {i}") for i in range(30)])
+        # exclusões no meio: o maior id continua 30, mas só sobram 10
+        Part.objects.filter(id__in=[p.id for p in parts[:20]]).delete()
+        cls.staff = get_user_model().objects.create_superuser("equipe", "equipe@example.com", "senha-teste")
+
+    def paginator(self, qs=None):
+        paginator = EstimatedCountPaginator(Part.objects.order_by("id") if qs is None else qs, 5)
+        paginator.exact_threshold = 5
+        return paginator
+
+    @mock.patch("assistencia_app.pagination.estimate_rows", return_value=30)
+    def test_estimate_without_filters_exact_with_filters(self, estimate_rows):
+        self.assertEqual(self.paginator().count, 30)
+        self.assertEqual(self.paginator(Part.objects.filter(active=True)).count, 10)
+
+    @mock.patch("assistencia_app.pagination.estimate_rows", return_value=30)
+    def test_empty_trailing_page_falls_back_to_the_exact_count(self, estimate_rows):
+        paginator = self.paginator()
+        self.assertEqual(paginator.num_pages, 6)
+        page = paginator.page(6)
+        self.assertEqual((paginator.count, paginator.num_pages, page.number), (10, 2, 2))
+        self.assertEqual(len(page.object_list), 5)
+
+    @mock.patch("assistencia_app.pagination.estimate_rows", return_value=30)
+    @mock.patch.object(EstimatedCountPaginator, "exact_threshold", 5)
+    def test_admin_last_page_link_does_not_error(self, estimate_rows):
+        client = Client()
+        client.force_login(self.staff)
+        url = reverse("admin:assistencia_app_part_changelist")
+        with mock.patch("assistencia_app.admin.PartAdmin.list_per_page", 5):
+            response = client.get(url, {"p": 6})
+        self.assertEqual(response.status_code, 200)
+        cl = response.context["cl"]
+        self.assertEqual((cl.result_count, cl.page_num, len(cl.result_list)), (10, 2, 5))
+
+
+class PartImportTests(TestCase):
+    def test_xlsx_upload(self):
+        from openpyxl import Workbook
+
+        MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        workbook = Workbook()
+        workbook.active.append(["SKU", "Nome", "Modelos"])
+        workbook.active.append(["GX-001", "Rolamento", "Picador GX"])
+        workbook.active.append(["GX-002", "Faca", ""])
+        buf = BytesIO()
+        workbook.save(buf)
+        buf.seek(0)
+
+        report = import_parts(buf, "catalogo.xlsx")
+        self.assertEqual((report.created, report.skipped), (2, 0))
+        self.assertEqual(
+            list(Part.objects.get(sku="GX-001").compatible_models.values_list("name", flat=True)), ["Picador GX"]
+        )
+
+
+class SearchIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        machine_model = MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        symptom = Symptom.objects.create(title="Barulho no motor", category=MachineModel.CATEGORY_CORTE)
+        parts = [Part.objects.create(sku="GX-001", name="Rolamento")]
+        cls.first = build_owner("busca1", 5, machine_model, symptom, parts)
+        cls.second = build_owner("busca2", 1, machine_model, symptom, parts)
+
+    def test_messages_load_owner_in_one_query(self):
+        messages = list(TicketMessage.objects.filter(ticket=self.first["ticket"]))
+        # chamados + DELETE + INSERT, seja qual for o número de mensagens
+        with self.assertNumQueries(3):
+            search.index_objects(messages)
+
+    def test_owner_change_moves_messages(self):
+        ticket = self.first["ticket"]
+        TicketMessage.objects.create(ticket=ticket, message="Engrenagem trincada")
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.owner = self.second["user"]
+        ticket.save()
+        self.assertEqual(search.search("engrenagem", kinds=["message"], owner_id=self.first["user"].id), [])
+        self.assertEqual(len(search.search("engrenagem", kinds=["message"], owner_id=self.second["user"].id)), 1)
+
+
+def failing_task():
+    raise RuntimeError("falha de teste")
+
+
+def noop_task():
+    pass
+
+
+@override_settings(JOBS_EAGER=False)
+@mock.patch.dict(
+    jobs.TASKS, {"tests.fail": "assistencia_app.tests.failing_task", "tests.noop": "assistencia_app.tests.noop_task"}
+)
+class JobQueueTests(TestCase):
+    def test_claims_never_share_a_job(self):
+        for _ in range(5):
+            jobs.enqueue("tests.noop")
+        first = jobs.claim("worker-1", limit=3)
+        second = jobs.claim("worker-2", limit=3)
+        self.assertEqual((len(first), len(second)), (3, 2))
+        self.assertFalse({j.id for j in first} & {j.id for j in second})
+        self.assertEqual(jobs.claim("worker-3", limit=3), [])
+
+    @override_settings(JOBS_RETRY_BASE_SECONDS=30)
+    def test_failure_backs_off_until_max_attempts(self):
+        job = jobs.enqueue("tests.fail", max_attempts=2)
+        started = timezone.now()
+        self.assertEqual(jobs.run(jobs.claim("worker")[0]), Job.STATUS_QUEUED)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, started + timedelta(seconds=20))
+        self.assertIn("falha de teste", job.last_error)
+        # ainda na espera: nenhum worker pega
+        self.assertEqual(jobs.claim("worker"), [])
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        self.assertEqual(jobs.run(jobs.claim("worker")[0]), Job.STATUS_FAILED)
+        job.refresh_from_db()
+        self.assertEqual((job.attempts, job.locked_by), (2, ""))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_stale_running_job_is_requeued(self):
+        job = jobs.enqueue("tests.noop")
+        jobs.claim("worker-morto")
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(seconds=120))
+        self.assertEqual(jobs.requeue_stale(timeout=60), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.STATUS_QUEUED, 1, ""))
+        self.assertEqual([j.id for j in jobs.claim("worker")], [job.id])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_skips_delayed_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            delayed = jobs.enqueue("tests.noop", delay=60)
+            ready = jobs.enqueue("tests.noop")
+        delayed.refresh_from_db()
+        ready.refresh_from_db()
+        self.assertEqual((delayed.status, ready.status), (Job.STATUS_QUEUED, Job.STATUS_DONE))
+
+    def test_media_task_retries_transient_errors(self):
+        user = get_user_model().objects.create_user("midia", "midia@example.com", "senha-teste")
+        machine_model = MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        machine = Machine.objects.create(owner=user, model=machine_model, serial="GX-1", uf="MG")
+        ticket = Ticket.objects.create(owner=user, machine=machine, category=machine_model.category, description="x")
+        # bulk_create: sem os signals que já enfileirariam a tarefa
+        [media] = TicketMedia.objects.bulk_create(
+            [TicketMedia(ticket=ticket, file="tickets/foto.jpg", derivatives_status=TicketMedia.DERIVATIVES_PENDING)]
+        )
+        storage = TicketMedia.file.field.storage
+
+        with mock.patch.object(storage, "open", side_effect=OSError("storage fora do ar")):
+            with self.assertRaises(OSError):
+                media_derivatives.build_pending([media.id])
+        media.refresh_from_db()
+        self.assertEqual(media.derivatives_status, TicketMedia.DERIVATIVES_PENDING)
+
+        with mock.patch.object(storage, "open", return_value=BytesIO(b"isto nao e uma imagem")):
+            media_derivatives.build_pending([media.id])
+        media.refresh_from_db()
+        self.assertEqual(media.derivatives_status, TicketMedia.DERIVATIVES_FAILED)
+
+
+@override_settings(JOBS_EAGER=False, NOTIFICATIONS_DIGEST_WINDOW=0)
+class NotificationDigestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        machine_model = MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        symptom = Symptom.objects.create(title="Barulho no motor", category=MachineModel.CATEGORY_CORTE)
+        parts = [Part.objects.create(sku="GX-001", name="Rolamento")]
+        cls.owners = [build_owner(f"cliente{i}", 100, machine_model, symptom, parts) for i in range(2)]
+
+    def test_status_changes_and_replies_become_one_digest_per_customer(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for ticket in Ticket.objects.filter(owner__in=[o["user"] for o in self.owners]):
+                ticket.status = Ticket.STATUS_TRIAGE
+                ticket.save()
+            TicketMessage.objects.create(
+                ticket=self.owners[0]["ticket"], sender_role=TicketMessage.SENDER_ADMIN, message="Peça enviada."
+            )
+            # mensagem do próprio cliente não gera aviso
+            TicketMessage.objects.create(ticket=self.owners[0]["ticket"], message="Obrigado!")
+
+        self.assertEqual(Notification.objects.filter(sent_at__isnull=True).count(), 201)
+        self.assertEqual(Job.objects.filter(name="notifications.flush").count(), 1)
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(jobs.work("teste", limit=10), 1)
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), ["cliente0@example.com", "cliente1@example.com"])
+        self.assertIn("Peça enviada.", mail.outbox[0].body + mail.outbox[1].body)
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "login-throttle"}},
+    LOGIN_THROTTLE_USER_LIMIT=3,
+    LOGIN_THROTTLE_IP_LIMIT=10,
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+)
+class LoginThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.create_user("cliente", "cliente@example.com", "senha-certa")
+
+    def setUp(self):
+        throttling.cache.clear()
+        self.url = reverse("assistencia:auth_login")
+
+    def login(self, password, username="cliente", ip="203.0.113.1", **extra):
+        return Client(REMOTE_ADDR=ip, **extra).post(self.url, {"username": username, "password": password})
+
+    def test_blocked_username_is_rejected_before_authenticate(self):
+        for _ in range(3):
+            self.assertEqual(self.login("errada").status_code, 200)
+
+        with mock.patch.object(forms, "authenticate", wraps=forms.authenticate) as authenticate:
+            # outro IP, senha certa: o usuário continua bloqueado e nada de hash
+            response = self.login("senha-certa", ip="198.51.100.7")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 29)
+        authenticate.assert_not_called()
+        self.assertEqual(throttling.metrics()["rejected"], 1)
+
+    def test_blocked_ip_covers_other_usernames(self):
+        for i in range(10):
+            self.login("errada", username=f"outro{i}")
+        self.assertEqual(self.login("senha-certa").status_code, 429)
+        self.assertEqual(self.login("senha-certa", ip="198.51.100.7").status_code, 302)
+
+    @override_settings(LOGIN_THROTTLE_TRUSTED_PROXIES=1)
+    def test_behind_proxy_each_client_has_its_own_ip_window(self):
+        proxy = "10.0.0.1"
+        # o atacante forja o começo do header; o nginx acrescenta o endereço real no fim
+        attacker = {"HTTP_X_FORWARDED_FOR": "198.51.100.7, 203.0.113.9"}
+        for i in range(10):
+            self.login("errada", username=f"outro{i}", ip=proxy, **attacker)
+        self.assertEqual(self.login("errada", username="mais-um", ip=proxy, **attacker).status_code, 429)
+        response = self.login("senha-certa", ip=proxy, HTTP_X_FORWARDED_FOR="198.51.100.7")
+        self.assertEqual(response.status_code, 302)
+
+    def test_known_good_username_is_spared_only_on_its_own_ip(self):
+        self.assertEqual(self.login("senha-certa").status_code, 302)
+        for i in range(10):
+            self.login("errada", username=f"outro{i}")
+        self.assertEqual(self.login("senha-certa", username="novo").status_code, 429)
+        self.assertEqual(self.login("senha-certa").status_code, 302)
+
+        # credential stuffing de outro endereço: a conta real não livra o IP do atacante
+        attacker = "198.51.100.66"
+        for i in range(10):
+            self.login("errada", username=f"vitima{i}", ip=attacker)
+        with mock.patch.object(forms, "authenticate", wraps=forms.authenticate) as authenticate:
+            self.assertEqual(self.login("chute", ip=attacker).status_code, 429)
+        authenticate.assert_not_called()
+
+    def test_backoff_doubles_on_each_failure_after_the_limit(self):
+        with mock.patch.object(throttling.time, "time", return_value=1000.0):
+            for _ in range(3):
+                self.login("errada")
+        with mock.patch.object(throttling.time, "time", return_value=1031.0):
+            self.login("errada")
+            self.assertEqual(self.login("errada").status_code, 429)
+            state = throttling.cache.get(throttling._keys(RequestFactory().get(self.url), "cliente")["user"][0])
+        self.assertEqual(state["blocked_until"], 1031.0 + 60)
+
+
+class PartRequestCreatePageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        machine_model = MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        cls.user = get_user_model().objects.create_user("cliente", "cliente@example.com", "senha-teste")
+        cls.machine = Machine.objects.create(owner=cls.user, model=machine_model, serial="GX-1", uf="MG")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse("assistencia:part_request_create")
+
+    def test_page_has_one_multi_row_script_outside_title(self):
+        html = self.client.get(self.url).content.decode()
+        title = html[html.index("<title>"):html.index("</title>")]
+        self.assertNotIn("<script", title)
+        self.assertEqual(html.count('getElementById("item-rows")'), 1)
+        self.assertIn('getElementById("add-item")', html)
+        self.assertNotIn('getElementById("part-search")', html)
+
+    def test_invalid_header_still_shows_item_errors(self):
+        response = self.client.post(
+            self.url,
+            {
+                "machine": self.machine.id,
+                "items-TOTAL_FORMS": "1",
+                "items-INITIAL_FORMS": "0",
+                "items-0-part": "999999",
+                "items-0-qty": "1",
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+        self.assertContains(response, "Peça indisponível para esta máquina.")
+
+
+class ExportDataCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        machine_model = MachineModel.objects.create(name="Picador GX", category=MachineModel.CATEGORY_CORTE)
+        symptom = Symptom.objects.create(title="Barulho no motor", category=MachineModel.CATEGORY_CORTE)
+        build_owner("exporta", 3, machine_model, symptom, [Part.objects.create(sku="GX-001", name="Rolamento")])
+
+    def test_csv_goes_to_the_command_stdout(self):
+        out = StringIO()
+        call_command("export_data", "tickets", stdout=out)
+        lines = out.getvalue().split("\r\n")
+        self.assertTrue(lines[0].startswith("\ufeffChamado;"))
+        self.assertEqual(len(lines), 1 + 3 + 1)  # cabeçalho, 3 chamados e o fim da última linha
+
+    def test_xlsx_file(self):
+        from openpyxl import load_workbook
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "chamados.xlsx"
+            call_command("export_data", "tickets", "-o", str(path), stdout=StringIO())
+            workbook = load_workbook(path, read_only=True)
+            rows = list(workbook.active.iter_rows(values_only=True))
+            workbook.close()
+        self.assertEqual(rows[0][0], "Chamado")
+        self.assertEqual(len(rows), 1 + 3)
+
+    def test_admin_xlsx_action(self):
+        from openpyxl import load_workbook
+
+        client = Client()
+        client.force_login(get_user_model().objects.create_superuser("equipe", "equipe@example.com", "senha-teste"))
+        response = client.post(
+            reverse("admin:assistencia_app_ticket_changelist"),
+            {"action": "export_tickets_xlsx", "_selected_action": list(Ticket.objects.values_list("id", flat=True))},
+        )
+        self.assertEqual(response["Content-Type"], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        workbook = load_workbook(BytesIO(b"".join(response.streaming_content)), read_only=True)
+        self.assertEqual(len(list(workbook.active.iter_rows(values_only=True))), 1 + 3)
+        workbook.close()
@@ -0,0 +1,151 @@
+"""
+Limite de tentativas de login do portal.
+
+Cada senha errada entra em duas janelas deslizantes no cache: uma por IP e
+outra pelo usuário digitado. Passou do limite, a chave fica bloqueada por
+LOGIN_THROTTLE_BASE_DELAY segundos, e o tempo dobra a cada nova falha
+dentro da janela (até LOGIN_THROTTLE_MAX_DELAY).
+
+``retry_after`` é chamado antes do ``authenticate()``: enquanto houver
+bloqueio, o request volta com 429 sem calcular o hash da senha (PBKDF2).
+Assim cada request de um ataque (força bruta, credential stuffing) custa
+algumas operações no cache, e não o hash de uma senha na CPU do worker. O
+cache precisa ser compartilhado entre os workers (FileBasedCache ou
+Redis/Memcached, veja CACHES).
+
+O IP é o REMOTE_ADDR, ou o endereço gravado no X-Forwarded-For pelos
+LOGIN_THROTTLE_TRUSTED_PROXIES proxies da frente (veja a nota em settings.py:
+sem isso, atrás de um proxy todos os clientes dividem a mesma janela de IP).
+E quem já entrou com sucesso daquele IP (par usuário + IP "conhecido" por
+LOGIN_THROTTLE_KNOWN_GOOD_TTL) não é barrado pela janela do IP, só pela do
+próprio usuário: um ataque vindo do mesmo endereço não tranca os clientes de
+sempre para fora. De outro IP o usuário não tem isenção nenhuma, então uma
+lista de contas reais testada de um endereço só continua presa na janela do
+IP.
+
+Os contadores de ``metrics()`` ficam no mesmo cache, somados entre os
+workers.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "assistencia:login"
+METRICS = ("attempts", "rejected", "failures", "successes", "lockouts")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enabled():
+    return _setting("LOGIN_THROTTLE_ENABLED", True)
+
+
+def client_ip(request):
+    proxies = _setting("LOGIN_THROTTLE_TRUSTED_PROXIES", 0)
+    if proxies > 0:
+        # cada proxy acrescenta o endereço que viu no fim; o que vem antes
+        # dos nossos foi escrito pelo cliente e pode ser forjado
+        forwarded = [a.strip() for a in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if a.strip()]
+        if forwarded:
+            return forwarded[-min(proxies, len(forwarded))]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _user_hash(username):
+    # hash: o usuário digitado pode ter qualquer caractere (e tamanho)
+    return hashlib.sha256((username or "").strip().casefold().encode()).hexdigest()[:32]
+
+
+def _known_good_key(request, username):
+    return f"{KEY_PREFIX}:good:{client_ip(request)}:{_user_hash(username)}"
+
+
+def _keys(request, username):
+    user_hash = _user_hash(username)
+    return {
+        "ip": (f"{KEY_PREFIX}:ip:{client_ip(request)}", _setting("LOGIN_THROTTLE_IP_LIMIT", 20)),
+        "user": (f"{KEY_PREFIX}:user:{user_hash}", _setting("LOGIN_THROTTLE_USER_LIMIT", 5)),
+    }
+
+
+def _count(name):
+    key = f"{KEY_PREFIX}:metrics:{name}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        # ainda não existe (ou expirou)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def metrics():
+    values = cache.get_many([f"{KEY_PREFIX}:metrics:{name}" for name in METRICS])
+    return {name: values.get(f"{KEY_PREFIX}:metrics:{name}", 0) for name in METRICS}
+
+
+def reset_metrics():
+    cache.delete_many([f"{KEY_PREFIX}:metrics:{name}" for name in METRICS])
+
+
+def retry_after(request, username):
+    """Segundos até poder tentar de novo (0 = liberado). Não grava as janelas."""
+    if not enabled():
+        return 0
+    _count("attempts")
+    keys = _keys(request, username)
+    good_key = _known_good_key(request, username)
+    states = cache.get_many([key for key, _ in keys.values()] + [good_key])
+    if states.pop(good_key, None):
+        # já entrou antes deste IP: o bloqueio do IP (talvez o de um proxy) não vale para ele
+        states.pop(keys["ip"][0], None)
+    now = time.time()
+    wait = max((state["blocked_until"] - now for state in states.values()), default=0)
+    if wait > 0:
+        _count("rejected")
+        return int(wait) + 1
+    return 0
+
+
+def register_failure(request, username):
+    if not enabled():
+        return
+    _count("failures")
+    now = time.time()
+    window = _setting("LOGIN_THROTTLE_WINDOW", 900)
+    base = _setting("LOGIN_THROTTLE_BASE_DELAY", 30)
+    max_delay = _setting("LOGIN_THROTTLE_MAX_DELAY", 3600)
+
+    for kind, (key, limit) in _keys(request, username).items():
+        state = cache.get(key) or {"hits": [], "blocked_until": 0}
+        hits = [t for t in state["hits"] if t > now - window] + [now]
+        excess = len(hits) - limit
+        blocked_until = state["blocked_until"]
+        if excess >= 0:
+            # 1º bloqueio = base; cada falha a mais dentro da janela dobra
+            delay = min(base * 2 ** excess, max_delay)
+            blocked_until = now + delay
+            _count("lockouts")
+            logger.warning("Login bloqueado por %ss (%s, %s falhas na janela)", delay, kind, len(hits))
+        # leitura + escrita sem lock: entre workers, alguma falha simultânea
+        # pode se perder, o que só atrasa o bloqueio em uma tentativa
+        cache.set(
+            key,
+            {"hits": hits[-(limit + 16):], "blocked_until": blocked_until},
+            timeout=int(max(window, blocked_until - now)) + 1,
+        )
+
+
+def register_success(request, username):
+    if not enabled():
+        return
+    _count("successes")
+    # o IP continua contando: um acerto não apaga as falhas em outras contas
+    cache.delete(_keys(request, username)["user"][0])
+    cache.set(_known_good_key(request, username), 1, timeout=_setting("LOGIN_THROTTLE_KNOWN_GOOD_TTL", 30 * 86400))
@@ -10,9 +10,18 @@ from .views import (
     tickets_list,
     ticket_create,
     ticket_detail,
+    ticket_messages,
+    ticket_messages_stream,
+    ticket_live,
+    ticket_message_send,
+    staff_queue,
+    staff_queue_updates,
     manuals_list,
+    manual_file,
     part_requests_list,
     part_request_create,
+    part_lookup,
+    search,
 )
 
 app_name = "assistencia"
@@ -30,9 +39,20 @@ urlpatterns = [
     path("tickets/", tickets_list, name="tickets_list"),
     path("tickets/new/", ticket_create, name="ticket_create"),
     path("tickets/<int:ticket_id>/", ticket_detail, name="ticket_detail"),
+    path("tickets/<int:ticket_id>/messages/", ticket_messages, name="ticket_messages"),
+    path("tickets/<int:ticket_id>/messages/stream/", ticket_messages_stream, name="ticket_messages_stream"),
+    path("tickets/<int:ticket_id>/messages/send/", ticket_message_send, name="ticket_message_send"),
+    path("tickets/<int:ticket_id>/live/", ticket_live, name="ticket_live"),
 
     path("manuals/", manuals_list, name="manuals_list"),
+    path("manuals/<int:manual_id>/file/", manual_file, name="manual_file"),
 
     path("parts/requests/", part_requests_list, name="part_requests_list"),
     path("parts/requests/new/", part_request_create, name="part_request_create"),
+    path("parts/lookup/", part_lookup, name="part_lookup"),
+
+    path("search/", search, name="search"),
+
+    path("staff/queue/", staff_queue, name="staff_queue"),
+    path("staff/queue/updates/", staff_queue_updates, name="staff_queue_updates"),
 ]
\ No newline at end of file
@@ -1,7 +1,20 @@
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login, logout
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateformat import format as date_format
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET, require_POST, require_safe
 
 from .forms import (
     LoginForm,
@@ -9,28 +22,44 @@ from .forms import (
     TicketCreateForm,
     TicketMessageForm,
     PartRequestForm,
-    PartRequestItemForm,
+    PartRequestItemFormSet,
 )
 from .models import (
     Machine,
     Ticket,
     TicketMedia,
+    TicketMessage,
     Manual,
     PartRequest,
+    PartRequestItem,
 )
+from . import live, search as fts
+from .compatibility import lookup_parts
+from .counters import get_owner_counters
+from .downloads import serve_file
+from .media_derivatives import schedule_derivatives
+from .pagination import keyset_paginate, parse_cursor
+
+
+LIST_PAGE_SIZE = 25
+MESSAGES_POLL_LIMIT = 100
 
 
 def auth_login(request):
     if request.user.is_authenticated:
         return redirect("assistencia:dashboard")
 
-    form = LoginForm(request.POST or None)
+    form = LoginForm(request.POST or None, request=request)
     if request.method == "POST" and form.is_valid():
         user = form.cleaned_data["user"]
         login(request, user)
         return redirect("assistencia:dashboard")
 
-    return render(request, "assistencia/auth_login.html", {"form": form})
+    response = render(request, "assistencia/auth_login.html", {"form": form})
+    if form.retry_after:
+        response.status_code = 429
+        response["Retry-After"] = str(form.retry_after)
+    return response
 
 
 @login_required
@@ -41,22 +70,19 @@ def auth_logout(request):
 
 @login_required
 def dashboard(request):
-    my_tickets_open = (
+    # contadores mantidos pelos signals: 1 SELECT, independente do histórico
+    counters = get_owner_counters(request.user.id)
+
+    last_tickets = (
         Ticket.objects.filter(owner=request.user)
-        .exclude(status__in=["DONE", "CANCELED"])
-        .count()
-    )
-    my_partreq_open = (
-        PartRequest.objects.filter(owner=request.user)
-        .exclude(status__in=["SENT", "CANCELED"])
-        .count()
+        .select_related("machine__model")
+        .order_by("-updated_at")[:5]
     )
 
-    last_tickets = Ticket.objects.filter(owner=request.user).order_by("-updated_at")[:5]
-
     ctx = {
-        "my_tickets_open": my_tickets_open,
-        "my_partreq_open": my_partreq_open,
+        "my_tickets_open": counters.open_tickets,
+        "my_partreq_open": counters.open_part_requests,
+        "last_activity_at": counters.last_activity_at,
         "last_tickets": last_tickets,
     }
     return render(request, "assistencia/dashboard.html", ctx)
@@ -64,7 +90,7 @@ def dashboard(request):
 
 @login_required
 def machines_list(request):
-    machines = Machine.objects.filter(owner=request.user).order_by("-id")
+    machines = Machine.objects.filter(owner=request.user).select_related("model").order_by("-id")
     return render(request, "assistencia/machines_list.html", {"machines": machines})
 
 
@@ -102,10 +128,39 @@ def machine_edit(request, machine_id: int):
     )
 
 
+def _choice_filter(request, name, choices):
+    value = request.GET.get(name, "").strip().upper()
+    return value if value in dict(choices) else ""
+
+
 @login_required
 def tickets_list(request):
-    tickets = Ticket.objects.filter(owner=request.user).order_by("-id")
-    return render(request, "assistencia/tickets_list.html", {"tickets": tickets})
+    status = _choice_filter(request, "status", Ticket.STATUS_CHOICES)
+    priority = _choice_filter(request, "priority", Ticket.PRIORITY_CHOICES)
+
+    qs = Ticket.objects.filter(owner=request.user).select_related("machine__model", "symptom")
+    # owner+status usa o índice (owner, status)
+    if status:
+        qs = qs.filter(status=status)
+    if priority:
+        qs = qs.filter(priority=priority)
+
+    page = keyset_paginate(
+        qs,
+        cursor=parse_cursor(request.GET.get("after")),
+        per_page=LIST_PAGE_SIZE,
+        params={"status": status, "priority": priority},
+    )
+
+    ctx = {
+        "tickets": page,
+        "page": page,
+        "status": status,
+        "priority": priority,
+        "status_choices": Ticket.STATUS_CHOICES,
+        "priority_choices": Ticket.PRIORITY_CHOICES,
+    }
+    return render(request, "assistencia/tickets_list.html", ctx)
 
 
 @login_required
@@ -117,10 +172,10 @@ def ticket_create(request):
         ticket.owner = request.user
         ticket.save()
 
-        # múltiplas mídias
+        # múltiplas mídias (miniaturas/prévias saem depois, fora do request)
         files = request.FILES.getlist("media_files")
-        for f in files:
-            TicketMedia.objects.create(ticket=ticket, file=f)
+        media_ids = [TicketMedia.objects.create(ticket=ticket, file=f).id for f in files]
+        schedule_derivatives(media_ids)
 
         messages.success(request, f"Chamado #{ticket.id} criado.")
         return redirect("assistencia:ticket_detail", ticket_id=ticket.id)
@@ -130,7 +185,9 @@ def ticket_create(request):
 
 @login_required
 def ticket_detail(request, ticket_id: int):
-    ticket = get_object_or_404(Ticket, id=ticket_id, owner=request.user)
+    ticket = get_object_or_404(
+        Ticket.objects.select_related("machine__model"), id=ticket_id, owner=request.user
+    )
 
     msg_form = TicketMessageForm(request.POST or None)
     if request.method == "POST" and msg_form.is_valid():
@@ -141,46 +198,358 @@ def ticket_detail(request, ticket_id: int):
         messages.success(request, "Mensagem enviada.")
         return redirect("assistencia:ticket_detail", ticket_id=ticket.id)
 
+    messages_list = list(ticket.messages.all().order_by("id"))
+
     ctx = {
         "ticket": ticket,
         "media": ticket.media.all().order_by("-id"),
-        "messages_list": ticket.messages.all().order_by("created_at"),
+        "messages_list": messages_list,
+        "last_message_id": messages_list[-1].id if messages_list else 0,
         "msg_form": msg_form,
+        "poll_interval": getattr(settings, "ASSISTENCIA_POLL_INTERVAL", 15),
+        "sse_enabled": getattr(settings, "ASSISTENCIA_SSE_ENABLED", False),
+        "live_enabled": getattr(settings, "ASSISTENCIA_LIVE_ENABLED", False),
     }
     return render(request, "assistencia/ticket_detail.html", ctx)
 
 
+def _new_messages(ticket_id, after):
+    return list(
+        TicketMessage.objects.filter(ticket_id=ticket_id, id__gt=after)
+        .order_by("id")[:MESSAGES_POLL_LIMIT]
+    )
+
+
+def _message_payload(msg):
+    return {
+        "id": msg.id,
+        "sender_role": msg.sender_role,
+        "sender_label": msg.get_sender_role_display(),
+        "message": msg.message,
+        "created_at": date_format(timezone.localtime(msg.created_at), "d/m/Y H:i"),
+        "html": render_to_string("assistencia/_ticket_message.html", {"msg": msg}),
+    }
+
+
+def _owned_ticket_status(request, ticket_id):
+    status = (
+        Ticket.objects.filter(id=ticket_id, owner=request.user)
+        .values_list("status", flat=True)
+        .first()
+    )
+    if status is None:
+        raise Http404
+    return status
+
+
+@login_required
+@require_GET
+def ticket_messages(request, ticket_id: int):
+    """
+    Só as mensagens com id maior que ``after`` (2 consultas indexadas),
+    para a tela do chamado buscar respostas sem recarregar tudo.
+    """
+    status = _owned_ticket_status(request, ticket_id)
+    after = parse_cursor(request.GET.get("after")) or 0
+    new = _new_messages(ticket_id, after)
+
+    return JsonResponse(
+        {
+            "status": status,
+            "status_display": dict(Ticket.STATUS_CHOICES).get(status, status),
+            "cursor": new[-1].id if new else after,
+            "messages": [_message_payload(m) for m in new],
+        }
+    )
+
+
+def _sse_event(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@login_required
+@require_GET
+def ticket_messages_stream(request, ticket_id: int):
+    """
+    Server-Sent Events com as novas mensagens/status do chamado. Desligado
+    por padrão (ASSISTENCIA_SSE_ENABLED): no WSGI cada conexão aberta
+    prende um worker, por isso a conexão dura no máximo
+    ASSISTENCIA_SSE_MAX_SECONDS e o navegador reconecta sozinho.
+    """
+    if not getattr(settings, "ASSISTENCIA_SSE_ENABLED", False):
+        raise Http404
+
+    status = _owned_ticket_status(request, ticket_id)
+    after = parse_cursor(request.headers.get("Last-Event-ID") or request.GET.get("after")) or 0
+    interval = getattr(settings, "ASSISTENCIA_SSE_INTERVAL", 3)
+    max_seconds = getattr(settings, "ASSISTENCIA_SSE_MAX_SECONDS", 30)
+
+    def stream():
+        cursor, last_status = after, status
+        deadline = time.monotonic() + max_seconds
+        yield f"retry: {interval * 1000}\n\n"
+
+        while time.monotonic() < deadline:
+            for msg in _new_messages(ticket_id, cursor):
+                cursor = msg.id
+                yield _sse_event("message", _message_payload(msg), event_id=msg.id)
+
+            current = Ticket.objects.filter(id=ticket_id).values_list("status", flat=True).first()
+            if current != last_status:
+                last_status = current
+                yield _sse_event(
+                    "status",
+                    {"status": current, "status_display": dict(Ticket.STATUS_CHOICES).get(current, current)},
+                )
+
+            yield ": ping\n\n"
+            time.sleep(interval)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ========= Tempo real (ASGI): long-poll assíncrono =========
+# no deploy ASGI (giftex/asgi.py) cada conexão esperando é só uma coroutine
+# parada no hub (live.py), sem prender worker nem thread
+
+
+async def _aowned_ticket(user, ticket_id):
+    ticket = await Ticket.objects.filter(id=ticket_id, owner=user).only("id", "status").afirst()
+    if ticket is None:
+        raise Http404
+    return ticket
+
+
+@login_required
+@require_GET
+async def ticket_live(request, ticket_id: int):
+    """
+    Como ``ticket_messages``, mas segura a resposta até chegar mensagem
+    nova ou o status mudar (ou ASSISTENCIA_LIVE_TIMEOUT estourar).
+    ``status`` é o que a tela já mostra.
+    """
+    ticket = await _aowned_ticket(await request.auser(), ticket_id)
+    after = parse_cursor(request.GET.get("after")) or 0
+    known_status = request.GET.get("status") or ticket.status
+
+    async def check():
+        new = [
+            m
+            async for m in TicketMessage.objects.filter(ticket_id=ticket_id, id__gt=after)
+            .order_by("id")[:MESSAGES_POLL_LIMIT]
+        ]
+        status = await Ticket.objects.filter(id=ticket_id).values_list("status", flat=True).afirst()
+        return (new, status) if new or status != known_status else None
+
+    new, status = await live.wait_for(check, [live.ticket_topic(ticket_id)]) or ([], known_status)
+    return JsonResponse(
+        {
+            "status": status,
+            "status_display": dict(Ticket.STATUS_CHOICES).get(status, status),
+            "cursor": new[-1].id if new else after,
+            "messages": [_message_payload(m) for m in new],
+        }
+    )
+
+
+@login_required
+@require_POST
+async def ticket_message_send(request, ticket_id: int):
+    """Envio da mensagem pela tela do chamado (fetch), sem recarregar a página."""
+    ticket = await _aowned_ticket(await request.auser(), ticket_id)
+    form = TicketMessageForm(request.POST)
+    if not form.is_valid():
+        return JsonResponse({"errors": form.errors}, status=400)
+
+    msg = form.save(commit=False)
+    msg.ticket = ticket
+    msg.sender_role = TicketMessage.SENDER_CLIENT
+    await msg.asave()
+    return JsonResponse(_message_payload(msg), status=201)
+
+
+def _is_staff(user):
+    return user.is_active and user.is_staff
+
+
+STAFF_QUEUE_LIMIT = 100
+
+
+def _staff_queue_qs():
+    return Ticket.objects.select_related("owner", "machine__model").order_by("-updated_at")
+
+
+def _staff_row(ticket):
+    return {
+        "id": ticket.id,
+        "status": ticket.status,
+        "open": ticket.is_open,
+        "html": render_to_string("assistencia/_staff_queue_row.html", {"t": ticket}),
+    }
+
+
+@user_passes_test(_is_staff)
+@require_GET
+async def staff_queue(request):
+    """Fila da equipe: chamados abertos, atualizada pelo ``staff_queue_updates``."""
+    tickets = [
+        t
+        async for t in _staff_queue_qs().exclude(status__in=Ticket.CLOSED_STATUSES)[:STAFF_QUEUE_LIMIT]
+    ]
+    last_message = await TicketMessage.objects.order_by("-id").values_list("id", flat=True).afirst()
+    ctx = {
+        "tickets": tickets,
+        "since": timezone.now().isoformat(),
+        "after": last_message or 0,
+    }
+    # context processors (usuário, SiteSettings) podem consultar o banco
+    return await sync_to_async(render)(request, "assistencia/staff_queue.html", ctx)
+
+
+@user_passes_test(_is_staff)
+@require_GET
+async def staff_queue_updates(request):
+    """
+    Long-poll da fila: chamados alterados depois de ``since`` ou com
+    mensagem do cliente depois de ``after`` (Ticket.updated_at não muda
+    quando só chega mensagem).
+
+    Os alterados vêm do mais antigo para o mais novo, no máximo
+    STAFF_QUEUE_LIMIT por resposta, e o cursor (``since``, ``since_id``)
+    para no último entregue: se a equipe mexeu em 200 chamados, o resto
+    chega no poll seguinte.
+    """
+    since = parse_datetime(request.GET.get("since") or "") or timezone.now()
+    since_id = parse_cursor(request.GET.get("since_id")) or 0
+    after = parse_cursor(request.GET.get("after")) or 0
+
+    async def check():
+        # (updated_at, id): vários chamados podem ter o mesmo updated_at (update em massa)
+        page = [
+            t
+            async for t in _staff_queue_qs()
+            .filter(Q(updated_at__gt=since) | Q(updated_at=since, id__gt=since_id))
+            .order_by("updated_at", "id")[:STAFF_QUEUE_LIMIT]
+        ]
+        changed = {t.id: t for t in page}
+        recent = [
+            m
+            async for m in TicketMessage.objects.filter(id__gt=after)
+            .order_by("id")
+            .values_list("id", "ticket_id", "sender_role")[:STAFF_QUEUE_LIMIT]
+        ]
+        waiting = {ticket_id for _, ticket_id, role in recent if role == TicketMessage.SENDER_CLIENT}
+        missing = waiting - changed.keys()
+        if missing:
+            changed.update({t.id: t async for t in _staff_queue_qs().filter(id__in=missing)})
+        return (page, changed, recent, waiting) if changed or recent else None
+
+    page, changed, recent, waiting = await live.wait_for(check, [live.STAFF_TOPIC]) or ([], {}, [], set())
+    rows = []
+    for ticket in sorted(changed.values(), key=lambda t: t.updated_at):
+        row = _staff_row(ticket)
+        row["new_message"] = ticket.id in waiting
+        rows.append(row)
+
+    return JsonResponse(
+        {
+            "since": (page[-1].updated_at if page else since).isoformat(),
+            "since_id": page[-1].id if page else since_id,
+            "after": recent[-1][0] if recent else after,
+            "tickets": rows,
+        }
+    )
+
+
 @login_required
 def manuals_list(request):
-    manuals = Manual.objects.filter(active=True).order_by("model__name", "title")
+    # "text" (extraído do PDF) pode ter centenas de KB: fica fora da listagem
+    manuals = (
+        Manual.objects.filter(active=True)
+        .select_related("model")
+        .defer("text")
+        .order_by("model__name", "title")
+    )
     return render(request, "assistencia/manuals_list.html", {"manuals": manuals})
 
 
+@login_required
+@require_safe
+def manual_file(request, manual_id):
+    manual = get_object_or_404(Manual.objects.defer("text"), id=manual_id, active=True)
+    if not manual.file:
+        raise Http404("Manual sem arquivo.")
+    try:
+        return serve_file(request, manual.file)
+    except FileNotFoundError:
+        raise Http404("Arquivo do manual não encontrado.")
+
+
 @login_required
 def part_requests_list(request):
-    prs = PartRequest.objects.filter(owner=request.user).order_by("-id")
+    status = _choice_filter(request, "status", PartRequest.STATUS_CHOICES)
+
+    qs = PartRequest.objects.filter(owner=request.user).select_related("machine__model")
+    if status:
+        qs = qs.filter(status=status)
+
+    page = keyset_paginate(
+        qs,
+        cursor=parse_cursor(request.GET.get("after")),
+        per_page=LIST_PAGE_SIZE,
+        params={"status": status},
+    )
+
     return render(
         request,
         "assistencia/part_requests_list.html",
-        {"part_requests": prs},
+        {
+            "part_requests": page,
+            "page": page,
+            "status": status,
+            "status_choices": PartRequest.STATUS_CHOICES,
+        },
     )
 
 
+def _posted_machine(request):
+    machine_id = request.POST.get("machine") or request.GET.get("machine")
+    if not machine_id or not str(machine_id).isdigit():
+        return None
+    return Machine.objects.filter(id=machine_id, owner=request.user).first()
+
+
 @login_required
 def part_request_create(request):
     form = PartRequestForm(request.POST or None, user=request.user)
-    item_form = PartRequestItemForm(request.POST or None)
+    item_formset = PartRequestItemFormSet(
+        request.POST or None,
+        machine=_posted_machine(request),
+        prefix="items",
+    )
 
+    # valida tudo antes de gravar: cabeçalho e itens entram juntos ou nada entra.
+    # Os dois são validados sempre, para os erros dos itens aparecerem junto.
     if request.method == "POST":
-        if form.is_valid():
-            pr = form.save(commit=False)
-            pr.owner = request.user
-            pr.save()
-
-            if item_form.is_valid() and item_form.cleaned_data.get("part"):
-                item = item_form.save(commit=False)
-                item.part_request = pr
-                item.save()
+        header_ok = form.is_valid()
+        items_ok = item_formset.is_valid()
+        if header_ok and items_ok:
+            with transaction.atomic():
+                pr = form.save(commit=False)
+                pr.owner = request.user
+                pr.save()
+
+                for item in item_formset.items:
+                    item.part_request = pr
+                PartRequestItem.objects.bulk_create(item_formset.items)
 
             messages.success(request, f"Solicitação de peça #{pr.id} criada.")
             return redirect("assistencia:part_requests_list")
@@ -188,5 +557,41 @@ def part_request_create(request):
     return render(
         request,
         "assistencia/part_request_create.html",
-        {"form": form, "item_form": item_form},
-    )
\ No newline at end of file
+        {"form": form, "item_formset": item_formset},
+    )
+
+
+@login_required
+@require_GET
+def part_lookup(request):
+    """
+    Autocomplete de peças: prefixo de SKU ou de palavra do nome, limitado
+    aos modelos compatíveis com a máquina escolhida, paginado por SKU.
+    """
+    machine = _posted_machine(request)
+    parts, next_cursor = lookup_parts(
+        q=request.GET.get("q", ""),
+        machine_model_id=machine.model_id if machine else None,
+        after_sku=request.GET.get("after") or None,
+    )
+    return JsonResponse(
+        {
+            "results": [{"id": p.id, "sku": p.sku, "name": p.name, "label": str(p)} for p in parts],
+            "next": next_cursor,
+        }
+    )
+
+
+@login_required
+def search(request):
+    q = request.GET.get("q", "").strip()
+    results = fts.search(q, kinds=fts.PORTAL_KINDS, owner_id=request.user.id, active_only=True) if q else []
+
+    # manuais precisam do arquivo/link: uma consulta para todos os resultados
+    manual_ids = [r["object_id"] for r in results if r["kind"] == fts.KIND_MANUAL]
+    manuals = Manual.objects.defer("text").in_bulk(manual_ids) if manual_ids else {}
+    for r in results:
+        if r["kind"] == fts.KIND_MANUAL:
+            r["manual"] = manuals.get(r["object_id"])
+
+    return render(request, "assistencia/search.html", {"q": q, "results": results})
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.contrib import admin
+from django.template.response import TemplateResponse
+
 from .models import Machine, SiteSettings
+from .perf import collect_stats
 
 
 @admin.register(Machine)
@@ -16,4 +20,15 @@ class SiteSettingsAdmin(admin.ModelAdmin):
 
     def has_add_permission(self, request):
         # impede criar vários registros
-        return False
\ No newline at end of file
+        return False
+
+
+def perf_stats_view(request):
+    """Página do admin com p50/p95/p99 por URL (core/perf.py)."""
+    ctx = {
+        **admin.site.each_context(request),
+        "title": "Desempenho por URL",
+        "enabled": getattr(settings, "PERF_INSTRUMENTATION", False),
+        "rows": collect_stats(),
+    }
+    return TemplateResponse(request, "admin/perf_stats.html", ctx)
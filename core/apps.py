@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.conf import settings
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        if getattr(settings, "PERF_INSTRUMENTATION", False):
+            from .perf import install_query_wrapper
+
+            install_query_wrapper()
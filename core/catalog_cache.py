@@ -0,0 +1,59 @@
+"""
+Versão do catálogo público (máquinas + configurações do site).
+
+Qualquer save/delete de ``Machine`` ou ``SiteSettings`` troca a versão
+(core/signals.py). Ela entra no ETag das páginas, nas chaves dos fragmentos
+de template e no cache dos objetos, então nada precisa ser apagado: o que é
+antigo simplesmente deixa de ser usado.
+
+O rodapé das páginas vem do SiteSettings, que cada worker guarda por até
+SITE_SETTINGS_CACHE_TTL segundos. Por isso o ETag também leva a versão do
+SiteSettings com que o worker renderizou (core/views.py).
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Machine
+
+VERSION_KEY = "core:catalog:version"
+
+
+def _timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 3600)
+
+
+def _new_state():
+    # segundos inteiros: é a resolução do Last-Modified
+    return uuid.uuid4().hex, int(time.time())
+
+
+def catalog_state():
+    """(versão, timestamp da última mudança)."""
+    state = cache.get(VERSION_KEY)
+    if state is None:
+        state = _new_state()
+        if not cache.add(VERSION_KEY, state, timeout=None):
+            state = cache.get(VERSION_KEY, state)
+    return state
+
+
+def catalog_version():
+    return catalog_state()[0]
+
+
+def bump_catalog_version():
+    cache.set(VERSION_KEY, _new_state(), timeout=None)
+
+
+def get_machine(slug, version=None):
+    """Machine pelo slug, guardada no cache enquanto o catálogo não mudar."""
+    key = f"core:machine:{version or catalog_version()}:{slug}"
+    machine = cache.get(key)
+    if machine is None:
+        machine = Machine.objects.filter(slug=slug).first()
+        if machine is not None:
+            cache.set(key, machine, _timeout())
+    return machine
@@ -0,0 +1,40 @@
+"""
+Perfil de produção do SQLite.
+
+Ligado com ``SQLITE_PRODUCTION = True`` (ou GIFTEX_SQLITE_PRODUCTION=1 no
+ambiente). Os PRAGMAs são aplicados em cada conexão nova pelo signal
+``connection_created`` (core/signals.py); com ``CONN_MAX_AGE`` isso acontece
+uma vez por worker, não por request.
+"""
+from django.conf import settings
+
+PRODUCTION_PRAGMAS = {
+    # leitores não bloqueiam o escritor (e vice-versa)
+    "journal_mode": "WAL",
+    # com WAL, NORMAL só perde a última transação numa queda de energia
+    "synchronous": "NORMAL",
+    # espera o lock de escrita em vez de falhar com "database is locked"
+    "busy_timeout": 5000,
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -20000,  # negativo = KiB (~20 MB por conexão)
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+def production_enabled():
+    return getattr(settings, "SQLITE_PRODUCTION", False)
+
+
+def pragma_statements(pragmas=None):
+    pragmas = PRODUCTION_PRAGMAS if pragmas is None else pragmas
+    return [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+
+def configure_connection(connection):
+    if connection.vendor != "sqlite" or not production_enabled():
+        return
+    pragmas = {**PRODUCTION_PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+    with connection.cursor() as cursor:
+        for statement in pragma_statements(pragmas):
+            cursor.execute(statement)
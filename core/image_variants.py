@@ -0,0 +1,169 @@
+"""
+Variantes responsivas de imagens do site (foto das máquinas e imagens
+estáticas como o hero).
+
+Cada imagem vira um conjunto fixo de larguras em WebP mais um formato de
+fallback (JPEG, ou PNG quando há transparência). O resultado é descrito num
+"manifesto" (dict) guardado em ``Machine.image_variants`` ou, para arquivos
+estáticos, num ``.json`` ao lado das variantes; a template tag
+``{% load responsive_images %}`` monta o ``<picture>`` com ``srcset``/``sizes``
+a partir dele, sem tocar no disco a cada request.
+"""
+import json
+import logging
+from io import BytesIO
+from pathlib import Path, PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (320, 640, 960, 1280)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def widths():
+    return tuple(getattr(settings, "CORE_IMAGE_VARIANT_WIDTHS", DEFAULT_WIDTHS))
+
+
+def target_widths(original_width):
+    """Larguras menores que o original, mais o próprio original (sem ampliar)."""
+    result = [w for w in widths() if w < original_width]
+    if original_width <= max(widths()):
+        result.append(original_width)
+    return result or [max(widths())]
+
+
+def _has_alpha(image):
+    return image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+
+
+def _encode(image, width, fmt):
+    img = image.copy()
+    if img.width > width:
+        img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+    buf = BytesIO()
+    if fmt == "webp":
+        img.save(buf, format="WEBP", quality=WEBP_QUALITY, method=6)
+    elif fmt == "png":
+        img.save(buf, format="PNG", optimize=True)
+    else:
+        img.convert("RGB").save(buf, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def render_variants(fp, stem):
+    """
+    Gera as variantes de uma imagem aberta em ``fp``.
+
+    Devolve ``(manifesto, arquivos)``: ``arquivos`` é uma lista de
+    (nome relativo, bytes) e o manifesto referencia esses nomes.
+    """
+    with Image.open(fp) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    alpha = _has_alpha(image)
+    image = image.convert("RGBA" if alpha else "RGB")
+    fallback = "png" if alpha else "jpg"
+
+    manifest = {
+        "width": image.width,
+        "height": image.height,
+        "fallback_type": "image/png" if alpha else "image/jpeg",
+        "webp": [],
+        "fallback": [],
+    }
+    files = []
+    for width in target_widths(image.width):
+        for fmt, key in (("webp", "webp"), (fallback, "fallback")):
+            name = f"{stem}-{width}w.{fmt}"
+            files.append((name, _encode(image, width, fmt)))
+            manifest[key].append([width, name])
+    return manifest, files
+
+
+# ----------------------------------------------------------------------
+# Machine.image (MEDIA)
+# ----------------------------------------------------------------------
+
+def _variants_dir(name):
+    path = PurePosixPath(name)
+    return path.parent / "variants", path.stem
+
+
+def delete_variants(manifest):
+    for key in ("webp", "fallback"):
+        for _, name in (manifest or {}).get(key, []):
+            try:
+                default_storage.delete(name)
+            except OSError:
+                pass
+
+
+def build_machine_variants(machine):
+    """
+    (Re)gera as variantes da foto da máquina e grava o manifesto com
+    ``update()`` (sem disparar os signals de novo). Devolve o manifesto.
+    """
+    from .models import Machine
+
+    old = machine.image_variants or {}
+    manifest = {}
+    if machine.image:
+        directory, stem = _variants_dir(machine.image.name)
+        try:
+            with machine.image.open("rb") as f:
+                manifest, files = render_variants(f, str(directory / stem))
+        except (OSError, UnidentifiedImageError) as exc:
+            logger.warning("Falha ao gerar variantes da máquina #%s: %s", machine.pk, exc)
+            return old
+
+        for name, content in files:
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(content))
+        manifest["source"] = machine.image.name
+
+    # arquivos da foto anterior que não foram sobrescritos
+    keep = {name for key in ("webp", "fallback") for _, name in manifest.get(key, [])}
+    delete_variants({k: [v for v in old.get(k, []) if v[1] not in keep] for k in ("webp", "fallback")})
+
+    Machine.objects.filter(pk=machine.pk).update(image_variants=manifest)
+    machine.image_variants = manifest
+    return manifest
+
+
+def needs_variants(machine):
+    source = (machine.image_variants or {}).get("source")
+    return (machine.image.name or None) != source
+
+
+# ----------------------------------------------------------------------
+# Imagens estáticas (STATICFILES_DIRS)
+# ----------------------------------------------------------------------
+
+def static_manifest_path(path):
+    directory, stem = _variants_dir(path)
+    return str(directory / f"{stem}.json")
+
+
+def build_static_variants(path, static_dir):
+    """
+    Gera as variantes de ``static_dir/path`` em ``static_dir/<pasta>/variants/``
+    e o manifesto ``.json`` lido pela template tag.
+    """
+    root = Path(static_dir)
+    directory, stem = _variants_dir(path)
+    with open(root / path, "rb") as f:
+        manifest, files = render_variants(f, str(directory / stem))
+    manifest["source"] = path
+
+    (root / directory).mkdir(parents=True, exist_ok=True)
+    for name, content in files:
+        (root / name).write_bytes(content)
+    (root / static_manifest_path(path)).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    return manifest
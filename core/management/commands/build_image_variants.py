@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog_cache import bump_catalog_version
+from core.image_variants import build_machine_variants, build_static_variants, needs_variants
+from core.models import Machine
+
+
+class Command(BaseCommand):
+    help = (
+        "Gera as variantes responsivas (WebP + fallback) das fotos das máquinas "
+        "e das imagens estáticas de CORE_STATIC_RESPONSIVE_IMAGES."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regera mesmo o que já está atualizado.")
+        parser.add_argument("--skip-static", action="store_true")
+
+    def handle(self, *args, **options):
+        total = 0
+        for machine in Machine.objects.exclude(image="").exclude(image__isnull=True).iterator():
+            if options["force"] or needs_variants(machine):
+                manifest = build_machine_variants(machine)
+                widths = [w for w, _ in manifest.get("webp", [])]
+                self.stdout.write(f"máquina #{machine.pk} {machine.image.name}: {widths}")
+                total += 1
+        if total:
+            bump_catalog_version()
+
+        if not options["skip_static"]:
+            dirs = getattr(settings, "STATICFILES_DIRS", [])
+            if not dirs:
+                raise CommandError("STATICFILES_DIRS vazio: não há onde gravar as variantes estáticas.")
+            for path in getattr(settings, "CORE_STATIC_RESPONSIVE_IMAGES", []):
+                manifest = build_static_variants(path, dirs[0])
+                widths = [w for w, _ in manifest["webp"]]
+                self.stdout.write(f"static {path}: {widths}")
+                total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{total} imagem(ns) processada(s)."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_sitesettings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='machine',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
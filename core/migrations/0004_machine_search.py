@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-18 08:55
+
+import unicodedata
+
+from django.db import migrations, models
+
+# cópia congelada de core/search.py (a migration não importa código do app)
+CREATE_SQL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_machine_search USING fts5("
+    "name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+FILL_SQL = "INSERT INTO core_machine_search (rowid, name, body) SELECT id, name, search_text FROM core_machine"
+
+
+def _normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.casefold().split())
+
+
+def fill_search_text(apps, schema_editor):
+    Machine = apps.get_model("core", "Machine")
+    db = schema_editor.connection.alias
+    machines = list(Machine.objects.using(db).all())
+    for m in machines:
+        m.search_text = _normalize(" ".join([m.name, m.short_description, m.capacity, m.description]))
+    Machine.objects.using(db).bulk_update(machines, ["search_text"], batch_size=500)
+    if schema_editor.connection.vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS core_machine_search")
+            cursor.execute(CREATE_SQL)
+            cursor.execute(FILL_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS core_machine_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_machine_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='machine',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_text, drop_search_index),
+    ]
@@ -14,6 +14,10 @@ class Machine(models.Model):
     warranty = models.CharField(max_length=120, blank=True)
 
     image = models.ImageField(upload_to="machines/", blank=True, null=True)
+    # larguras geradas em WebP + fallback (core/image_variants.py)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # nome/descrições/capacidade sem acento e em minúsculas (core/search.py)
+    search_text = models.TextField(blank=True, editable=False)
     is_featured = models.BooleanField(default=False)
     order = models.PositiveIntegerField(default=0)
 
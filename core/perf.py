@@ -0,0 +1,271 @@
+"""
+Instrumentação por request (liga com PERF_INSTRUMENTATION = True).
+
+Para cada request: tempo total, nº de queries e tempo no banco (um
+``execute_wrapper`` em cada conexão), tempo de render dos templates e
+tamanho da resposta. Sai num header ``Server-Timing`` (aparece no DevTools)
+e numa linha JSON no logger ``giftex.perf``. Queries repetidas no mesmo
+request (o padrão N+1) e queries lentas geram WARNING.
+
+Cada worker guarda as últimas amostras por nome de URL e publica um resumo
+no cache a cada PERF_FLUSH_SECONDS; a página do admin (/admin/perf/) junta os
+workers e mostra p50/p95/p99.
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("giftex.perf")
+
+WORKERS_KEY = "core:perf:workers"
+WORKER_KEY = "core:perf:worker:{}"
+
+# [ms acumulados, profundidade] do request atual (includes chamam render aninhado)
+_template_timer = ContextVar("perf_template_timer", default=None)
+_template_patch_lock = threading.Lock()
+_template_patched = False
+
+# QueryRecorder do request atual. ContextVar e não execute_wrapper por
+# request: no ASGI as queries rodam nas threads do sync_to_async, com outras
+# conexões, mas o contexto vai junto
+_query_recorder = ContextVar("perf_query_recorder", default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _install_template_timer():
+    """Envolve Template.render uma vez por processo (só com a instrumentação ligada)."""
+    global _template_patched
+    with _template_patch_lock:
+        if _template_patched:
+            return
+        from django.template.base import Template
+
+        original = Template.render
+
+        def render(self, context):
+            timer = _template_timer.get()
+            if timer is None:
+                return original(self, context)
+            timer[1] += 1
+            start = time.perf_counter()
+            try:
+                return original(self, context)
+            finally:
+                timer[1] -= 1
+                if timer[1] == 0:
+                    timer[0] += (time.perf_counter() - start) * 1000
+
+        Template.render = render
+        _template_patched = True
+
+
+def _record_query(execute, sql, params, many, context):
+    recorder = _query_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def _install_query_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def install_query_wrapper():
+    """
+    Põe o ``_record_query`` nas conexões desta thread e nas que forem
+    abertas depois (em qualquer thread). Chamado no ready() do app, antes de
+    qualquer conexão, e de novo pelo middleware.
+    """
+    connection_created.connect(_install_query_wrapper, dispatch_uid="core_perf_query_wrapper")
+    for conn in connections.all(initialized_only=True):
+        _install_query_wrapper(conn)
+
+
+class QueryRecorder:
+    def __init__(self, slow_ms):
+        self.slow_ms = slow_ms
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = Counter()
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.total_ms += ms
+            # sql ainda com os placeholders: N+1 vira o mesmo texto repetido
+            self.statements[sql] += 1
+            if ms >= self.slow_ms:
+                self.slow.append((round(ms, 1), sql))
+
+    def duplicates(self, threshold):
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+def percentile(sorted_values, pct):
+    # nearest-rank
+    if not sorted_values:
+        return None
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+class PerfStats:
+    """Amostras recentes por nome de URL, deste processo."""
+
+    def __init__(self, size):
+        self.size = size
+        self.lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=self.size))
+        self.flushed_at = 0.0
+
+    def record(self, name, ms, queries):
+        with self.lock:
+            self.samples[name].append((round(ms, 2), queries))
+
+    def flush_if_due(self, interval):
+        now = time.monotonic()
+        if now - self.flushed_at < interval:
+            return
+        self.flushed_at = now
+        with self.lock:
+            snapshot = {name: list(values) for name, values in self.samples.items()}
+        key = WORKER_KEY.format(os.getpid())
+        cache.set(key, snapshot, timeout=max(int(interval) * 30, 300))
+        workers = cache.get(WORKERS_KEY) or []
+        if key not in workers:
+            cache.set(WORKERS_KEY, [*workers[-63:], key], timeout=None)
+
+
+def collect_stats():
+    """Junta as amostras publicadas pelos workers: uma linha por URL."""
+    merged = defaultdict(list)
+    for key in cache.get(WORKERS_KEY) or []:
+        for name, values in (cache.get(key) or {}).items():
+            merged[name].extend(values)
+
+    rows = []
+    for name, values in merged.items():
+        durations = sorted(ms for ms, _ in values)
+        rows.append({
+            "name": name,
+            "count": len(values),
+            "p50": percentile(durations, 50),
+            "p95": percentile(durations, 95),
+            "p99": percentile(durations, 99),
+            "max": durations[-1],
+            "avg_queries": round(sum(q for _, q in values) / len(values), 1),
+        })
+    rows.sort(key=lambda r: r["p95"], reverse=True)
+    return rows
+
+
+class PerfMiddleware:
+    """
+    Deve ser o primeiro do MIDDLEWARE para medir o request inteiro. Funciona
+    no WSGI e no ASGI: as views assíncronas (long-poll) não são adaptadas para
+    síncrono nem prendem uma thread enquanto esperam.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not _setting("PERF_INSTRUMENTATION", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.slow_ms = _setting("PERF_SLOW_QUERY_MS", 100)
+        self.duplicate_threshold = _setting("PERF_DUPLICATE_QUERY_THRESHOLD", 5)
+        self.flush_seconds = _setting("PERF_FLUSH_SECONDS", 10)
+        self.stats = PerfStats(_setting("PERF_SAMPLE_SIZE", 500))
+        _install_template_timer()
+        install_query_wrapper()
+
+    def _start(self):
+        recorder, timer = QueryRecorder(self.slow_ms), [0.0, 0]
+        tokens = (_query_recorder.set(recorder), _template_timer.set(timer))
+        return recorder, timer, tokens, time.perf_counter()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder, timer, tokens, start = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_recorder.reset(tokens[0])
+            _template_timer.reset(tokens[1])
+        self._report(request, response, recorder, timer, start)
+        self.stats.flush_if_due(self.flush_seconds)
+        return response
+
+    async def __acall__(self, request):
+        recorder, timer, tokens, start = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_recorder.reset(tokens[0])
+            _template_timer.reset(tokens[1])
+        self._report(request, response, recorder, timer, start)
+        if time.monotonic() - self.stats.flushed_at >= self.flush_seconds:
+            # grava no cache: fora do event loop
+            await sync_to_async(self.stats.flush_if_due)(self.flush_seconds)
+        return response
+
+    def _report(self, request, response, recorder, timer, start):
+        total_ms = (time.perf_counter() - start) * 1000
+
+        match = getattr(request, "resolver_match", None)
+        name = (match.view_name if match else None) or "<sem rota>"
+        size = None if response.streaming else len(response.content)
+        duplicates = recorder.duplicates(self.duplicate_threshold)
+
+        timings = [
+            f"total;dur={total_ms:.1f}",
+            f'db;dur={recorder.total_ms:.1f};desc="{recorder.count} queries"',
+            f"tpl;dur={timer[0]:.1f}",
+        ]
+        if duplicates:
+            timings.append(f'dup;desc="N+1: {duplicates[0][1]}x"')
+        response["Server-Timing"] = ", ".join(timings)
+
+        line = {
+            "method": request.method,
+            "path": request.path,
+            "view": name,
+            "status": response.status_code,
+            "ms": round(total_ms, 1),
+            "db_ms": round(recorder.total_ms, 1),
+            "queries": recorder.count,
+            "tpl_ms": round(timer[0], 1),
+            "bytes": size,
+        }
+        logger.info(json.dumps(line, ensure_ascii=False))
+        for sql, n in duplicates:
+            logger.warning("N+1 em %s: %sx %s", name, n, sql[:300])
+        for ms, sql in recorder.slow:
+            logger.warning("query lenta em %s: %sms %s", name, ms, sql[:300])
+
+        self.stats.record(name, total_ms, recorder.count)
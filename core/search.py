@@ -0,0 +1,94 @@
+"""
+Busca do catálogo público de máquinas.
+
+``Machine.search_text`` guarda nome, descrições e capacidade sem acento e em
+minúsculas (preenchido no pre_save, core/signals.py). No SQLite esse texto
+alimenta a tabela FTS5 ``core_machine_search`` (rowid = id da máquina), com
+índice de prefixo: "maq" encontra "Máquina" sem varrer a tabela, e o bm25
+ordena por relevância com o nome pesando mais. Em outros bancos a busca cai
+para ``search_text LIKE`` com os termos já normalizados.
+"""
+import re
+import unicodedata
+
+from django.db import DatabaseError, connection
+
+TABLE = "core_machine_search"
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "name, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+# nome pesa mais que o texto completo no bm25
+RANK_SQL = f"bm25({TABLE}, 10.0, 1.0)"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def enabled():
+    return connection.vendor == "sqlite"
+
+
+def normalize(text):
+    """Minúsculas, sem acentos e com espaços simples: "Máquina  X" -> "maquina x"."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.casefold().split())
+
+
+def document(machine):
+    return normalize(" ".join([machine.name, machine.short_description, machine.capacity, machine.description]))
+
+
+def index_machine(machine):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [machine.pk])
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, name, body) VALUES (%s, %s, %s)",
+            [machine.pk, normalize(machine.name), machine.search_text],
+        )
+
+
+def unindex_machine(machine):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [machine.pk])
+
+
+def rebuild_index():
+    """Recria o índice a partir de ``search_text`` (o tokenizer tira os acentos do nome)."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(CREATE_SQL)
+        cursor.execute(f"INSERT INTO {TABLE} (rowid, name, body) SELECT id, name, search_text FROM core_machine")
+
+
+def terms(q):
+    return _TOKEN_RE.findall(normalize(q))[:8]
+
+
+def search_machines(q, queryset):
+    """
+    Máquinas de ``queryset`` que batem com todos os termos (como prefixo),
+    em ordem de relevância.
+    """
+    tokens = terms(q)
+    if not tokens:
+        return list(queryset)
+
+    if enabled():
+        match = " ".join(f'"{t}"*' for t in tokens)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY {RANK_SQL}", [match])
+                ids = [row[0] for row in cursor.fetchall()]
+        except DatabaseError:
+            # tabela ainda não criada (migrate pendente)
+            ids = None
+        if ids is not None:
+            machines = queryset.in_bulk(ids)
+            return [machines[pk] for pk in ids if pk in machines]
+
+    for token in tokens:
+        queryset = queryset.filter(search_text__contains=token)
+    return list(queryset)
@@ -0,0 +1,93 @@
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+
+from .models import SiteSettings
+
+VERSION_KEY = "core:site_settings:version"
+
+FIELDS = (
+    "site_name",
+    "site_tagline",
+    "whatsapp_number",
+    "contact_phone",
+    "contact_email",
+    "address_text",
+    "google_maps_embed_url",
+)
+
+# cópia em memória por processo (cada worker do gunicorn tem a sua)
+_local = {"values": None, "version": None, "checked_at": 0.0}
+
+
+def _ttl():
+    return getattr(settings, "SITE_SETTINGS_CACHE_TTL", 10)
+
+
+def _load():
+    row = SiteSettings.objects.filter(pk=1).values(*FIELDS).first()
+    return row or {}
+
+
+def get_site_settings():
+    """
+    Valores do SiteSettings sem ir ao banco a cada request.
+
+    Dentro do TTL a cópia local é devolvida direto. Vencido o TTL, só a
+    chave de versão é lida do cache compartilhado; o banco é consultado
+    apenas quando alguém salvou/apagou o SiteSettings nesse meio tempo.
+    """
+    now = time.monotonic()
+    if _local["values"] is not None and now - _local["checked_at"] < _ttl():
+        return _local["values"]
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+
+    if _local["values"] is None or _local["version"] != version:
+        _local["values"] = _load()
+        _local["version"] = version
+    _local["checked_at"] = now
+    return _local["values"]
+
+
+def site_settings_version():
+    """
+    Versão da cópia que este worker está usando. Entra no ETag do catálogo:
+    um worker que ainda está no TTL com o SiteSettings antigo não pode
+    responder 304 para o ETag das páginas novas, nem guardar a página velha
+    sob ele.
+    """
+    try:
+        get_site_settings()
+    except DatabaseError:
+        return ""
+    return _local["version"] or ""
+
+
+def invalidate_site_settings():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _local["values"] = None
+
+
+def site_settings_or_defaults():
+    try:
+        values = get_site_settings()
+    except DatabaseError:
+        # fallback caso tabela ainda não exista
+        values = {}
+
+    return {
+        "SITE_NAME": values.get("site_name") or settings.SITE_NAME,
+        "SITE_TAGLINE": values.get("site_tagline") or settings.SITE_TAGLINE,
+        "WHATSAPP_NUMBER": values.get("whatsapp_number") or settings.WHATSAPP_NUMBER,
+        "CONTACT_EMAIL": values.get("contact_email") or settings.CONTACT_EMAIL,
+        "ADDRESS_TEXT": values.get("address_text") or settings.ADDRESS_TEXT,
+        "GOOGLE_MAPS_EMBED_URL": values.get("google_maps_embed_url") or settings.GOOGLE_MAPS_EMBED_URL,
+    }
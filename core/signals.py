@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from . import search
+from .catalog_cache import bump_catalog_version
+from .db import configure_connection
+from .image_variants import build_machine_variants, delete_variants, needs_variants
+from .models import Machine, SiteSettings
+from .settings_cache import invalidate_site_settings
+
+
+@receiver(post_save, sender=SiteSettings, dispatch_uid="core_site_settings_saved")
+@receiver(post_delete, sender=SiteSettings, dispatch_uid="core_site_settings_deleted")
+def site_settings_changed(sender, **kwargs):
+    invalidate_site_settings()
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Machine, dispatch_uid="core_machine_saved")
+@receiver(post_delete, sender=Machine, dispatch_uid="core_machine_deleted")
+def machine_changed(sender, **kwargs):
+    # depois do commit: senão um request concorrente poderia gravar no cache
+    # os dados antigos já sob a versão nova
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(pre_save, sender=Machine, dispatch_uid="core_machine_search_text")
+def machine_search_text(sender, instance, **kwargs):
+    instance.search_text = search.document(instance)
+
+
+@receiver(post_save, sender=Machine, dispatch_uid="core_machine_search_index")
+def machine_search_index(sender, instance, **kwargs):
+    if search.enabled():
+        search.index_machine(instance)
+
+
+@receiver(post_delete, sender=Machine, dispatch_uid="core_machine_search_unindex")
+def machine_search_unindex(sender, instance, **kwargs):
+    if search.enabled():
+        search.unindex_machine(instance)
+
+
+@receiver(post_save, sender=Machine, dispatch_uid="core_machine_image_variants")
+def machine_image_variants(sender, instance, **kwargs):
+    if kwargs.get("raw") or not needs_variants(instance):
+        return
+
+    def build():
+        build_machine_variants(instance)
+        bump_catalog_version()
+
+    transaction.on_commit(build)
+
+
+@receiver(post_delete, sender=Machine, dispatch_uid="core_machine_image_variants_deleted")
+def machine_image_variants_deleted(sender, instance, **kwargs):
+    transaction.on_commit(lambda: delete_variants(instance.image_variants))
+
+
+# deploy (migrate) pode trazer templates novos: ETags antigos deixam de valer
+@receiver(post_migrate, dispatch_uid="core_catalog_migrated")
+def catalog_migrated(sender, **kwargs):
+    bump_catalog_version()
+
+
+@receiver(connection_created, dispatch_uid="core_sqlite_pragmas")
+def sqlite_connection_created(sender, connection, **kwargs):
+    configure_connection(connection)
@@ -0,0 +1,210 @@
+"""
+Arquivos estáticos para produção.
+
+``CompressedManifestStaticFilesStorage``: no ``collectstatic`` grava os nomes
+com hash do conteúdo (``app.3f2a9c.css``) e, para os tipos texto/SVG, irmãos
+pré-comprimidos ``.gz`` e ``.br`` (o pacote ``brotli`` vem do
+requirements.txt; num ambiente sem ele só saem os ``.gz``).
+
+``StaticFilesMiddleware``: para deploy só com gunicorn (sem nginx na frente).
+Serve ``STATIC_URL`` direto do ``STATIC_ROOT``, escolhendo br/gzip pelo
+``Accept-Encoding``; arquivos com hash vão com cache de um ano ``immutable``.
+"""
+import gzip
+import json
+import mimetypes
+import os
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # está no requirements.txt; sem ele só há .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml", ".ico", ".ttf", ".otf", ".eot",
+}
+MIN_COMPRESS_SIZE = 256
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+DEFAULT_MAX_AGE = 60
+
+# (sufixo, Content-Encoding) em ordem de preferência
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _compress(data, encoding):
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, quality=11)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        for name in sorted(set(self.hashed_files.values())):
+            for compressed in self.compress_file(name):
+                yield name, compressed, True
+
+    def compress_file(self, name):
+        """Grava ``name.gz``/``name.br`` quando compensa. Devolve os nomes gravados."""
+        if Path(name).suffix.lower() not in COMPRESSIBLE_EXTENSIONS:
+            return []
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return []
+
+        written = []
+        for encoding, suffix in ENCODINGS:
+            if encoding == "br" and brotli is None:
+                continue
+            compressed = _compress(data, encoding)
+            # menos de 5% de ganho não paga a descompressão no cliente
+            if len(compressed) >= len(data) * 0.95:
+                continue
+            target = name + suffix
+            if self.exists(target):
+                self.delete(target)
+            with open(self.path(target), "wb") as out:
+                out.write(compressed)
+            written.append(target)
+        return written
+
+
+class _StaticFile:
+    __slots__ = ("path", "content_type", "variants", "immutable")
+
+    def __init__(self, path, content_type, variants, immutable):
+        self.path = path
+        self.content_type = content_type
+        self.variants = variants  # {encoding: (caminho, tamanho, etag, mtime)}
+        self.immutable = immutable
+
+
+def _stat(path):
+    st = os.stat(path)
+    return path, st.st_size, f'"{int(st.st_mtime)}-{st.st_size:x}"', st.st_mtime
+
+
+def build_index(root):
+    """url relativa -> _StaticFile, montado uma vez por processo."""
+    root = Path(root)
+    hashed = set()
+    manifest = root / ManifestStaticFilesStorage.manifest_name
+    if manifest.exists():
+        hashed = set(json.loads(manifest.read_text(encoding="utf-8")).get("paths", {}).values())
+
+    index = {}
+    if not root.is_dir():
+        return index
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(suffixes):
+                continue
+            full = os.path.join(dirpath, filename)
+            rel = Path(full).relative_to(root).as_posix()
+            variants = {"identity": _stat(full)}
+            for encoding, suffix in ENCODINGS:
+                if os.path.exists(full + suffix):
+                    variants[encoding] = _stat(full + suffix)
+            content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            index[rel] = _StaticFile(full, content_type, variants, rel in hashed)
+    return index
+
+
+def _accepted(header):
+    """Codificações aceitas (q > 0) de um Accept-Encoding."""
+    accepted = set()
+    for part in (header or "").split(","):
+        token, _, params = part.partition(";")
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serve ``STATIC_URL`` com ``STATIC_SERVE = True``. Colocar logo depois do
+    SecurityMiddleware: os estáticos não passam por sessão/CSRF/auth.
+    Funciona no WSGI e no ASGI (sem adaptar o resto da cadeia para síncrono).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.enabled = getattr(settings, "STATIC_SERVE", False) and settings.STATIC_URL.startswith("/")
+        self.prefix = settings.STATIC_URL
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = build_index(settings.STATIC_ROOT)
+        return self._index
+
+    def _static_file(self, request):
+        if self.enabled and request.path_info.startswith(self.prefix) and request.method in ("GET", "HEAD"):
+            return self.index.get(request.path_info[len(self.prefix):])
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self._static_file(request)
+        if static_file is not None:
+            return self.serve(request, static_file)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        static_file = self._static_file(request)
+        if static_file is not None:
+            return self.serve(request, static_file)
+        return await self.get_response(request)
+
+    def serve(self, request, static_file):
+        accepted = _accepted(request.META.get("HTTP_ACCEPT_ENCODING"))
+        encoding = "identity"
+        for candidate, _ in ENCODINGS:
+            if candidate in static_file.variants and candidate in accepted:
+                encoding = candidate
+                break
+        path, size, etag, mtime = static_file.variants[encoding]
+
+        if_none_match = request.META.get("HTTP_IF_NONE_MATCH", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(path, "rb"), content_type=static_file.content_type)
+            response["Content-Length"] = str(size)
+            if encoding != "identity":
+                response["Content-Encoding"] = encoding
+
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(mtime)
+        if len(static_file.variants) > 1:
+            response["Vary"] = "Accept-Encoding"
+        if static_file.immutable:
+            response["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            response["Cache-Control"] = f"public, max-age={DEFAULT_MAX_AGE}"
+        return response
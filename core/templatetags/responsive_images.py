@@ -0,0 +1,73 @@
+import json
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.core.files.storage import default_storage
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core.image_variants import static_manifest_path
+
+register = template.Library()
+
+DEFAULT_SIZES = "100vw"
+
+
+def _srcset(items, url):
+    return ", ".join(f"{url(name)} {width}w" for width, name in items)
+
+
+def _picture(manifest, url, fallback_src, alt, sizes, attrs):
+    """``<picture>`` com WebP + fallback; sem manifesto, um ``<img>`` simples."""
+    extra = format_html_join("", ' {}="{}"', ((k.replace("_", "-"), v) for k, v in attrs.items() if v))
+    if not manifest or not manifest.get("fallback"):
+        return format_html('<img src="{}" alt="{}"{}>', fallback_src, alt, extra)
+
+    fallback = manifest["fallback"]
+    # maior variante de fallback como src (navegadores sem srcset)
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{}>'
+        '</picture>',
+        _srcset(manifest["webp"], url),
+        sizes,
+        url(fallback[-1][1]),
+        _srcset(fallback, url),
+        sizes,
+        manifest["width"],
+        manifest["height"],
+        alt,
+        extra,
+    )
+
+
+@register.simple_tag
+def machine_picture(machine, sizes=DEFAULT_SIZES, alt=None, **attrs):
+    """
+    Foto da máquina em tamanhos responsivos::
+
+        {% machine_picture machine sizes="(min-width: 768px) 33vw, 100vw" class="..." loading="lazy" %}
+    """
+    if not machine.image:
+        return ""
+    manifest = machine.image_variants or {}
+    if manifest.get("source") != machine.image.name:
+        manifest = None  # variantes ainda não geradas para a foto atual
+    return _picture(manifest, default_storage.url, machine.image.url, alt or machine.name, sizes, attrs)
+
+
+@lru_cache(maxsize=64)
+def _static_manifest(path):
+    found = finders.find(static_manifest_path(path))
+    if not found:
+        return None
+    with open(found, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@register.simple_tag
+def static_picture(path, sizes=DEFAULT_SIZES, alt="", **attrs):
+    """Imagem de ``static/`` com as variantes geradas por ``build_image_variants``."""
+    return _picture(_static_manifest(path), static, static(path), alt, sizes, attrs)
@@ -0,0 +1,102 @@
+import re
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import perf, settings_cache
+from core.catalog_cache import bump_catalog_version
+from core.models import Machine
+from core.search import search_machines
+
+
+class CatalogSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Machine.objects.create(name="Misturador", slug="misturador", description="Para massas e máquina de bolo")
+        Machine.objects.create(name="Máquina de Bater", slug="maquina-de-bater", capacity="25 L")
+        Machine.objects.create(name="Picador de Cana", slug="picador", short_description="Triturador elétrico")
+
+    def names(self, q):
+        return [m.name for m in search_machines(q, Machine.objects.all())]
+
+    def test_accent_and_case_insensitive_prefix(self):
+        self.assertEqual(self.names("MAQUINA"), ["Máquina de Bater", "Misturador"])
+        self.assertEqual(self.names("trit eletr"), ["Picador de Cana"])
+        self.assertEqual(self.names("25"), ["Máquina de Bater"])
+        self.assertEqual(self.names("inexistente"), [])
+
+    def test_index_follows_save_and_delete(self):
+        machine = Machine.objects.get(slug="picador")
+        machine.name = "Triturador Ágil"
+        machine.save()
+        self.assertEqual(self.names("agil"), ["Triturador Ágil"])
+        machine.delete()
+        self.assertEqual(self.names("agil"), [])
+
+    def test_machines_view(self):
+        response = self.client.get(reverse("machines"), {"q": "máq"})
+        self.assertEqual([m.name for m in response.context["machines"]], ["Máquina de Bater", "Misturador"])
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "catalog-etag"}},
+)
+class CatalogEtagTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        settings_cache._local.update(values=None, version=None, checked_at=0.0)
+
+    def etag(self):
+        return self.client.get(reverse("home"))["ETag"]
+
+    def test_etag_follows_the_worker_site_settings_copy(self):
+        self.etag()
+        # outro worker salvou o SiteSettings: versões novas no cache compartilhado
+        cache.set(settings_cache.VERSION_KEY, "outra", timeout=None)
+        bump_catalog_version()
+        stale = self.etag()
+        # vencido o TTL este worker relê o SiteSettings: o ETag não pode repetir
+        settings_cache._local["checked_at"] = 0.0
+        fresh = self.etag()
+        self.assertNotEqual(stale, fresh)
+        self.assertEqual(fresh, self.etag())
+
+
+@override_settings(
+    PERF_INSTRUMENTATION=True,
+    ASSISTENCIA_LIVE_TIMEOUT=0,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "perf"}},
+)
+class PerfMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Machine.objects.create(name="Misturador", slug="misturador")
+        cls.staff = get_user_model().objects.create_superuser("equipe", "equipe@example.com", "senha-teste")
+
+    def setUp(self):
+        # a conexão de teste abriu antes da instrumentação ser ligada; no
+        # deploy o ready() já deixa o signal conectado antes da 1ª conexão
+        perf.install_query_wrapper()
+
+    def queries(self, response):
+        return int(re.search(r'desc="(\d+) queries"', response["Server-Timing"]).group(1))
+
+    def test_sync_view(self):
+        self.assertGreater(self.queries(self.client.get(reverse("machines"))), 0)
+
+    def test_async_chain_is_not_adapted_to_sync(self):
+        async def view(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(perf.PerfMiddleware(view)))
+
+    async def test_async_view_counts_queries(self):
+        await self.async_client.aforce_login(self.staff)
+        response = await self.async_client.get(reverse("assistencia:staff_queue_updates"))
+        self.assertEqual(response.status_code, 200)
+        # queries do ORM assíncrono rodam em outra thread (sync_to_async)
+        self.assertGreater(self.queries(response), 0)
+        self.assertIsNone(perf._query_recorder.get())
@@ -1,33 +1,117 @@
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
 from urllib.parse import quote
 
 from django.conf import settings
 from django.contrib import messages
-from django.http import HttpRequest, HttpResponse
-from django.shortcuts import get_object_or_404, redirect, render
+from django.http import Http404, HttpRequest, HttpResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 
+from .catalog_cache import catalog_state, get_machine
 from .models import Machine
+from .search import search_machines
+from .settings_cache import site_settings_version
 
 def _wa_link(text: str) -> str:
     num = getattr(settings, "WHATSAPP_NUMBER", "")
     return f"https://wa.me/{num}?text={quote(text)}" if num else "#"
 
+def _has_messages(request: HttpRequest) -> bool:
+    # len() não marca as mensagens como lidas
+    storage = getattr(request, "_messages", None)
+    return storage is not None and len(storage) > 0
+
+def _catalog(request: HttpRequest):
+    # uma leitura do cache por request (ETag, Last-Modified e a view)
+    if not hasattr(request, "_catalog_state"):
+        request._catalog_state = catalog_state()
+    return request._catalog_state
+
+def _cache_context(request: HttpRequest) -> dict:
+    # chaves/tempo dos {% cache %} dos cards
+    return {
+        "catalog_version": _catalog(request)[0],
+        "catalog_cache_timeout": getattr(settings, "CATALOG_CACHE_TIMEOUT", 3600),
+    }
+
+def _catalog_etag(request: HttpRequest, *args, **kwargs):
+    # página com mensagem flash é única: sem ETag (nem 304)
+    if _has_messages(request):
+        return None
+    version = _catalog(request)[0]
+    # o rodapé mostra o ano e os dados do SiteSettings (cópia local do worker)
+    return f"{version}-{site_settings_version()}-{timezone.localdate().year}"
+
+def _catalog_last_modified(request: HttpRequest, *args, **kwargs):
+    if _has_messages(request):
+        return None
+    return datetime.fromtimestamp(_catalog(request)[1], tz=dt_timezone.utc)
+
+def _quote_etag(request: HttpRequest, *args, **kwargs):
+    # o formulário leva o token CSRF: o ETag muda junto com o cookie
+    etag = _catalog_etag(request)
+    token = request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    if etag is None or not token:
+        return None
+    return f"{etag}-{hashlib.md5(token.encode()).hexdigest()[:12]}"
+
+def catalog_page(etag_func=_catalog_etag, last_modified_func=_catalog_last_modified):
+    """
+    ETag/Last-Modified pela versão do catálogo: com If-None-Match/If-Modified-Since
+    batendo, devolve 304 sem executar a view. ``no-cache`` obriga navegador e
+    proxy a revalidar (não servem cópia velha depois de uma mudança no admin).
+    """
+    def decorator(view):
+        conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapped(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            private = _has_messages(request)
+            response = conditional(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if private:
+                    patch_cache_control(response, private=True)
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapped
+    return decorator
+
+@catalog_page()
 def home(request: HttpRequest) -> HttpResponse:
+    # querysets preguiçosos: só vão ao banco se o fragmento não estiver no cache
     featured = Machine.objects.filter(is_featured=True)[:6]
     machines = Machine.objects.all()[:6]
-    return render(request, "core/home.html", {"featured": featured, "machines": machines})
+    return render(request, "core/home.html", {
+        "featured": featured,
+        "machines": machines,
+        **_cache_context(request),
+    })
 
 def about(request: HttpRequest) -> HttpResponse:
     return render(request, "core/about.html")
 
+@catalog_page()
 def machines(request: HttpRequest) -> HttpResponse:
     q = request.GET.get("q", "").strip()
-    qs = Machine.objects.all()
+    machines = Machine.objects.all()
     if q:
-        qs = qs.filter(name__icontains=q)
-    return render(request, "core/machines.html", {"machines": qs, "q": q})
+        # sem acento/caixa, por prefixo e em ordem de relevância (core/search.py)
+        machines = search_machines(q, machines)
+    return render(request, "core/machines.html", {
+        "machines": machines,
+        "q": q,
+        **_cache_context(request),
+    })
 
+@catalog_page()
 def machine_detail(request: HttpRequest, slug: str) -> HttpResponse:
-    machine = get_object_or_404(Machine, slug=slug)
+    machine = get_machine(slug, _catalog(request)[0])
+    if machine is None:
+        raise Http404("Máquina não encontrada.")
     wa = _wa_link(
         f"Olá! Quero solicitar orçamento da máquina: {machine.name}. "
         f"Minha empresa é: ____ / Cidade: ____ / Volume de produção: ____"
@@ -37,6 +121,7 @@ def machine_detail(request: HttpRequest, slug: str) -> HttpResponse:
 def contact(request: HttpRequest) -> HttpResponse:
     return render(request, "core/contact.html")
 
+@catalog_page(etag_func=_quote_etag, last_modified_func=None)
 def request_quote(request: HttpRequest) -> HttpResponse:
     # Sem envio de email agora: envia pro WhatsApp com uma mensagem bem formatada.
     if request.method == "POST":
@@ -64,4 +149,7 @@ def request_quote(request: HttpRequest) -> HttpResponse:
         return redirect(_wa_link(text))
 
     machines = Machine.objects.all()
-    return render(request, "core/request_quote.html", {"machines": machines})
\ No newline at end of file
+    return render(request, "core/request_quote.html", {
+        "machines": machines,
+        **_cache_context(request),
+    })
\ No newline at end of file
@@ -0,0 +1,13 @@
+"""
+Entrada ASGI. Necessária para as views assíncronas de tempo real
+(long-poll da conversa e da fila da equipe, ASSISTENCIA_LIVE_ENABLED):
+
+    gunicorn giftex.asgi:application -k uvicorn.workers.UvicornWorker
+
+O resto do site roda igual ao WSGI.
+"""
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "giftex.settings")
+application = get_asgi_application()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,7 +21,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "core.perf.PerfMiddleware",  # só age com PERF_INSTRUMENTATION = True
     "django.middleware.security.SecurityMiddleware",
+    "core.staticfiles.StaticFilesMiddleware",  # só age com STATIC_SERVE = True
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -59,6 +62,23 @@ DATABASES = {
     }
 }
 
+# ========= Banco (perfil de produção) =========
+# WAL + busy_timeout + conexões persistentes para vários workers do gunicorn.
+# PRAGMAs em core/db.py (PRODUCTION_PRAGMAS); SQLITE_PRAGMAS sobrescreve itens.
+SQLITE_PRODUCTION = os.environ.get("GIFTEX_SQLITE_PRODUCTION") == "1"
+SQLITE_PRAGMAS = {}
+
+if SQLITE_PRODUCTION:
+    DATABASES["default"].update(
+        CONN_MAX_AGE=600,
+        CONN_HEALTH_CHECKS=True,
+        OPTIONS={
+            "timeout": 5,
+            # pega o lock de escrita no BEGIN: sem deadlock leitor->escritor no WAL
+            "transaction_mode": "IMMEDIATE",
+        },
+    )
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -75,16 +95,149 @@ STATIC_URL = "static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# ========= Arquivos estáticos (produção) =========
+# Sem DEBUG, o collectstatic grava nomes com hash + .gz/.br (core/staticfiles.py)
+# e o {% static %} passa a apontar para eles: rode collectstatic no deploy.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG
+            else "core.staticfiles.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+# gunicorn sem nginx: o StaticFilesMiddleware serve o STATIC_ROOT com
+# negociação br/gzip e cache "immutable" nos arquivos com hash
+STATIC_SERVE = not DEBUG
+
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# ========= Cache =========
+# Precisa ser compartilhado entre os workers do gunicorn (a versão das
+# configurações do site fica aqui). Em produção pode trocar por Redis/Memcached.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": BASE_DIR / "var" / "cache",
+    }
+}
+
+# quanto tempo (s) cada worker confia na sua cópia do SiteSettings
+SITE_SETTINGS_CACHE_TTL = 10
+
+# fragmentos/objetos do catálogo público; a chave já leva a versão do
+# catálogo (core/catalog_cache.py), o tempo só limita o lixo no cache
+CATALOG_CACHE_TIMEOUT = 3600
+
+# ========= Imagens responsivas =========
+# larguras geradas (WebP + JPEG/PNG) para Machine.image e as estáticas abaixo;
+# "python manage.py build_image_variants" gera/atualiza tudo
+CORE_IMAGE_VARIANT_WIDTHS = (320, 640, 960, 1280)
+CORE_STATIC_RESPONSIVE_IMAGES = ["img/hero-machine.png"]
+
+# ========= Conversa do chamado =========
+# polling leve é o padrão; SSE segura um worker por conexão no WSGI
+ASSISTENCIA_POLL_INTERVAL = 15   # segundos entre buscas no navegador
+ASSISTENCIA_SSE_ENABLED = False
+ASSISTENCIA_SSE_INTERVAL = 3     # segundos entre checagens no stream
+ASSISTENCIA_SSE_MAX_SECONDS = 30 # depois disso o navegador reconecta
+# deploy ASGI (giftex/asgi.py): long-poll assíncrono na conversa e na fila da equipe
+ASSISTENCIA_LIVE_ENABLED = False
+ASSISTENCIA_LIVE_TIMEOUT = 25    # segundos segurando a resposta sem novidade
+ASSISTENCIA_LIVE_RECHECK = 5     # consulta o banco mesmo sem aviso (mudanças de outros workers)
+
+# ========= Tarefas em segundo plano (assistencia_app/jobs.py) =========
+# fila no próprio banco; processe com "python manage.py run_jobs" (1+ processos)
+JOBS_EAGER = DEBUG             # sem worker no desenvolvimento: roda após o commit, no próprio request
+                               # (só tarefas sem espera; as com run_at no futuro ficam para o run_jobs)
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_BASE_SECONDS = 30   # espera antes da 2ª tentativa; dobra a cada falha
+JOBS_RETRY_MAX_SECONDS = 3600
+JOBS_LOCK_TIMEOUT = 600        # RUNNING há mais que isso = worker morreu; volta para a fila
+
+# ========= Avisos por e-mail (assistencia_app/notifications.py) =========
+# mudanças de status e respostas da equipe viram um resumo por cliente
+NOTIFICATIONS_ENABLED = True
+NOTIFICATIONS_DIGEST_WINDOW = 300   # segundos juntando eventos antes de enviar
+NOTIFICATIONS_BATCH_SIZE = 100      # e-mails por envio ao backend
+NOTIFICATIONS_KEEP_DAYS = 30        # avisos já enviados ficam esse tempo no admin
+SITE_URL = os.environ.get("GIFTEX_SITE_URL", "http://localhost:8000")  # links dos e-mails (troque)
+DEFAULT_FROM_EMAIL = "nao-responda@seudominio.com"  # troque
+# no desenvolvimento os e-mails viram arquivos em var/emails
+EMAIL_BACKEND = (
+    "django.core.mail.backends.filebased.EmailBackend"
+    if DEBUG
+    else "django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_FILE_PATH = BASE_DIR / "var" / "emails"
+
+# ========= Mídias dos chamados =========
+# miniaturas/prévias (e extração dos manuais) enfileiradas para o "run_jobs";
+# com False nada é enfileirado: rode "python manage.py build_media_derivatives" (cron)
+ASSISTENCIA_MEDIA_BACKGROUND = True
+FFMPEG_BINARY = "ffmpeg"  # capa dos vídeos; sem ffmpeg o vídeo fica sem prévia
+
+# ========= Manuais =========
+# páginas/miniatura/texto dos PDFs via poppler (pdfinfo, pdftotext, pdftoppm);
+# vazio = procura no PATH. Sem poppler o manual fica sem prévia.
+POPPLER_BIN_DIR = ""
+# entrega dos arquivos pela view (Range/304); com proxy na frente, repasse:
+# "" (Django serve), "x-sendfile" (Apache) ou "x-accel-redirect" (nginx)
+ASSISTENCIA_SENDFILE = ""
+ASSISTENCIA_SENDFILE_ACCEL_PREFIX = "/protected-media/"  # location internal do nginx -> MEDIA_ROOT
+
+# ========= Busca =========
+# índice FTS5 do SQLite (assistencia_app/search.py); False volta ao LIKE do admin
+ASSISTENCIA_SEARCH_ENABLED = True
+
+# ========= Exportações =========
+ASSISTENCIA_EXPORT_CSV_DELIMITER = ";"  # Excel em pt-BR espera ponto e vírgula
+
+# ========= Instrumentação (core/perf.py) =========
+# Server-Timing + log JSON por request, aviso de N+1 e p50/p95/p99 em /admin/perf/
+PERF_INSTRUMENTATION = os.environ.get("GIFTEX_PERF_INSTRUMENTATION") == "1"
+PERF_SLOW_QUERY_MS = 100
+PERF_DUPLICATE_QUERY_THRESHOLD = 5  # mesma query N vezes no request = N+1
+PERF_SAMPLE_SIZE = 500              # amostras por URL em cada worker
+PERF_FLUSH_SECONDS = 10             # de quanto em quanto tempo o worker publica no cache
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "giftex.perf": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 # ========= Login integrado (IMPORTANTE) =========
 LOGIN_URL = "/assistencia/login/"
 LOGIN_REDIRECT_URL = "/assistencia/"
 LOGOUT_REDIRECT_URL = "/"
 
+# ========= Limite de tentativas de login (assistencia_app/throttling.py) =========
+# janelas no cache compartilhado; bloqueado = 429 sem calcular o hash da senha
+LOGIN_THROTTLE_ENABLED = True
+LOGIN_THROTTLE_WINDOW = 900          # segundos em que as falhas contam
+LOGIN_THROTTLE_USER_LIMIT = 5        # falhas por usuário antes do 1º bloqueio
+LOGIN_THROTTLE_IP_LIMIT = 20         # falhas por IP (vários usuários) antes do 1º bloqueio
+LOGIN_THROTTLE_BASE_DELAY = 30       # 1º bloqueio; dobra a cada falha a mais na janela
+LOGIN_THROTTLE_MAX_DELAY = 3600
+LOGIN_THROTTLE_KNOWN_GOOD_TTL = 30 * 86400  # quem entrou desse IP nesse período não é barrado pela janela dele
+# ATENÇÃO NO DEPLOY: atrás de proxy reverso/balanceador (nginx, Caddy, Cloudflare, PaaS...)
+# o REMOTE_ADDR é o do proxy e TODOS os clientes caem na mesma janela de IP: 20 senhas
+# erradas de qualquer pessoa bloqueiam o login de quem ainda não entrou no site.
+# Coloque aqui quantos proxies na frente do Django gravam o X-Forwarded-For (1 = só o
+# nginx). Sem proxy deixe 0: aí o header vem do próprio cliente e seria forjado.
+LOGIN_THROTTLE_TRUSTED_PROXIES = 0
+
 # ========= Defaults do negócio (troque) =========
 SITE_NAME = "GIFT Excellence"
 SITE_TAGLINE = "Máquinas industriais com durabilidade, performance e segurança."
@@ -3,7 +3,10 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
 
+from core.admin import perf_stats_view
+
 urlpatterns = [
+    path("admin/perf/", admin.site.admin_view(perf_stats_view), name="perf_stats"),
     path("admin/", admin.site.urls),
 
     # ✅ Assistência técnica PRIMEIRO (pra não ser engolida pelo core.urls)